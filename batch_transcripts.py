@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Batch transcript ingestion.
+Parses every transcript PDF in the given directories/globs across a process pool,
+taking the student id and name from each PDF's header, and writes one combined
+JSON output plus a per-file error report.
+
+Usage:
+    python batch_transcripts.py transcripts/ --workers 8
+    python batch_transcripts.py 'intake_2025/*.pdf' --sql intake_2025_grades_load.sql
+    python batch_transcripts.py transcripts/ --stats cohort_stats.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from grade_aggregation import cohort_summary
+from parse_transcript_improved import TranscriptStream
+from records import to_json
+from transcript_sql import grade_rows, write_load_script
+
+
+def find_pdfs(inputs):
+    """Expand directories and glob patterns into a sorted, de-duplicated list of PDF paths."""
+    paths = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            paths.update(p for p in path.iterdir() if p.is_file() and p.suffix.lower() == '.pdf')
+        elif path.is_file():
+            paths.add(path)
+        else:
+            paths.update(Path(p) for p in glob.glob(item) if Path(p).is_file())
+    return sorted(paths)
+
+
+def parse_transcript_file(pdf_path):
+    """
+    Parse a single transcript PDF. Runs in a worker process, so failures are
+    returned as {'file', 'error'} instead of raised.
+    """
+    try:
+        stream = TranscriptStream(pdf_path)
+        courses = list(stream)
+        student_id, student_name = stream.student_id, stream.student_name
+        if not student_id:
+            return {'file': str(pdf_path), 'error': 'no student id found in transcript header'}
+
+        if not courses:
+            return {'file': str(pdf_path), 'error': 'no course grades found'}
+
+        return {
+            'file': str(pdf_path),
+            'student_id': student_id,
+            'student_name': student_name,
+            'courses': courses,
+            'metadata': {
+                'total_courses': len(courses),
+                'total_terms': len({(course.year, course.semester) for course in courses}),
+            },
+        }
+    except Exception as e:
+        return {'file': str(pdf_path), 'error': f"{type(e).__name__}: {e}"}
+
+
+def ingest(pdf_paths, workers=1):
+    """Parse pdf_paths (in order) and return (transcripts, errors)."""
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(pdf_paths) // (workers * 4))
+            results = list(executor.map(parse_transcript_file, pdf_paths, chunksize=chunksize))
+    else:
+        results = [parse_transcript_file(pdf_path) for pdf_path in pdf_paths]
+
+    transcripts = [result for result in results if 'error' not in result]
+    errors = [result for result in results if 'error' in result]
+    return transcripts, errors
+
+
+def batch_output(transcripts, errors, total_files):
+    """The combined transcripts_batch.json structure."""
+    return {
+        'transcripts': transcripts,
+        'metadata': {
+            'total_files': total_files,
+            'parsed': len(transcripts),
+            'failed': len(errors),
+            'total_students': len({t['student_id'] for t in transcripts}),
+            'total_courses': sum(t['metadata']['total_courses'] for t in transcripts),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse a batch of transcript PDFs in parallel.')
+    parser.add_argument('inputs', nargs='+', help='directories, PDF files or glob patterns')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('-o', '--output', default='transcripts_batch.json',
+                        help='combined output JSON (default: transcripts_batch.json)')
+    parser.add_argument('--errors', default='transcripts_batch_errors.json',
+                        help='per-file error report (default: transcripts_batch_errors.json)')
+    parser.add_argument('--sql', help='also write a COPY-based grade load script (see transcript_sql.py)')
+    parser.add_argument('--stats', help='also write term/cumulative GPA, units passed and per-course grade '
+                                        'distributions for the cohort (see grade_aggregation.py)')
+    args = parser.parse_args()
+
+    pdf_paths = find_pdfs(args.inputs)
+    if not pdf_paths:
+        print("Error: no transcript PDFs found")
+        sys.exit(1)
+
+    print(f"Ingesting {len(pdf_paths)} transcript PDF(s) with {args.workers} worker(s)...")
+    start = time.perf_counter()
+    transcripts, errors = ingest([str(p) for p in pdf_paths], workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    output = batch_output(transcripts, errors, len(pdf_paths))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False, default=to_json)
+    print(f"\nData saved to: {args.output}")
+
+    with open(args.errors, 'w', encoding='utf-8') as f:
+        json.dump(errors, f, indent=2, ensure_ascii=False)
+    print(f"Error report saved to: {args.errors}")
+
+    if args.sql:
+        rows = []
+        for transcript in transcripts:
+            rows.extend(grade_rows(transcript['student_id'], transcript['courses']))
+        with open(args.sql, 'w', encoding='utf-8') as f:
+            write_load_script(f, rows)
+        print(f"Grade load script saved to: {args.sql}")
+
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump(cohort_summary(transcripts), f, indent=2, ensure_ascii=False)
+        print(f"Cohort statistics saved to: {args.stats}")
+
+    print(f"\nParsed {len(transcripts)}/{len(pdf_paths)} transcripts ({len(errors)} failed)")
+    for error in errors[:10]:
+        print(f"  {error['file']}: {error['error']}")
+    if len(errors) > 10:
+        print(f"  ... and {len(errors) - 10} more, see {args.errors}")
+    print(f"Elapsed: {elapsed:.2f}s, throughput: {len(pdf_paths) / elapsed:.2f} PDFs/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for grade_aggregation.
+Times cohort GPA aggregation as the per-student loop (grade_aggregation.loop_summary,
+the path taken without NumPy) against the columnar group-by of grade_aggregation,
+and checks both agree.
+
+The cohort is synthetic: filbert_transcript_real.json's courses with the letter
+grades re-drawn per student, so pdfplumber is not needed.
+"""
+
+import argparse
+import json
+import random
+import time
+
+import grade_aggregation
+from grade_aggregation import GradeTable, aggregate_students, grade_distributions, loop_summary, term_stats
+from parse_grammar import GRADE_POINTS
+from records import GradeRecord
+
+LETTER_GRADES = ('A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'F', 'PA', 'IP', 'W')
+
+
+def synthetic_cohort(students, seed=0):
+    with open('filbert_transcript_real.json', 'r', encoding='utf-8') as f:
+        courses = json.load(f)['courses']
+    rng = random.Random(seed)
+    cohort = []
+    for i in range(students):
+        records = []
+        for course in courses:
+            letter_grade = rng.choice(LETTER_GRADES)
+            records.append(GradeRecord(course['course_code'], course['course_name'], course['credits'],
+                                       letter_grade, None, course['semester'], course['year'],
+                                       GRADE_POINTS.get(letter_grade)))
+        cohort.append({'student_id': f"{120000000 + i}", 'courses': records})
+    return cohort
+
+
+def columnar_summary(cohort):
+    table = GradeTable.from_transcripts(cohort)
+    return aggregate_students(table), grade_distributions(table)
+
+
+def rounded(students):
+    """Students with GPAs rounded, since the two sides sum in a different order."""
+    def gpa(value):
+        return round(value, 9) if value is not None else None
+    return [{**student, 'cumulative_gpa': gpa(student['cumulative_gpa']),
+             'terms': [{**term, 'term_gpa': gpa(term['term_gpa']), 'cumulative_gpa': gpa(term['cumulative_gpa'])}
+                       for term in student['terms']]}
+            for student in students]
+
+
+def best_time(func, argument, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(argument)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the per-student GPA loop with grade_aggregation.')
+    parser.add_argument('--students', type=int, default=5000, help='synthetic cohort size (default: 5000)')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    cohort = synthetic_cohort(args.students)
+    grades = sum(len(transcript['courses']) for transcript in cohort)
+
+    loop_students, loop_distributions = loop_summary(cohort)
+    columnar_students, columnar_distributions = columnar_summary(cohort)
+    assert rounded(loop_students) == rounded(columnar_students)
+    assert loop_distributions == columnar_distributions
+
+    backend = 'numpy' if grade_aggregation.np is not None else 'python'
+    print(f"{args.students} students, {grades} grades, backend: {backend} "
+          f"(cohort_summary uses {'columnar' if grade_aggregation.np is not None else 'loop'})")
+    table = GradeTable.from_transcripts(cohort)
+    cases = [
+        ('loop', best_time(loop_summary, cohort, args.repeat)),
+        ('columnar', best_time(columnar_summary, cohort, args.repeat)),
+        # The columnar total split into its parts
+        ('  load table', best_time(GradeTable.from_transcripts, cohort, args.repeat)),
+        ('  group-by', best_time(lambda table: (term_stats(table), grade_distributions(table)), table, args.repeat)),
+        ('  format', best_time(aggregate_students, table, args.repeat)),
+    ]
+    print(f"{'case':<14}{'seconds':>10}{'us/grade':>10}")
+    for name, seconds in cases:
+        print(f"{name:<14}{seconds:>10.3f}{seconds / grades * 1e6:>10.2f}")
+    print(f"speedup: {cases[0][1] / cases[1][1]:.2f}x total, {cases[0][1] / cases[3][1]:.1f}x loop vs group-by alone")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for parse_grammar.
+Times the per-line matching work of the parsers with inline string-literal
+patterns and per-call lookup tables (the old style) against the precompiled
+patterns and module-level tables in parse_grammar.
+
+Inputs come from checked-in files, so pdfplumber is not needed:
+transcript_extracted_text.txt, course_data.json and the exam timetable JSON.
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+from parse_grammar import (
+    COURSE_CODE_RE,
+    CREDITS_RE,
+    DATE_PATTERNS,
+    EMAIL_RE,
+    EXAM_COURSE_CODE_RE,
+    EXAM_DATE_RE,
+    GRADE_LINE_RE,
+    GRADE_POINTS,
+    LOCATION_PATTERNS,
+    MONTHS,
+    TERM_HEADER_RE,
+    TIME_RANGE_RE,
+    TRAILING_UNITS_RE,
+)
+
+EXAMS_JSON = 'Course Examinations for Full-time Undergraduate Programmes of Term 1, 2025-26 - Timetable_0_exams.json'
+
+
+def load_lines():
+    transcript_lines = [line.strip() for line in Path('transcript_extracted_text.txt').read_text(encoding='utf-8').split('\n')]
+    transcript_lines = [line for line in transcript_lines if line]
+
+    with open('course_data.json', 'r', encoding='utf-8') as f:
+        course_lines = [f"{c['course_code']} {c['course_name']} {c['instructor_name']} {c['credits']} units"
+                        for c in json.load(f)['courses']]
+
+    with open(EXAMS_JSON, 'r', encoding='utf-8') as f:
+        exam_lines = [f"{e['courseCode']} {e['courseName']} Dec 14 {e['startTime']}-{e['endTime']} LT1"
+                      for e in json.load(f) if e['startTime']]
+
+    return transcript_lines, course_lines, exam_lines
+
+
+# --- Old style: literal patterns and tables rebuilt on every call ---
+
+def transcript_line_before(line):
+    if re.search(r'(\d{4})-(\d{2})(Term1|Term2|SummerSession)', line):
+        return None
+    if re.match(r'^\d{4}-\d{2}(Term1|Term2|SummerSession)', line):
+        return None
+    match = re.match(r'^([A-Z]{2,6}\d{4}[A-Z]?)\s+(.+?)\s+(\d+\.?\d*)\s+(PA|NP|IP|[A-Z][+-]?|W|I|S|U)\s*', line)
+    if match:
+        grade_points_map = {
+            'A+': 4.0, 'A': 4.0, 'A-': 3.7,
+            'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+            'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+            'D+': 1.3, 'D': 1.0, 'D-': 0.7,
+            'F': 0.0
+        }
+        return re.sub(r'\s+\d+\.?\d*\s*$', '', match.group(2)), grade_points_map.get(match.group(4).upper())
+    return None
+
+
+def course_line_before(line):
+    match = re.search(r'([A-Z]{2,6}\s+\d{4})', line)
+    re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', line)
+    re.search(r'(\d+)\s*(?:credit|unit)', line, re.IGNORECASE)
+    return match
+
+
+def exam_line_before(line):
+    re.search(r'([A-Z]{2,6}\s*\d{4}[A-Z]?)', line)
+    date_match = re.search(r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}', line, re.IGNORECASE)
+    if date_match:
+        months = {
+            'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+            'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+        }
+        for pattern in [r'(\w{3,9})\s+(\d{1,2})', r'(\d{1,2})\s+(\w{3,9})']:
+            if re.search(pattern, date_match.group(0).lower()):
+                months.get(date_match.group(0)[:3].lower())
+                break
+    re.search(r'(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})', line)
+    for pattern in [r'([A-Z]+\s*\d+[A-Z]?)', r'(Room\s+\d+)', r'(Lecture\s+Theatre\s+\d+)']:
+        if re.search(pattern, line, re.IGNORECASE):
+            break
+
+
+# --- New style: parse_grammar ---
+
+def transcript_line_after(line):
+    if TERM_HEADER_RE.search(line):
+        return None
+    match = GRADE_LINE_RE.match(line)
+    if match:
+        return TRAILING_UNITS_RE.sub('', match.group(2)), GRADE_POINTS.get(match.group(4).upper())
+    return None
+
+
+def course_line_after(line):
+    match = COURSE_CODE_RE.search(line)
+    EMAIL_RE.search(line)
+    CREDITS_RE.search(line)
+    return match
+
+
+def exam_line_after(line):
+    EXAM_COURSE_CODE_RE.search(line)
+    date_match = EXAM_DATE_RE.search(line)
+    if date_match:
+        for pattern in DATE_PATTERNS:
+            if pattern.search(date_match.group(0).lower()):
+                MONTHS.get(date_match.group(0)[:3].lower())
+                break
+    TIME_RANGE_RE.search(line)
+    for pattern in LOCATION_PATTERNS:
+        if pattern.search(line):
+            break
+
+
+def compare(before, after, lines, repeat, passes=5):
+    """
+    Return (before_ns, after_ns) per line. Runs are interleaved and the best of
+    repeat is kept, so machine noise affects both sides alike.
+    """
+    def timed(func):
+        start = time.perf_counter()
+        for _ in range(passes):
+            for line in lines:
+                func(line)
+        return (time.perf_counter() - start) / (passes * len(lines)) * 1e9
+
+    before_times = []
+    after_times = []
+    for _ in range(repeat):
+        before_times.append(timed(before))
+        after_times.append(timed(after))
+    return min(before_times), min(after_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-line parsing cost before/after parse_grammar.')
+    parser.add_argument('--repeat', type=int, default=20, help='timing repetitions, best is reported (default: 20)')
+    args = parser.parse_args()
+
+    transcript_lines, course_lines, exam_lines = load_lines()
+    cases = [
+        ('transcript grade lines', transcript_lines, transcript_line_before, transcript_line_after),
+        ('course text lines', course_lines, course_line_before, course_line_after),
+        ('exam text lines', exam_lines, exam_line_before, exam_line_after),
+    ]
+
+    print(f"{'case':<24}{'lines':>7}{'before ns/line':>16}{'after ns/line':>15}{'speedup':>9}")
+    for name, lines, before, after in cases:
+        before_ns, after_ns = compare(before, after, lines, args.repeat)
+        print(f"{name:<24}{len(lines):>7}{before_ns:>16.0f}{after_ns:>15.0f}{before_ns / after_ns:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
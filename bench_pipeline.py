@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the PDF ingestion pipeline.
+Runs each parser against the checked-in PDFs, one fresh subprocess per run, and
+reports wall time, per-page time, peak RSS and records extracted. Results are
+saved as JSON; pass --compare with an earlier results file to flag regressions.
+
+Usage:
+    python bench_pipeline.py                       # all cases, writes bench_results.json
+    python bench_pipeline.py --cases course exams --repeat 5
+    python bench_pipeline.py -o new.json --compare bench_results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+COURSE_PDF = 'Formal Course Registration Course Offering Information_AY2025-26 Term 1(Updated on August 15)[68] copy.pdf'
+EXAM_PDF = 'Course Examinations for Full-time Undergraduate Programmes of Term 1, 2025-26 - Timetable_0.pdf'
+CALENDAR_2025_PDF = 'Annex 2 Calendar View of Academic Calendar 2025-26 (Tentative)-Revised to Website -Updated Version-FINAL-PDF_1.pdf'
+CALENDAR_2024_PDF = 'Calendar View of Academic Calendar 2024-25 -Final (1).pdf'
+TRANSCRIPT_PDF = 'FilbertHamijoyo_CUSZ_TSCRPT.pdf'
+
+
+def run_course():
+    from parse_course_pdf import extract_from_tables
+    courses, _ = extract_from_tables(COURSE_PDF)
+    return len(courses)
+
+
+def run_exams():
+    from parse_exam_schedules import extract_from_tables
+    return len(extract_from_tables(EXAM_PDF))
+
+
+def run_calendar_2025():
+    from parse_academic_calendar import extract_calendar_events
+    return len(extract_calendar_events(CALENDAR_2025_PDF))
+
+
+def run_calendar_2024():
+    from parse_academic_calendar_2024 import extract_calendar_events
+    return len(extract_calendar_events(CALENDAR_2024_PDF))
+
+
+def run_transcript():
+    from parse_transcript_improved import TranscriptStream
+    return sum(1 for _ in TranscriptStream(TRANSCRIPT_PDF))
+
+
+# name -> (pdf_path, runner returning the number of records extracted)
+CASES = {
+    'course': (COURSE_PDF, run_course),
+    'exams': (EXAM_PDF, run_exams),
+    'calendar_2025': (CALENDAR_2025_PDF, run_calendar_2025),
+    'calendar_2024': (CALENDAR_2024_PDF, run_calendar_2024),
+    'transcript': (TRANSCRIPT_PDF, run_transcript),
+}
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB (ru_maxrss is bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_case_in_process(name):
+    """Run one case in this process and return its measurements. Used by the child processes."""
+    from pdf_cache import open_pdf
+
+    pdf_path, runner = CASES[name]
+    with open_pdf(pdf_path) as pdf:
+        pages = len(pdf.pages)
+
+    # The parsers report progress on stdout; keep it out of the measurement output
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        records = runner()
+        wall = time.perf_counter() - start
+
+    return {
+        'wall_s': wall,
+        'pages': pages,
+        'per_page_s': wall / pages if pages else None,
+        'peak_rss_kb': peak_rss_kb(),
+        'records': records,
+    }
+
+
+def run_case(name, repeat, use_cache):
+    """Run a case repeat times, each in a fresh interpreter; keep the best wall time and worst RSS."""
+    env = dict(os.environ)
+    if not use_cache:
+        env['PDF_CACHE'] = '0'
+
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, __file__, '--run-case', name],
+            env=env, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"case {name} failed:\n{completed.stderr}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    best = min(runs, key=lambda run: run['wall_s'])
+    return {
+        **best,
+        'peak_rss_kb': max(run['peak_rss_kb'] for run in runs),
+        'runs_wall_s': [run['wall_s'] for run in runs],
+    }
+
+
+def git_commit():
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True)
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
+
+
+def compare_results(current, baseline, threshold):
+    """Return a list of regression messages for cases present in both result sets."""
+    regressions = []
+    for name, result in current['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous:
+            continue
+        if result['records'] != previous['records']:
+            regressions.append(f"{name}: records changed {previous['records']} -> {result['records']}")
+        if result['wall_s'] > previous['wall_s'] * (1 + threshold):
+            regressions.append(f"{name}: wall time {previous['wall_s']:.3f}s -> {result['wall_s']:.3f}s")
+        if result['peak_rss_kb'] > previous['peak_rss_kb'] * (1 + threshold):
+            regressions.append(f"{name}: peak RSS {previous['peak_rss_kb']} KB -> {result['peak_rss_kb']} KB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PDF parsers on the checked-in PDFs.')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES),
+                        help='cases to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, best wall time is kept (default: 3)')
+    parser.add_argument('--cache', action='store_true',
+                        help='run with the PDF extraction cache enabled (default: disabled, measures pdfplumber)')
+    parser.add_argument('-o', '--output', default='bench_results.json',
+                        help='results file (default: bench_results.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative slowdown/growth counted as a regression (default: 0.10)')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case_in_process(args.run_case)))
+        return
+
+    try:
+        import pdfplumber
+        pdfplumber_version = pdfplumber.__version__
+    except ImportError:
+        pdfplumber_version = None
+
+    results = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'pdfplumber': pdfplumber_version,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'cache': args.cache,
+        },
+        'cases': {},
+    }
+
+    print(f"{'case':<16}{'pages':>6}{'wall s':>9}{'ms/page':>9}{'peak RSS MB':>13}{'records':>9}")
+    for name in args.cases:
+        result = run_case(name, args.repeat, args.cache)
+        results['cases'][name] = result
+        per_page_ms = result['per_page_s'] * 1000 if result['per_page_s'] is not None else 0
+        print(f"{name:<16}{result['pages']:>6}{result['wall_s']:>9.3f}{per_page_ms:>9.1f}"
+              f"{result['peak_rss_kb'] / 1024:>13.1f}{result['records']:>9}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions against {args.compare}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (threshold {args.threshold:.0%})")
+
+
+if __name__ == '__main__':
+    main()
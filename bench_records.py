@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for records.
+Compares the retained memory and JSON/row serialization time of the course
+offerings as plain per-row dicts (the old style: one dict per course, copied
+once per instructor) against the slotted Course/CourseOffering records.
+
+Each simulated term re-reads course_data.json, so its strings are fresh objects
+as they would be from a separate parse; the records intern the repeated ones.
+Inputs come from checked-in files, so pdfplumber is not needed.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from records import Course, to_json
+
+
+def load_term(text):
+    """Group one term's offerings back into per-course dicts with their instructor names."""
+    courses = {}
+    for row in json.loads(text)['courses']:
+        key = (row['course_code'], row['course_name'], row['department'])
+        course = courses.setdefault(key, {
+            'course_code': row['course_code'],
+            'course_name': row['course_name'],
+            'department': row['department'],
+            'instructor_names': [],
+            'credits': row['credits'],
+            'semester': row['semester'],
+            'year': row['year'],
+        })
+        if row['instructor_name']:
+            course['instructor_names'].append(row['instructor_name'])
+    return list(courses.values())
+
+
+def build_dicts(courses):
+    offerings = []
+    for course in courses:
+        for instructor_name in course['instructor_names'] or ['']:
+            offerings.append({
+                'course_code': course['course_code'],
+                'course_name': course['course_name'],
+                'department': course['department'],
+                'instructor_name': instructor_name,
+                'instructor_email': '',
+                'credits': course['credits'],
+                'semester': course['semester'],
+                'year': course['year'],
+            })
+    return courses, offerings
+
+
+def build_records(courses):
+    records = [Course.from_dict(course) for course in courses]
+    return records, [offering for course in records for offering in course.offerings()]
+
+
+def retained_bytes(build, text, terms):
+    """Bytes still allocated after building every term (the parsed JSON itself is dropped)."""
+    tracemalloc.start()
+    kept = []
+    for _ in range(terms):
+        kept.append(build(load_term(text)))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, kept
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare plain dict rows with the slotted records.')
+    parser.add_argument('--terms', type=int, default=8, help='terms held in memory at once (default: 8)')
+    parser.add_argument('--repeat', type=int, default=10, help='timing repetitions, best is reported (default: 10)')
+    args = parser.parse_args()
+
+    text = Path('course_data.json').read_text(encoding='utf-8')
+
+    dict_bytes, dict_terms = retained_bytes(build_dicts, text, args.terms)
+    record_bytes, record_terms = retained_bytes(build_records, text, args.terms)
+    dict_rows = [row for _, offerings in dict_terms for row in offerings]
+    record_rows = [row for _, offerings in record_terms for row in offerings]
+    assert [row.to_dict() for row in record_rows] == dict_rows
+
+    cases = [
+        ('build', lambda: build_dicts(load_term(text)), lambda: build_records(load_term(text))),
+        ('to JSON', lambda: json.dumps(dict_rows), lambda: json.dumps(record_rows, default=to_json)),
+        ('to rows', lambda: [tuple(row.values()) for row in dict_rows], lambda: [row.to_row() for row in record_rows]),
+    ]
+
+    print(f"{args.terms} terms, {len(dict_rows)} offerings")
+    print(f"{'retained MB':<14}{'dicts':>10}{'records':>10}{'ratio':>9}")
+    print(f"{'':<14}{dict_bytes / 1e6:>10.2f}{record_bytes / 1e6:>10.2f}{dict_bytes / record_bytes:>8.2f}x")
+    print()
+    print(f"{'case':<14}{'dicts ms':>10}{'records ms':>12}{'speedup':>9}")
+    for name, before, after in cases:
+        before_s = best_time(before, args.repeat)
+        after_s = best_time(after, args.repeat)
+        print(f"{name:<14}{before_s * 1000:>10.2f}{after_s * 1000:>12.2f}{before_s / after_s:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Interval index over academic calendar events.
+
+Events from one or more academic years (academic_calendar_events*.json) are
+indexed as closed date intervals [start_date, end_date]. An event with no
+end_date covers only its start date. The index keeps the sorted interval
+endpoints. Between two consecutive endpoints the set of events in progress does
+not change, so it is stored once per segment. Queries then work as follows:
+- A point query ("is add/drop open today") is one bisect into the endpoints,
+  O(log n + k).
+- A range query ("which holidays fall in this week") adds the events starting
+  inside the range, found by bisecting the sorted start dates.
+- The bulk queries answer thousands of dates with one bisect each, where
+  scanning the list would take one full pass per date.
+
+Usage:
+    python calendar_index.py on                            # events in progress today
+    python calendar_index.py on 2025-10-03 --type HOLIDAY
+    python calendar_index.py between 2025-09-29 2025-10-05 --type HOLIDAY
+    python calendar_index.py check dates.txt --type ADD_DROP   # one date per line, - for stdin
+"""
+
+import argparse
+import json
+import sys
+from bisect import bisect_right
+from datetime import date
+from pathlib import Path
+
+from records import CalendarEvent
+
+EVENT_FILES = ('academic_calendar_events.json', 'academic_calendar_events_2024.json')
+
+
+def to_ordinal(day):
+    """Proleptic ordinal of a date, datetime or ISO string ('2025-10-03' or '2025-10-03T00:00:00')."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    return day.toordinal()
+
+
+def load_events(paths):
+    """
+    CalendarEvents from the parsers' JSON files, in file order. The parsers write each
+    (start, end, name) once; a file that repeats one predates the single-pass scanner
+    and may hold wrong dates, so a warning asks for it to be regenerated.
+    """
+    events = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            file_events = [CalendarEvent.from_dict(event) for event in json.load(f)]
+        keys = {(event.start_date, event.end_date, event.name) for event in file_events}
+        if len(keys) < len(file_events):
+            print(f"Warning: {path} repeats {len(file_events) - len(keys)} event(s) and looks stale; "
+                  "re-run parse_academic_calendar.py", file=sys.stderr)
+        events.extend(file_events)
+    return events
+
+
+class CalendarIndex:
+    """
+    Calendar events indexed by date. Events are returned in the order they were
+    given; event_type filters take one type or a collection of types.
+    """
+
+    def __init__(self, events):
+        self.events = list(events)
+        self.starts = [to_ordinal(event.start_date) for event in self.events]
+        # A range ending before it starts is treated as its start day
+        self.ends = [max(to_ordinal(event.end_date), start) if event.end_date else start
+                     for event, start in zip(self.events, self.starts)]
+
+        # Segment i covers days points[i] .. points[i + 1] - 1, with events active[i] in progress
+        starting = {}
+        ending = {}
+        for i, (start, end) in enumerate(zip(self.starts, self.ends)):
+            starting.setdefault(start, []).append(i)
+            ending.setdefault(end + 1, []).append(i)
+        self.points = sorted(starting.keys() | ending.keys())
+        self.active = []
+        in_progress = set()
+        for point in self.points:
+            in_progress.difference_update(ending.get(point, ()))
+            in_progress.update(starting.get(point, ()))
+            self.active.append(tuple(sorted(in_progress)))
+
+        self.by_start = sorted(range(len(self.events)), key=self.starts.__getitem__)
+        self.start_keys = [self.starts[i] for i in self.by_start]
+
+    @classmethod
+    def from_files(cls, paths=EVENT_FILES):
+        return cls(load_events(paths))
+
+    def __len__(self):
+        return len(self.events)
+
+    def _segment(self, ordinal):
+        """Event ids in progress on a day."""
+        i = bisect_right(self.points, ordinal) - 1
+        return self.active[i] if i >= 0 else ()
+
+    def _type_filter(self, event_type):
+        if event_type is None:
+            return None
+        return {event_type} if isinstance(event_type, str) else set(event_type)
+
+    def _select(self, ids, event_type):
+        types = self._type_filter(event_type)
+        return [self.events[i] for i in ids if types is None or self.events[i].event_type in types]
+
+    def events_on(self, day, event_type=None):
+        """Events in progress on day."""
+        return self._select(self._segment(to_ordinal(day)), event_type)
+
+    def is_active(self, day, event_type=None):
+        """Whether an event of event_type (any event if None) is in progress on day, e.g. is_active(today, 'ADD_DROP')."""
+        return bool(self.events_on(day, event_type))
+
+    def events_between(self, first_day, last_day, event_type=None):
+        """Events overlapping first_day .. last_day (inclusive): in progress at its start, or starting inside it."""
+        first, last = to_ordinal(first_day), to_ordinal(last_day)
+        if last < first:
+            return []
+        lo = bisect_right(self.start_keys, first)
+        hi = bisect_right(self.start_keys, last)
+        ids = sorted(set(self._segment(first)).union(self.by_start[lo:hi]))
+        return self._select(ids, event_type)
+
+    def events_on_many(self, days, event_type=None):
+        """events_on for every day, as one list per day in input order."""
+        types = self._type_filter(event_type)
+        # Each segment's (filtered) event list is built once, however many days fall in it
+        segments = [[self.events[i] for i in ids if types is None or self.events[i].event_type in types]
+                    for ids in self.active]
+        points = self.points
+        return [segments[i] if i >= 0 else [] for i in
+                (bisect_right(points, to_ordinal(day)) - 1 for day in days)]
+
+    def is_active_many(self, days, event_type=None):
+        """is_active for every day, in input order."""
+        types = self._type_filter(event_type)
+        flags = [bool(ids) if types is None else any(self.events[i].event_type in types for i in ids)
+                 for ids in self.active]
+        points = self.points
+        return [i >= 0 and flags[i] for i in (bisect_right(points, to_ordinal(day)) - 1 for day in days)]
+
+
+def describe(event):
+    dates = f"{event.start_date} - {event.end_date}" if event.end_date else event.start_date
+    return f"{dates:<25} {event.event_type:<14} {event.name}"
+
+
+def read_dates(path):
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        return [line.strip() for line in f if line.strip()]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Point, range and bulk date queries over the academic calendar events.')
+    parser.add_argument('--files', action='append',
+                        help=f"calendar event JSON file (repeatable; default: {' '.join(EVENT_FILES)})")
+    type_filter = argparse.ArgumentParser(add_help=False)
+    type_filter.add_argument('--type', dest='event_type', action='append',
+                             help='only events of this type, e.g. HOLIDAY or ADD_DROP (repeatable)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    on = commands.add_parser('on', parents=[type_filter], help='events in progress on a date (default: today)')
+    on.add_argument('date', nargs='?', default=date.today().isoformat())
+    between = commands.add_parser('between', parents=[type_filter], help='events overlapping a date range (inclusive)')
+    between.add_argument('first_date')
+    between.add_argument('last_date')
+    check = commands.add_parser('check', parents=[type_filter],
+                                help='bulk check of many dates, read one per line from a file or -')
+    check.add_argument('dates_file')
+    args = parser.parse_args()
+
+    files = [path for path in args.files or EVENT_FILES if Path(path).exists()]
+    if not files:
+        print("Error: no calendar event files found")
+        sys.exit(1)
+    index = CalendarIndex.from_files(files)
+
+    try:
+        if args.command == 'on':
+            events = index.events_on(args.date, args.event_type)
+            print(f"{len(events)} event(s) in progress on {args.date}")
+            for event in events:
+                print(f"  {describe(event)}")
+        elif args.command == 'between':
+            events = index.events_between(args.first_date, args.last_date, args.event_type)
+            print(f"{len(events)} event(s) between {args.first_date} and {args.last_date}")
+            for event in events:
+                print(f"  {describe(event)}")
+        else:
+            days = read_dates(args.dates_file)
+            for day, events in zip(days, index.events_on_many(days, args.event_type)):
+                print(f"{day}\t{'; '.join(event.name for event in events)}")
+    except ValueError as e:
+        parser.error(f"invalid date: {e}")
+
+
+if __name__ == '__main__':
+    main()
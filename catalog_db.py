@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Local SQLite catalog of the parsed course, exam and calendar data.
+
+Loads course_data.json, the *_exams.json timetables and the
+academic_calendar_events*.json files into one catalog.db, so consumers can do
+index lookups (course code, department, instructor name, exam date) instead
+of parsing and scanning the pretty-printed JSON. Each table's rows come from
+the records' to_row(), and the whole load is bulk executemany in a single
+transaction. Indexes are created after the rows are in, and the file is built
+beside the target and renamed over it, so readers never see a partial catalog.
+
+Usage:
+    python catalog_db.py build                         # the JSON outputs in the current directory
+    python catalog_db.py build --dir out/ -o out/catalog.db
+    python catalog_db.py course CSC3100
+    python catalog_db.py department SDS
+    python catalog_db.py instructor "ZHANG"            # case-insensitive name prefix
+    python catalog_db.py exams 2025-12-14
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+from records import CalendarEvent, Course, Exam
+
+DB_PATH = Path('catalog.db')
+COURSE_DATA = 'course_data.json'
+EXAMS_GLOB = '*_exams.json'
+CALENDAR_GLOB = 'academic_calendar_events*.json'
+
+# Column order follows each record's to_row()
+SCHEMA = """
+CREATE TABLE courses (
+    course_code TEXT PRIMARY KEY,
+    course_name TEXT,
+    department TEXT,
+    instructor_names TEXT,
+    credits INTEGER,
+    semester TEXT,
+    year INTEGER
+);
+CREATE TABLE sections (
+    course_code TEXT NOT NULL REFERENCES courses (course_code),
+    section TEXT,
+    instructor_names TEXT,
+    capacity INTEGER,
+    activity_count INTEGER,
+    reserved_quota TEXT,
+    schedule TEXT,
+    venue TEXT,
+    language TEXT,
+    target_students TEXT,
+    remark TEXT
+);
+CREATE TABLE offerings (
+    course_code TEXT NOT NULL,
+    course_name TEXT,
+    department TEXT,
+    instructor_name TEXT COLLATE NOCASE,
+    instructor_email TEXT,
+    credits INTEGER,
+    semester TEXT,
+    year INTEGER
+);
+CREATE TABLE exams (
+    course_code TEXT NOT NULL,
+    course_name TEXT,
+    exam_date TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    location TEXT,
+    term TEXT,
+    year INTEGER
+);
+CREATE TABLE calendar_events (
+    event_type TEXT,
+    term TEXT,
+    year INTEGER,
+    start_date TEXT,
+    end_date TEXT,
+    name TEXT,
+    description TEXT
+);
+CREATE TABLE sources (
+    kind TEXT,
+    path TEXT,
+    rows INTEGER
+);
+"""
+
+# Created once the rows are loaded; instructor_name is NOCASE so prefix LIKE can use its index
+INDEXES = """
+CREATE INDEX courses_department ON courses (department);
+CREATE INDEX sections_course_code ON sections (course_code);
+CREATE INDEX offerings_course_code ON offerings (course_code);
+CREATE INDEX offerings_instructor_name ON offerings (instructor_name);
+CREATE INDEX exams_course_code ON exams (course_code);
+CREATE INDEX exams_exam_date ON exams (exam_date, start_time);
+CREATE INDEX calendar_events_start_date ON calendar_events (start_date);
+"""
+
+OFFERING_COLUMNS = ('course_code', 'course_name', 'department', 'instructor_name', 'instructor_email',
+                    'credits', 'semester', 'year')
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def courses_from_offerings(rows):
+    """
+    Courses rebuilt from the flat course-instructor rows, for course_data.json files
+    written before the nested 'catalog' section existed. These have no section data.
+    """
+    courses = {}
+    for row in rows:
+        course = courses.get(row['course_code'])
+        if course is None:
+            courses[row['course_code']] = Course(row['course_code'], row['course_name'], row['department'],
+                                                 [row['instructor_name']], row['credits'], row['semester'], row['year'])
+        elif row['instructor_name'] not in course.instructor_names:
+            course.instructor_names += (row['instructor_name'],)
+    return list(courses.values())
+
+
+def course_rows(data):
+    """(courses, sections, offerings) rows from course_data.json."""
+    if 'catalog' in data:
+        courses = [Course.from_dict(course) for course in data['catalog']['courses']]
+    else:
+        print(f"Warning: {COURSE_DATA} has no 'catalog' section (re-run parse_course_pdf.py for section data); "
+              "building courses from its course-instructor rows")
+        courses = courses_from_offerings(data['courses'])
+    course_rows = [course.to_row() for course in courses]
+    section_rows = [(course.course_code,) + section.to_row() for course in courses for section in course.sections]
+    offering_rows = [tuple(row[column] for column in OFFERING_COLUMNS) for row in data['courses']]
+    return course_rows, section_rows, offering_rows
+
+
+def find_sources(directory):
+    """The parsers' JSON outputs in directory: (course_data.json or None, exam files, calendar files)."""
+    directory = Path(directory)
+    course_data = directory / COURSE_DATA
+    return (course_data if course_data.exists() else None,
+            sorted(directory.glob(EXAMS_GLOB)),
+            sorted(directory.glob(CALENDAR_GLOB)))
+
+
+def build_catalog_db(db_path, course_data=None, exam_files=(), calendar_files=()):
+    """
+    Build the catalog from the given JSON outputs and return {table: rows loaded}.
+    The database is written to a temp file beside db_path, then renamed over it.
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(f".{db_path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    counts = {}
+    sources = []
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # The temp file is discarded on failure, so no journal is needed
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.executescript(SCHEMA)
+
+        def load(table, rows, kind, path):
+            rows = list(rows)
+            placeholders = ', '.join('?' * len(rows[0])) if rows else ''
+            if rows:
+                conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+            counts[table] = counts.get(table, 0) + len(rows)
+            sources.append((kind, str(path), len(rows)))
+
+        with conn:
+            if course_data is not None:
+                courses, sections, offerings = course_rows(load_json(course_data))
+                load('courses', courses, 'courses', course_data)
+                load('sections', sections, 'sections', course_data)
+                load('offerings', offerings, 'offerings', course_data)
+            for path in exam_files:
+                load('exams', (Exam.from_dict(exam).to_row() for exam in load_json(path)), 'exams', path)
+            for path in calendar_files:
+                load('calendar_events', (CalendarEvent.from_dict(event).to_row() for event in load_json(path)),
+                     'calendar_events', path)
+            conn.executemany('INSERT INTO sources VALUES (?, ?, ?)', sources)
+            conn.executescript(INDEXES)
+        conn.execute('ANALYZE')
+        conn.close()
+        os.replace(tmp_path, db_path)
+    finally:
+        conn.close()
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return counts
+
+
+def connect(db_path=DB_PATH):
+    """Open the catalog read-only; rows come back as sqlite3.Row."""
+    conn = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def find_course(conn, course_code):
+    """(course row or None, its section rows, its exam rows)."""
+    course_code = course_code.replace(' ', '').upper()
+    course = conn.execute('SELECT * FROM courses WHERE course_code = ?', (course_code,)).fetchone()
+    sections = conn.execute('SELECT * FROM sections WHERE course_code = ?', (course_code,)).fetchall()
+    exams = conn.execute('SELECT * FROM exams WHERE course_code = ? ORDER BY exam_date, start_time',
+                         (course_code,)).fetchall()
+    return course, sections, exams
+
+
+def department_courses(conn, department):
+    return conn.execute('SELECT * FROM courses WHERE department = ? ORDER BY course_code', (department,)).fetchall()
+
+
+def instructor_offerings(conn, name_prefix):
+    """Offerings whose instructor name starts with name_prefix, ignoring case."""
+    # LIKE wildcards in the name itself are escaped, so the prefix is matched literally
+    pattern = name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return conn.execute("SELECT * FROM offerings WHERE instructor_name LIKE ? ESCAPE '\\' "
+                        "ORDER BY instructor_name, course_code", (pattern,)).fetchall()
+
+
+def exams_on(conn, exam_date):
+    """Exams on a date (YYYY-MM-DD), by start time. exam_date is stored as an ISO datetime."""
+    day = date.fromisoformat(exam_date)
+    return conn.execute('SELECT * FROM exams WHERE exam_date >= ? AND exam_date < ? ORDER BY exam_date, start_time',
+                        (day.isoformat(), (day + timedelta(days=1)).isoformat())).fetchall()
+
+
+def print_rows(rows, columns):
+    for row in rows:
+        print('  ' + ' | '.join('' if row[column] is None else str(row[column]) for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the SQLite catalog of the parsed data.')
+    parser.add_argument('--db', type=Path, default=DB_PATH, help=f'catalog database (default: {DB_PATH})')
+    parser.add_argument('--json', action='store_true', help='print query results as JSON')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="load the parsers' JSON outputs into the catalog")
+    build.add_argument('--dir', type=Path, default=Path('.'),
+                       help=f'directory with {COURSE_DATA}, {EXAMS_GLOB} and {CALENDAR_GLOB} (default: .)')
+    build.add_argument('-o', '--output', type=Path, help='catalog database to write (default: --db)')
+
+    commands.add_parser('course', help='a course with its sections and exams').add_argument('course_code')
+    commands.add_parser('department', help="a department's courses").add_argument('department')
+    commands.add_parser('instructor', help='offerings by instructor name prefix').add_argument('name')
+    commands.add_parser('exams', help='exams on a date (YYYY-MM-DD)').add_argument('date')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        course_data, exam_files, calendar_files = find_sources(args.dir)
+        if course_data is None and not exam_files and not calendar_files:
+            print(f"Error: no parser outputs found in {args.dir}")
+            sys.exit(1)
+        output = args.output or args.db
+        counts = build_catalog_db(output, course_data, exam_files, calendar_files)
+        for table, rows in counts.items():
+            print(f"  {table}: {rows} rows")
+        print(f"\nCatalog saved to: {output}")
+        return
+
+    if not args.db.exists():
+        print(f"Error: catalog not found: {args.db} (run 'python catalog_db.py build' first)")
+        sys.exit(1)
+
+    with connect(args.db) as conn:
+        if args.command == 'course':
+            course, sections, exams = find_course(conn, args.course_code)
+            if course is None:
+                print(f"No course {args.course_code}")
+                sys.exit(1)
+            if args.json:
+                print(json.dumps({**dict(course), 'sections': [dict(row) for row in sections],
+                                  'exams': [dict(row) for row in exams]}, indent=2, ensure_ascii=False))
+                return
+            print(f"{course['course_code']}: {course['course_name']} ({course['department']}, {course['credits']} units)")
+            print(f"Instructors: {course['instructor_names']}")
+            print(f"Sections ({len(sections)}):")
+            print_rows(sections, ('section', 'instructor_names', 'capacity', 'schedule', 'venue', 'language'))
+            print(f"Exams ({len(exams)}):")
+            print_rows(exams, ('exam_date', 'start_time', 'end_time', 'location'))
+            return
+
+        if args.command == 'department':
+            rows, columns = department_courses(conn, args.department), ('course_code', 'course_name', 'instructor_names')
+        elif args.command == 'instructor':
+            rows, columns = instructor_offerings(conn, args.name), ('instructor_name', 'course_code', 'course_name')
+        else:
+            try:
+                rows = exams_on(conn, args.date)
+            except ValueError:
+                parser.error(f"invalid date '{args.date}', expected YYYY-MM-DD")
+            columns = ('start_time', 'end_time', 'course_code', 'course_name', 'location')
+
+        if args.json:
+            print(json.dumps([dict(row) for row in rows], indent=2, ensure_ascii=False))
+        else:
+            print(f"{len(rows)} row(s)")
+            print_rows(rows, columns)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Normalized course catalog: course -> sections -> instructors.
+
+Rows of the offering table that share a course code are merged into one Course
+whose sections keep every row, instead of all but the first being dropped. The
+catalog is indexed by course code and by department, and the same indexes are
+written alongside the courses so a loader can upsert in bulk without re-grouping.
+"""
+
+from records import Course
+
+
+class CourseCatalog:
+    """Courses in order of first appearance, indexed by course code and department."""
+
+    def __init__(self, courses=()):
+        self.courses = []
+        self.by_code = {}  # course code -> index into courses
+        self.by_department = {}  # department -> [index into courses]
+        for course in courses:
+            self.add(course)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def __iter__(self):
+        return iter(self.courses)
+
+    def __contains__(self, course_code):
+        return course_code in self.by_code
+
+    def add(self, course):
+        """Add a course row; a row for a code already present becomes further sections. Returns True if the code is new."""
+        index = self.by_code.get(course.course_code)
+        if index is not None:
+            # Merged into a new record: page results may still hold the original
+            self.courses[index] = self.courses[index].merge(course)
+            return False
+        index = len(self.courses)
+        self.courses.append(course)
+        self.by_code[course.course_code] = index
+        self.by_department.setdefault(course.department, []).append(index)
+        return True
+
+    def get(self, course_code):
+        index = self.by_code.get(course_code)
+        return self.courses[index] if index is not None else None
+
+    def department(self, department):
+        return [self.courses[index] for index in self.by_department.get(department, ())]
+
+    def section_count(self):
+        return sum(len(course.sections) for course in self.courses)
+
+    def offerings(self):
+        """One CourseOffering per course and instructor, the flat 'courses' rows of course_data.json."""
+        return [offering for course in self.courses for offering in course.offerings()]
+
+    def to_dict(self):
+        return {
+            'courses': [course.to_dict() for course in self.courses],
+            'by_code': self.by_code,
+            'by_department': self.by_department,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(Course.from_dict(course) for course in data['courses'])
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Exam Timetable Clash Detector
+Checks student enrollments against the parsed exam timetable (the *_exams.json
+written by parse_exam_schedules.py) and reports every pair of exams that overlap
+in time, and every back-to-back pair: exams on the same day whose start times are
+at most --gap minutes apart, i.e. consecutive sessions.
+
+Enrollments are CSV or JSON:
+    CSV   header with a student column (student_id / student) and either a course
+          column (course_code / course, one enrollment per row) or a courses
+          column (codes separated by ';' or spaces)
+    JSON  {"<student_id>": ["CSC3200", ...], ...} or
+          [{"student_id": ..., "courses": [...]}, ...]
+
+The default mode checks each student on their own: their k exams are sorted and
+swept once, O(k log k). --bulk is for the exams office: the timetable's clashing
+and back-to-back exam pairs are found once with a per-date sweep, each student is
+then a lookup of their courses in that pair graph, and the report adds how many
+students each pair affects.
+
+Usage:
+    python exam_clashes.py enrollments.csv
+    python exam_clashes.py enrollments.json --bulk --gap 600 -o clashes.json   # whole day
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from parse_grammar import WHITESPACE_RE
+from records import Exam
+
+EXAMS_JSON = Path('Course Examinations for Full-time Undergraduate Programmes of Term 1, 2025-26 - Timetable_0_exams.json')
+
+# Exams on the same day starting at most this many minutes apart count as back-to-back.
+# The timetable's sessions start at 08:30, 13:30 and 18:30, so this pairs consecutive
+# sessions whatever their lengths (08:30-10:00 then 13:30 is back-to-back).
+DEFAULT_GAP = 300
+
+
+@dataclass(slots=True)
+class ExamSlot:
+    """A dated, timed exam sitting as an interval in minutes after midnight."""
+    course_code: str
+    date: str
+    start: int
+    end: int
+    exam: Exam
+
+    def to_dict(self):
+        return {
+            'course_code': self.course_code,
+            'course_name': self.exam.course_name,
+            'start_time': self.exam.start_time,
+            'end_time': self.exam.end_time,
+            'location': self.exam.location,
+        }
+
+
+def normalize_code(course_code: str) -> str:
+    return WHITESPACE_RE.sub('', course_code).upper()
+
+
+def minutes(clock: str) -> int:
+    hours, mins = clock.split(':')[:2]
+    return int(hours) * 60 + int(mins)
+
+
+def exam_slot(exam: Exam) -> Optional[ExamSlot]:
+    """The exam as an ExamSlot, or None if it has no date or start time (text fallback records)."""
+    if not exam.exam_date or not exam.start_time:
+        return None
+    start = minutes(exam.start_time)
+    end = minutes(exam.end_time) if exam.end_time else start
+    return ExamSlot(normalize_code(exam.course_code), exam.exam_date[:10], start, end, exam)
+
+
+def issue(kind: str, first: ExamSlot, second: ExamSlot) -> dict:
+    """Report entry for a clash or back-to-back pair; first starts no later than second."""
+    entry = {'type': kind, 'date': first.date, 'first': first.to_dict(), 'second': second.to_dict()}
+    if kind == 'clash':
+        entry['overlap_minutes'] = min(first.end, second.end) - second.start
+    else:
+        # The break between them; back-to-back itself is judged on the start times
+        entry['gap_minutes'] = second.start - first.end
+    return entry
+
+
+def sweep(slots: List[ExamSlot], gap: int) -> Iterator[Tuple[str, ExamSlot, ExamSlot]]:
+    """
+    Yield ('clash' | 'back_to_back', first, second) for every pair of slots of different
+    courses that overlap, or start on the same day at most gap minutes apart.
+    Slots are sorted by (date, start) and swept once with a heap of the ones that
+    can still pair with a later slot, so the cost is O(k log k) plus the pairs reported.
+    """
+    slots = sorted(slots, key=lambda slot: (slot.date, slot.start, slot.end, slot.course_code))
+    # (last start it can pair with, sequence, slot) for slots on the current date that are
+    # still open or started at most gap minutes ago
+    recent = []
+    date = None
+    for sequence, slot in enumerate(slots):
+        if slot.date != date:
+            date = slot.date
+            recent = []
+        while recent and recent[0][0] < slot.start:
+            heapq.heappop(recent)
+        for _, _, other in recent:
+            if other.course_code == slot.course_code:
+                continue
+            if other.end > slot.start:
+                yield 'clash', other, slot
+            elif slot.start - other.start <= gap:
+                yield 'back_to_back', other, slot
+        heapq.heappush(recent, (max(slot.end - 1, slot.start + gap), sequence, slot))
+
+
+class ExamTimetable:
+    """Interval index over the timetable: each course's slots, and per date the slots sorted by start time."""
+
+    def __init__(self, exams: Iterable[Exam]):
+        self.by_course: Dict[str, List[ExamSlot]] = {}
+        self.by_date: Dict[str, List[ExamSlot]] = {}
+        self.unscheduled = 0
+        for exam in exams:
+            slot = exam_slot(exam)
+            if slot is None:
+                self.unscheduled += 1
+                continue
+            self.by_course.setdefault(slot.course_code, []).append(slot)
+            self.by_date.setdefault(slot.date, []).append(slot)
+        for slots in self.by_date.values():
+            slots.sort(key=lambda slot: (slot.start, slot.end, slot.course_code))
+
+    @classmethod
+    def from_json(cls, path) -> 'ExamTimetable':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(Exam.from_dict(data) for data in json.load(f))
+
+    def __len__(self):
+        return sum(len(slots) for slots in self.by_date.values())
+
+    def slots_for(self, course_codes: Iterable[str]) -> List[ExamSlot]:
+        return [slot for code in course_codes for slot in self.by_course.get(code, ())]
+
+    def check_student(self, course_codes: Iterable[str], gap: int = DEFAULT_GAP) -> List[dict]:
+        """
+        Clashes and back-to-back exams among one student's courses. A morning exam
+        ending at 10:00 and an afternoon one at 13:30 are back-to-back:
+
+            >>> exams = [Exam('MKT3030', '', '2025-12-14T00:00:00', '08:30', '10:00', None, 'Term 1', 2025),
+            ...          Exam('ECO3160', '', '2025-12-14T00:00:00', '13:30', '16:30', None, 'Term 1', 2025)]
+            >>> [entry['type'] for entry in ExamTimetable(exams).check_student(['MKT3030', 'ECO3160'])]
+            ['back_to_back']
+        """
+        return [issue(kind, first, second) for kind, first, second in sweep(self.slots_for(course_codes), gap)]
+
+    def pair_graph(self, gap: int = DEFAULT_GAP) -> Dict[str, List[Tuple[str, str, ExamSlot, ExamSlot]]]:
+        """
+        Every clashing or back-to-back exam pair in the timetable, as an adjacency map
+        from the first exam's course code to (second course code, kind, first slot,
+        second slot). One sweep per date.
+        """
+        graph: Dict[str, List[Tuple[str, str, ExamSlot, ExamSlot]]] = {}
+        for slots in self.by_date.values():
+            for kind, first, second in sweep(slots, gap):
+                graph.setdefault(first.course_code, []).append((second.course_code, kind, first, second))
+        return graph
+
+
+def find_column(fieldnames: List[str], *names: str) -> Optional[str]:
+    lowered = {field.strip().lower(): field for field in fieldnames}
+    for name in names:
+        if name in lowered:
+            return lowered[name]
+    return None
+
+
+def load_enrollments(path) -> Dict[str, List[str]]:
+    """Read a CSV or JSON enrollment file into {student_id: [normalized course codes]}, in file order."""
+    path = Path(path)
+    enrollments: Dict[str, List[str]] = {}
+
+    if path.suffix.lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            items = data.items()
+        else:
+            items = ((entry['student_id'], entry['courses']) for entry in data)
+        for student_id, courses in items:
+            enrollments.setdefault(str(student_id), []).extend(normalize_code(code) for code in courses)
+        return enrollments
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
+        student_column = find_column(fieldnames, 'student_id', 'student', 'id')
+        course_column = find_column(fieldnames, 'course_code', 'course')
+        courses_column = find_column(fieldnames, 'courses', 'course_codes')
+        if student_column is None or (course_column is None and courses_column is None):
+            raise ValueError(f"{path}: expected a student_id column and a course_code or courses column, got {fieldnames}")
+
+        for row in reader:
+            student_id = row[student_column].strip()
+            if not student_id:
+                continue
+            codes = enrollments.setdefault(student_id, [])
+            if course_column is not None and row[course_column].strip():
+                codes.append(normalize_code(row[course_column]))
+            elif courses_column is not None:
+                codes.extend(normalize_code(code) for code in row[courses_column].replace(';', ' ').split())
+    return enrollments
+
+
+def student_report(student_id: str, issues: List[dict]) -> dict:
+    return {
+        'student_id': student_id,
+        'clashes': [entry for entry in issues if entry['type'] == 'clash'],
+        'back_to_back': [entry for entry in issues if entry['type'] == 'back_to_back'],
+    }
+
+
+def check_students(timetable: ExamTimetable, enrollments: Dict[str, List[str]], gap: int = DEFAULT_GAP) -> List[dict]:
+    """Per-student mode: sweep each student's own exams. Only students with an issue are reported."""
+    reports = []
+    for student_id, course_codes in enrollments.items():
+        issues = timetable.check_student(dict.fromkeys(course_codes), gap)
+        if issues:
+            reports.append(student_report(student_id, issues))
+    return reports
+
+
+def check_bulk(timetable: ExamTimetable, enrollments: Dict[str, List[str]], gap: int = DEFAULT_GAP):
+    """
+    Bulk mode: look every student's courses up in the timetable's pair graph.
+    Returns (student reports, pair summary sorted by students affected).
+    """
+    graph = timetable.pair_graph(gap)
+    pair_students: Dict[Tuple[int, int], int] = {}
+    pair_entries: Dict[Tuple[int, int], dict] = {}
+
+    reports = []
+    for student_id, course_codes in enrollments.items():
+        enrolled = set(course_codes)
+        issues = []
+        for code in enrolled:
+            for other, kind, first, second in graph.get(code, ()):
+                if other not in enrolled:
+                    continue
+                key = (id(first), id(second))
+                if key not in pair_entries:
+                    pair_entries[key] = issue(kind, first, second)
+                pair_students[key] = pair_students.get(key, 0) + 1
+                issues.append(pair_entries[key])
+        if issues:
+            issues.sort(key=lambda entry: (entry['date'], entry['first']['start_time'], entry['second']['start_time'],
+                                           entry['first']['course_code'], entry['second']['course_code']))
+            reports.append(student_report(student_id, issues))
+
+    pairs = [{**pair_entries[key], 'students': count} for key, count in pair_students.items()]
+    pairs.sort(key=lambda entry: (-entry['students'], entry['date'], entry['first']['course_code']))
+    return reports, pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report exam clashes and back-to-back exams for student enrollments.')
+    parser.add_argument('enrollments', type=Path, help='enrollment CSV or JSON')
+    parser.add_argument('--exams', type=Path, default=EXAMS_JSON,
+                        help='parsed exam timetable JSON (default: the Term 1 2025-26 timetable)')
+    parser.add_argument('--gap', type=int, default=DEFAULT_GAP,
+                        help=f'max minutes between the start times of same-day exams to count as back-to-back '
+                             f'(default: {DEFAULT_GAP}, consecutive sessions)')
+    parser.add_argument('--bulk', action='store_true',
+                        help='check the whole student body against the precomputed clash graph and summarize per exam pair')
+    parser.add_argument('-o', '--output', type=Path, default=Path('exam_clashes.json'),
+                        help='report file (default: exam_clashes.json)')
+    args = parser.parse_args()
+
+    for path in (args.exams, args.enrollments):
+        if not path.exists():
+            print(f"Error: file not found: {path}")
+            sys.exit(1)
+
+    timetable = ExamTimetable.from_json(args.exams)
+    print(f"Loaded {len(timetable)} timed exams ({timetable.unscheduled} without date or time skipped)")
+
+    try:
+        enrollments = load_enrollments(args.enrollments)
+    except (ValueError, KeyError) as e:
+        print(f"Error reading enrollments: {e}")
+        sys.exit(1)
+    print(f"Loaded enrollments for {len(enrollments)} students")
+
+    pairs = None
+    if args.bulk:
+        reports, pairs = check_bulk(timetable, enrollments, args.gap)
+    else:
+        reports = check_students(timetable, enrollments, args.gap)
+
+    total_clashes = sum(len(report['clashes']) for report in reports)
+    total_back_to_back = sum(len(report['back_to_back']) for report in reports)
+    output = {
+        'students': reports,
+        'metadata': {
+            'exams': str(args.exams),
+            'students_checked': len(enrollments),
+            'students_with_clashes': sum(1 for report in reports if report['clashes']),
+            'students_with_back_to_back': sum(1 for report in reports if report['back_to_back']),
+            'total_clashes': total_clashes,
+            'total_back_to_back': total_back_to_back,
+            'gap_minutes': args.gap,
+        }
+    }
+    if pairs is not None:
+        output['pairs'] = pairs
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{output['metadata']['students_with_clashes']} students with exam clashes ({total_clashes} clashes)")
+    print(f"{output['metadata']['students_with_back_to_back']} students with back-to-back exams ({total_back_to_back} pairs)")
+    if pairs:
+        print("\nMost common clashes:")
+        for entry in [entry for entry in pairs if entry['type'] == 'clash'][:5]:
+            print(f"  {entry['date']} {entry['first']['course_code']} {entry['first']['start_time']}"
+                  f" x {entry['second']['course_code']} {entry['second']['start_time']}: {entry['students']} students")
+    print(f"\nReport saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Cohort-level GPA and credit aggregation over parsed transcript grades.
+
+Grade records of many students are loaded into a GradeTable: parallel columns
+(student, term, course and grade codes, GPA units, quality points, units passed),
+one row per course grade. Term GPA, cumulative GPA, units passed and per-course
+grade distributions are then computed as np.bincount group-by sums over those
+columns. Without NumPy the columns would be summed in plain Python, which is
+slower than walking each student's terms, so cohort_summary then uses the
+per-student loop (student_summary) instead; single transcripts always do.
+
+GPA follows parse_transcript_improved's term summary: grade points weighted by
+units, over the units of graded and pass courses (IP, W and other non-GPA grades
+are left out). See bench_gpa.py for the comparison with the per-student loop.
+"""
+
+from operator import attrgetter
+
+from parse_grammar import PASS_GRADES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Chronological order of the terms within an academic year
+SEMESTER_ORDER = {'FALL': 0, 'SPRING': 1, 'SUMMER': 2}
+
+
+def term_label(year, semester):
+    return f"{year}-{semester}"
+
+
+def is_passing(record):
+    return bool(record.letter_grade) and record.letter_grade.upper() in PASS_GRADES
+
+
+def student_summary(student_id, records):
+    """
+    One student's term GPA, cumulative GPA and units passed per term, walking their
+    terms in order: the aggregate_students output for a single student, without
+    building a GradeTable.
+    """
+    terms = {}
+    for record in records:
+        terms.setdefault((record.year, record.semester), []).append(record)
+
+    summary_terms = []
+    cumulative_points = 0
+    cumulative_units = 0
+    cumulative_passed = 0
+    for key in sorted(terms, key=lambda key: (key[0], SEMESTER_ORDER.get(key[1], len(SEMESTER_ORDER)), key[1])):
+        points = 0
+        units = 0
+        passed = 0
+        for record in terms[key]:
+            if record.grade_points is not None:
+                points += record.grade_points * record.credits
+                units += record.credits
+                if record.grade_points > 0 or is_passing(record):
+                    passed += record.credits
+            elif is_passing(record):
+                units += record.credits
+                passed += record.credits
+        cumulative_points += points
+        cumulative_units += units
+        cumulative_passed += passed
+        summary_terms.append({
+            'term': term_label(*key),
+            'year': key[0],
+            'semester': key[1],
+            'courses': len(terms[key]),
+            'units_passed': passed,
+            'term_gpa': points / units if units else None,
+            'cumulative_gpa': cumulative_points / cumulative_units if cumulative_units else None,
+        })
+    return {
+        'student_id': student_id,
+        'cumulative_gpa': cumulative_points / cumulative_units if cumulative_units else None,
+        'units_passed': cumulative_passed,
+        'terms': summary_terms,
+    }
+
+
+def loop_summary(transcripts):
+    """(student summaries, grade distributions) for transcripts, one student at a time."""
+    # A student with several transcripts in the batch is summarized once, as in a GradeTable
+    records_by_student = {}
+    distributions = {}
+    for transcript in transcripts:
+        records_by_student.setdefault(transcript['student_id'], []).extend(transcript['courses'])
+        for record in transcript['courses']:
+            grades = distributions.setdefault(record.course_code, {})
+            letter_grade = (record.letter_grade or '').upper()
+            grades[letter_grade] = grades.get(letter_grade, 0) + 1
+    students = [student_summary(student_id, records) for student_id, records in records_by_student.items()]
+    return students, distributions
+
+
+def group_sum(keys, weights, size):
+    """Sum weights (or count rows, if weights is None) per key in range(size)."""
+    if np is not None:
+        return np.bincount(keys, weights=weights, minlength=size)
+    sums = [0] * size
+    if weights is None:
+        for key in keys:
+            sums[key] += 1
+    else:
+        for key, weight in zip(keys, weights):
+            sums[key] += weight
+    return sums
+
+
+def cumsum_rows(values, width):
+    """Running sums along each row of a flattened (rows x width) matrix."""
+    if np is not None:
+        return values.reshape(-1, width).cumsum(axis=1).ravel()
+    sums = list(values)
+    for start in range(0, len(sums), width):
+        for i in range(start + 1, start + width):
+            sums[i] += sums[i - 1]
+    return sums
+
+
+def ratio(numerators, denominators):
+    """Element-wise numerator / denominator, NaN (NumPy) or None where the denominator is 0."""
+    if np is not None:
+        return np.divide(numerators, denominators, out=np.full(len(numerators), np.nan), where=denominators != 0)
+    return [n / d if d else None for n, d in zip(numerators, denominators)]
+
+
+def as_list(values):
+    """Plain Python values for JSON: NaN becomes None."""
+    if np is None:
+        return values
+    return [None if value != value else value for value in values.tolist()]
+
+
+class GradeTable:
+    """
+    Grade records of many students as columns, one row per course grade. Records
+    are collected as they are added and turned into columns in one pass per column
+    when the table is frozen.
+    """
+
+    def __init__(self):
+        self._students = {}  # student id -> code
+        self._records = []
+        self.student = []
+        self.frozen = False
+
+    def add_transcript(self, student_id, records):
+        """Append one student's GradeRecords."""
+        student = self._students.setdefault(student_id, len(self._students))
+        self._records.extend(records)
+        self.student.extend([student] * (len(self._records) - len(self.student)))
+
+    @classmethod
+    def from_transcripts(cls, transcripts):
+        """Build from transcripts with 'student_id' and 'courses' (GradeRecords), e.g. batch_transcripts output."""
+        table = cls()
+        for transcript in transcripts:
+            table.add_transcript(transcript['student_id'], transcript['courses'])
+        return table.freeze()
+
+    def freeze(self):
+        """
+        Build the code columns (terms numbered chronologically, letter grades that differ
+        only in case merged) and the per-row GPA units, quality points and units passed,
+        as arrays when NumPy is available.
+        """
+        if self.frozen:
+            return self
+        records = self._records
+        self.student_ids = list(self._students)
+
+        # Terms are coded year-major from separate year and semester codes (no per-row tuples),
+        # so code order is chronological; the codes are then compacted to the terms present
+        year_keys = list(map(attrgetter('year'), records))
+        semester_keys = list(map(attrgetter('semester'), records))
+        years = sorted(set(year_keys))
+        semesters = sorted(set(semester_keys), key=lambda semester: (SEMESTER_ORDER.get(semester, len(SEMESTER_ORDER)), semester))
+        year_codes = {year: code for code, year in enumerate(years)}
+        semester_codes = {semester: code for code, semester in enumerate(semesters)}
+        year_column = list(map(year_codes.__getitem__, year_keys))
+        semester_column = list(map(semester_codes.__getitem__, semester_keys))
+
+        course_keys = list(map(attrgetter('course_code'), records))
+        self.course_codes = list(dict.fromkeys(course_keys))
+        course_codes = {course_code: code for code, course_code in enumerate(self.course_codes)}
+
+        # Per recorded letter grade: merged grade code, and the weight each of its units gets
+        grade_keys = list(map(attrgetter('letter_grade'), records))
+        grade_points = {letter_grade: records[grade_keys.index(letter_grade)].grade_points
+                        for letter_grade in dict.fromkeys(grade_keys)}
+        self.letter_grades = list(dict.fromkeys((letter_grade or '').upper() for letter_grade in grade_points))
+        merged = {letter_grade: code for code, letter_grade in enumerate(self.letter_grades)}
+        raw_codes = {letter_grade: code for code, letter_grade in enumerate(grade_points)}
+        grade_code, gpa_weight, point_weight, passed_weight = [], [], [], []
+        for letter_grade, points in grade_points.items():
+            normalized = (letter_grade or '').upper()
+            graded = points is not None
+            passing = normalized in PASS_GRADES
+            grade_code.append(merged[normalized])
+            gpa_weight.append(1 if graded or passing else 0)
+            point_weight.append(points if graded else 0.0)
+            passed_weight.append(1 if passing or (graded and points > 0) else 0)
+
+        course = list(map(course_codes.__getitem__, course_keys))
+        grade = list(map(raw_codes.__getitem__, grade_keys))
+        credits = list(map(attrgetter('credits'), records))
+
+        if np is not None:
+            grade = np.asarray(grade, dtype=np.int64)
+            credits = np.asarray(credits, dtype=np.float64)
+            self.student = np.asarray(self.student, dtype=np.int64)
+            term = np.asarray(year_column, dtype=np.int64) * len(semesters) + np.asarray(semester_column, dtype=np.int64)
+            present, self.term = np.unique(term, return_inverse=True)
+            present = present.tolist()
+            self.course = np.asarray(course, dtype=np.int64)
+            self.grade = np.asarray(grade_code, dtype=np.int64)[grade]
+            self.gpa_units = np.asarray(gpa_weight, dtype=np.float64)[grade] * credits
+            self.quality_points = np.asarray(point_weight, dtype=np.float64)[grade] * credits
+            self.units_passed = np.asarray(passed_weight, dtype=np.float64)[grade] * credits
+        else:
+            width = len(semesters)
+            term = [year * width + semester for year, semester in zip(year_column, semester_column)]
+            present = sorted(set(term))
+            present_codes = {code: i for i, code in enumerate(present)}
+            self.term = list(map(present_codes.__getitem__, term))
+            self.course = course
+            self.grade = [grade_code[code] for code in grade]
+            self.gpa_units = [gpa_weight[code] * units for code, units in zip(grade, credits)]
+            self.quality_points = [point_weight[code] * units for code, units in zip(grade, credits)]
+            self.units_passed = [passed_weight[code] * units for code, units in zip(grade, credits)]
+        self.terms = [(years[code // len(semesters)], semesters[code % len(semesters)]) for code in present]
+        self._records = None
+        self.frozen = True
+        return self
+
+    def __len__(self):
+        return len(self.student)
+
+
+def term_stats(table):
+    """
+    Group-by over (student, term) cells, flattened student-major (cell = student x
+    len(terms) + term): courses, units_passed, cumulative_units_passed, term_gpa and
+    cumulative_gpa columns, each with one value per cell (NumPy arrays when available).
+    """
+    table.freeze()
+    student_count, term_count = len(table.student_ids), len(table.terms)
+    size = student_count * term_count
+    if np is not None:
+        cell = table.student * term_count + table.term
+    else:
+        cell = [student * term_count + term for student, term in zip(table.student, table.term)]
+
+    points = group_sum(cell, table.quality_points, size)
+    gpa_units = group_sum(cell, table.gpa_units, size)
+    passed = group_sum(cell, table.units_passed, size)
+    return {
+        'courses': group_sum(cell, None, size),
+        'units_passed': passed,
+        'cumulative_units_passed': cumsum_rows(passed, term_count),
+        'term_gpa': ratio(points, gpa_units),
+        'cumulative_gpa': ratio(cumsum_rows(points, term_count), cumsum_rows(gpa_units, term_count)),
+    }
+
+
+def aggregate_students(table):
+    """
+    Per student: term GPA, cumulative GPA after each term and units passed, for every
+    term the student has grades in, plus overall cumulative GPA and units passed.
+    """
+    if not len(table):
+        return []
+    stats = {name: as_list(column) for name, column in term_stats(table).items()}
+    courses, passed, cumulative_passed = stats['courses'], stats['units_passed'], stats['cumulative_units_passed']
+    term_gpa, cumulative_gpa = stats['term_gpa'], stats['cumulative_gpa']
+    term_count = len(table.terms)
+
+    students = []
+    for student, student_id in enumerate(table.student_ids):
+        row = student * term_count
+        terms = []
+        for term, (year, semester) in enumerate(table.terms):
+            if not courses[row + term]:
+                continue
+            terms.append({
+                'term': term_label(year, semester),
+                'year': year,
+                'semester': semester,
+                'courses': int(courses[row + term]),
+                'units_passed': int(passed[row + term]),
+                'term_gpa': term_gpa[row + term],
+                'cumulative_gpa': cumulative_gpa[row + term],
+            })
+        last = row + term_count - 1
+        students.append({
+            'student_id': student_id,
+            'cumulative_gpa': cumulative_gpa[last],
+            'units_passed': int(cumulative_passed[last]),
+            'terms': terms,
+        })
+    return students
+
+
+def grade_distributions(table):
+    """{course_code: {letter_grade: count}} over every student in the table."""
+    table.freeze()
+    grade_count = len(table.letter_grades)
+    if np is not None:
+        cell = table.course * grade_count + table.grade
+    else:
+        cell = [course * grade_count + grade for course, grade in zip(table.course, table.grade)]
+    counts = as_list(group_sum(cell, None, len(table.course_codes) * grade_count))
+
+    distributions = {}
+    for course, course_code in enumerate(table.course_codes):
+        row = course * grade_count
+        distributions[course_code] = {
+            letter_grade: int(counts[row + grade])
+            for grade, letter_grade in enumerate(table.letter_grades) if counts[row + grade]
+        }
+    return distributions
+
+
+def cohort_summary(transcripts):
+    """Students' GPA summaries and per-course grade distributions for a batch of transcripts."""
+    if np is None:
+        students, distributions = loop_summary(transcripts)
+        terms = {(record.year, record.semester) for transcript in transcripts for record in transcript['courses']}
+        terms = sorted(terms, key=lambda key: (key[0], SEMESTER_ORDER.get(key[1], len(SEMESTER_ORDER)), key[1]))
+        return {
+            'students': students,
+            'grade_distributions': distributions,
+            'metadata': {
+                'students': len(students),
+                'grades': sum(len(transcript['courses']) for transcript in transcripts),
+                'courses': len(distributions),
+                'terms': [term_label(year, semester) for year, semester in terms],
+                'backend': 'loop',
+            },
+        }
+
+    table = GradeTable.from_transcripts(transcripts)
+    return {
+        'students': aggregate_students(table),
+        'grade_distributions': grade_distributions(table),
+        'metadata': {
+            'students': len(table.student_ids),
+            'grades': len(table),
+            'courses': len(table.course_codes),
+            'terms': [term_label(year, semester) for year, semester in table.terms],
+            'backend': 'numpy',
+        },
+    }
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Ingestion orchestrator.
+Discovers the input PDFs (course offering, exam timetable, academic calendars,
+minor programmes and transcripts) by file name and runs their parsers concurrently: an asyncio event
+loop hands each parse to a process pool, at most --max-concurrency at a time,
+largest PDF first, so a full term refresh takes about as long as the slowest
+parser rather than the sum of all of them.
+
+Every output is written atomically (a temp file in the same directory, then
+os.replace), so readers never see a half-written file and a failed parser leaves
+its previous output in place. Transcripts are combined into one batch file in the
+batch_transcripts.py format. Each calendar job also writes the per-day
+teaching calendar (see teaching_calendar.py) beside its events. Whenever course, exam or calendar data was refreshed,
+catalog.db (see catalog_db.py) is rebuilt from the JSON outputs in the output directory.
+
+With --watch it keeps running after the first pass and polls the inputs. Once a
+new or modified PDF has stopped changing for --debounce seconds, only that PDF's
+parser runs again. The course parser runs in incremental mode, so only the pages
+that changed are re-extracted; the other parsers re-read unchanged pages from
+the extraction cache.
+
+Usage:
+    python ingest.py                                  # PDFs in the current directory
+    python ingest.py inputs/ --max-concurrency 4 --output-dir out/
+    python ingest.py inputs/ --watch                  # re-run a parser when its PDF changes
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import parse_academic_calendar
+from batch_transcripts import batch_output, find_pdfs, parse_transcript_file
+from catalog_db import DB_PATH as CATALOG_DB, build_catalog_db, find_sources
+from parse_course_pdf import DELTA_PATH, STATE_PATH, build_output, extract_from_tables as extract_courses, extract_from_text, run_incremental
+from parse_exam_schedules import extract_from_tables as extract_exams
+from parse_minor_programmes import build_index as build_minor_index, build_output as build_minor_output, default_requirements
+from records import to_json
+from teaching_calendar import TeachingCalendar
+
+TRANSCRIPTS_OUTPUT = 'transcripts_batch.json'
+TRANSCRIPT_ERRORS_OUTPUT = 'transcripts_batch_errors.json'
+# Outputs loaded into catalog.db
+CATALOG_KINDS = ('course', 'exams', 'calendar')
+
+ACADEMIC_YEAR_RE = re.compile(r'(20\d{2})-\d{2}')
+TERM_RE = re.compile(r'Term\s*(\d)', re.IGNORECASE)
+
+# --watch defaults: seconds between polls, and how long a PDF must stay unchanged before it is parsed
+POLL_INTERVAL = 1.0
+DEBOUNCE = 2.0
+
+
+@dataclass
+class Job:
+    """One parser run: kind is course, exams, calendar, minors or transcript."""
+    kind: str
+    pdf_path: Path
+    output_path: Optional[Path] = None
+    year: Optional[int] = None
+    term: Optional[str] = None
+    incremental: bool = False
+
+
+def write_json_atomic(path, data):
+    """Write data as JSON (in the parsers' format) to a temp file beside path, then rename it over path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=to_json)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def classify(pdf_path, output_dir, incremental=False):
+    """
+    Return the Job for a PDF from its file name, or None if no parser handles it.
+    incremental runs the course parser in its incremental (changed pages only) mode.
+    """
+    name = pdf_path.name
+    lowered = name.lower()
+    year_match = ACADEMIC_YEAR_RE.search(name)
+    year = int(year_match.group(1)) if year_match else None
+
+    if 'course offering' in lowered:
+        return Job('course', pdf_path, output_dir / 'course_data.json', year, incremental=incremental)
+    if 'examination' in lowered or 'timetable' in lowered:
+        term_match = TERM_RE.search(name)
+        term = f"Term {term_match.group(1)}" if term_match else 'Term 1'
+        return Job('exams', pdf_path, output_dir / f"{pdf_path.stem}_exams.json", year or 2025, term)
+    if 'academic calendar' in lowered:
+        # The 2025-26 calendar keeps the parser's original output name
+        suffix = '' if year in (None, 2025) else f"_{year}"
+        return Job('calendar', pdf_path, output_dir / f"academic_calendar_events{suffix}.json", year)
+    if 'minor programme' in lowered:
+        return Job('minors', pdf_path, output_dir / 'minor_programmes.json')
+    if 'tscrpt' in lowered or 'transcript' in lowered:
+        return Job('transcript', pdf_path)
+    return None
+
+
+def discover(inputs, output_dir, incremental=False):
+    """Return (jobs, skipped PDFs) for the PDFs under inputs, largest PDF first."""
+    jobs = []
+    skipped = []
+    for pdf_path in find_pdfs(inputs):
+        job = classify(pdf_path, output_dir, incremental)
+        if job is None:
+            skipped.append(pdf_path)
+        else:
+            jobs.append(job)
+    # Start the slowest parses first so they overlap with everything else
+    jobs.sort(key=lambda job: -job.pdf_path.stat().st_size)
+    return jobs, skipped
+
+
+def run_course(job):
+    if job.incremental:
+        # Page state and row delta are kept beside the output
+        catalog = run_incremental(job.pdf_path, job.output_path,
+                                  job.output_path.with_name(STATE_PATH.name), job.output_path.with_name(DELTA_PATH.name),
+                                  writer=lambda data, path: write_json_atomic(path, data))
+        return len(catalog)
+    courses, instructors_map = extract_courses(job.pdf_path)
+    if not courses:
+        courses, instructors_map = extract_from_text(job.pdf_path)
+    catalog, output = build_output(courses, instructors_map)
+    write_json_atomic(job.output_path, output)
+    return len(catalog)
+
+
+def run_exams(job):
+    exams = extract_exams(str(job.pdf_path), job.term, job.year)
+    write_json_atomic(job.output_path, exams)
+    return len(exams)
+
+
+def run_calendar(job):
+    academic_year = job.year or parse_academic_calendar.ACADEMIC_YEAR
+    events, grid = parse_academic_calendar.extract_calendar(str(job.pdf_path), academic_year)
+    write_json_atomic(job.output_path, events)
+    if grid:
+        teaching_calendar = TeachingCalendar.build(grid, events)
+        name = job.output_path.name.replace('academic_calendar_events', 'teaching_calendar')
+        write_json_atomic(job.output_path.with_name(name), teaching_calendar.to_dict())
+    return len(events)
+
+
+def run_minors(job):
+    # Study schemes beside the PDF are applied, as parse_minor_programmes.py does by default
+    requirements_path = default_requirements(job.pdf_path)
+    index = build_minor_index(job.pdf_path, requirements_path)
+    write_json_atomic(job.output_path, build_minor_output(index, job.pdf_path, requirements_path))
+    return len(index)
+
+
+def run_transcript(job):
+    # Returns the parsed transcript (or its error); transcripts are combined once all have finished
+    return parse_transcript_file(str(job.pdf_path))
+
+
+RUNNERS = {
+    'course': run_course,
+    'exams': run_exams,
+    'calendar': run_calendar,
+    'minors': run_minors,
+    'transcript': run_transcript,
+}
+
+
+def run_job(job, verbose=False):
+    """Run one job in a worker process. The parsers' progress output is discarded unless verbose."""
+    if verbose:
+        return RUNNERS[job.kind](job)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return RUNNERS[job.kind](job)
+
+
+async def run_jobs(jobs: List[Job], max_concurrency: int, verbose: bool = False):
+    """Run jobs on a process pool, at most max_concurrency at once. Returns [(job, result, error, seconds)]."""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    with ProcessPoolExecutor(max_workers=min(max_concurrency, len(jobs))) as pool:
+        async def run(job):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    result, error = await loop.run_in_executor(pool, run_job, job, verbose), None
+                except Exception as e:
+                    result, error = None, f"{type(e).__name__}: {e}"
+                seconds = time.perf_counter() - start
+            status = f"FAILED ({error})" if error else 'done'
+            print(f"  [{seconds:6.2f}s] {job.kind:<10} {job.pdf_path.name}: {status}")
+            return job, result, error, seconds
+
+        return await asyncio.gather(*(run(job) for job in jobs))
+
+
+def ingest(jobs, output_dir, max_concurrency, verbose=False):
+    """Run jobs and write the transcript batch, then print the outputs. Returns the failed [(job, error)]."""
+    start = time.perf_counter()
+    results = asyncio.run(run_jobs(jobs, max_concurrency, verbose))
+    elapsed = time.perf_counter() - start
+
+    failed = [(job, error) for job, _, error, _ in results if error]
+    transcript_results = [result for job, result, error, _ in results if job.kind == 'transcript' and not error]
+    transcript_jobs = [job for job in jobs if job.kind == 'transcript']
+    if transcript_jobs:
+        transcripts = [result for result in transcript_results if 'error' not in result]
+        errors = [result for result in transcript_results if 'error' in result]
+        errors.extend({'file': str(job.pdf_path), 'error': error}
+                      for job, error in failed if job.kind == 'transcript')
+        write_json_atomic(output_dir / TRANSCRIPTS_OUTPUT, batch_output(transcripts, errors, len(transcript_jobs)))
+        write_json_atomic(output_dir / TRANSCRIPT_ERRORS_OUTPUT, errors)
+
+    catalog_counts = None
+    if any(job.kind in CATALOG_KINDS and not error for job, _, error, _ in results):
+        catalog_counts = build_catalog_db(output_dir / CATALOG_DB.name, *find_sources(output_dir))
+
+    print("\nOutputs:")
+    for job, result, error, seconds in results:
+        if job.kind != 'transcript' and not error:
+            print(f"  {job.output_path}: {result} records ({seconds:.2f}s)")
+    if transcript_jobs:
+        print(f"  {output_dir / TRANSCRIPTS_OUTPUT}: {len(transcripts)}/{len(transcript_jobs)} transcripts"
+              f" ({len(errors)} failed, see {output_dir / TRANSCRIPT_ERRORS_OUTPUT})")
+    if catalog_counts is not None:
+        tables = ', '.join(f"{rows} {table}" for table, rows in catalog_counts.items())
+        print(f"  {output_dir / CATALOG_DB.name}: {tables}")
+
+    serial = sum(seconds for _, _, _, seconds in results)
+    print(f"\nElapsed: {elapsed:.2f}s (parser time {serial:.2f}s)")
+    if failed:
+        print(f"{len(failed)} job(s) failed")
+    return failed
+
+
+def snapshot(inputs):
+    """{pdf path: (mtime_ns, size)} for the PDFs currently under inputs."""
+    signatures = {}
+    for pdf_path in find_pdfs(inputs):
+        try:
+            stat = pdf_path.stat()
+        except FileNotFoundError:
+            continue
+        signatures[pdf_path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+def watch(inputs, output_dir, max_concurrency, interval=POLL_INTERVAL, debounce=DEBOUNCE, verbose=False):
+    """
+    Poll inputs every interval seconds and re-run the parsers of PDFs that are new or
+    modified, once each has kept the same size and mtime for debounce seconds (so a
+    PDF still being copied in is not parsed half-written). The transcript batch is
+    rebuilt from every transcript when any of them changes. Runs until interrupted.
+    """
+    seen = snapshot(inputs)
+    pending = {}  # pdf path -> (signature, when it was first seen with that signature)
+    print(f"\nWatching {', '.join(map(str, inputs))} for changed PDFs (Ctrl-C to stop)...")
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot(inputs)
+            now = time.monotonic()
+            for pdf_path in set(seen) - set(current):
+                print(f"  removed: {pdf_path.name} (its output is kept)")
+                del seen[pdf_path]
+                pending.pop(pdf_path, None)
+            for pdf_path, signature in current.items():
+                if seen.get(pdf_path) == signature:
+                    pending.pop(pdf_path, None)
+                elif pdf_path not in pending or pending[pdf_path][0] != signature:
+                    pending[pdf_path] = (signature, now)
+
+            settled = [pdf_path for pdf_path, (_, since) in pending.items() if now - since >= debounce]
+            if not settled:
+                continue
+            for pdf_path in settled:
+                seen[pdf_path] = pending.pop(pdf_path)[0]
+
+            jobs = []
+            transcripts_changed = False
+            for pdf_path in settled:
+                job = classify(pdf_path, output_dir, incremental=True)
+                if job is None:
+                    print(f"  skipped (no parser): {pdf_path.name}")
+                elif job.kind == 'transcript':
+                    transcripts_changed = True
+                else:
+                    jobs.append(job)
+            if transcripts_changed:
+                # The batch file covers every transcript; unchanged ones are served by the extraction cache
+                jobs.extend(job for job in (classify(pdf_path, output_dir) for pdf_path in current)
+                            if job is not None and job.kind == 'transcript')
+            if not jobs:
+                continue
+
+            print(f"\n[{time.strftime('%H:%M:%S')}] {len(settled)} PDF(s) changed, running {len(jobs)} parser job(s)...")
+            ingest(jobs, output_dir, max_concurrency, verbose)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discover the input PDFs and run every parser concurrently.')
+    parser.add_argument('inputs', nargs='*', default=['.'],
+                        help='directories, PDF files or glob patterns (default: current directory)')
+    parser.add_argument('--max-concurrency', type=int, default=os.cpu_count() or 1,
+                        help='parsers running at once, one process each (default: CPU count)')
+    parser.add_argument('--output-dir', type=Path, default=Path('.'),
+                        help='directory for the output files (default: current directory)')
+    parser.add_argument('--watch', action='store_true',
+                        help='after the first run, keep polling the inputs and re-run the parser of each changed PDF')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help=f'--watch: seconds between polls (default: {POLL_INTERVAL})')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help=f'--watch: seconds a PDF must stay unchanged before it is parsed (default: {DEBOUNCE})')
+    parser.add_argument('-v', '--verbose', action='store_true', help="show the parsers' own progress output")
+    args = parser.parse_args()
+
+    if args.max_concurrency < 1:
+        parser.error('--max-concurrency must be at least 1')
+    if args.interval <= 0 or args.debounce < 0:
+        parser.error('--interval must be positive and --debounce not negative')
+
+    jobs, skipped = discover(args.inputs, args.output_dir, incremental=args.watch)
+    if not jobs and not args.watch:
+        print("Error: no input PDFs found")
+        sys.exit(1)
+
+    for pdf_path in skipped:
+        print(f"  skipped (no parser): {pdf_path.name}")
+    failed = []
+    if jobs:
+        print(f"Running {len(jobs)} parser job(s), at most {args.max_concurrency} at a time...")
+        failed = ingest(jobs, args.output_dir, args.max_concurrency, args.verbose)
+
+    if args.watch:
+        watch(args.inputs, args.output_dir, args.max_concurrency, args.interval, args.debounce, args.verbose)
+    elif failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 """Inspect PDF structure to understand the format"""
 
-import pdfplumber
+from pdf_cache import open_pdf
 
 pdf_path = 'Formal Course Registration Course Offering Information_AY2025-26 Term 1(Updated on August 15)[68] copy.pdf'
 
-with pdfplumber.open(pdf_path) as pdf:
+with open_pdf(pdf_path) as pdf:
     print(f"Total pages: {len(pdf.pages)}\n")
     
     # Check first page
@@ -1,22 +1,44 @@
 #!/usr/bin/env python3
 """Parse academic calendar PDF and extract events"""
 
-import pdfplumber
+import argparse
 import json
-import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 
+from parse_grammar import (
+    DAY_RE,
+    EVENT_RE,
+    MONTH_DAY_RE,
+    MONTHS,
+    MONTH_YEAR_PATTERNS,
+    TERM_INFO_RE,
+)
+from parse_profile import add_profile_arguments, configure_profiling, profiler
+from pdf_cache import open_pdf
+from records import CalendarEvent, to_json
+from teaching_calendar import TeachingCalendar
+
+PDF_PATH = 'Annex 2 Calendar View of Academic Calendar 2025-26 (Tentative)-Revised to Website -Updated Version-FINAL-PDF_1.pdf'
+
+# An academic year runs from August of academic_year to July of the next year
+ACADEMIC_YEAR = 2025
+ROLLOVER_MONTH = 8
+
+def event_year(month: int, academic_year: int) -> int:
+    """Calendar year of a month in the academic year starting in academic_year"""
+    return academic_year if month >= ROLLOVER_MONTH else academic_year + 1
+
 def parse_date_from_text(text: str, month: int, year: int) -> Optional[datetime]:
     """Parse date from text like 'Aug 17' or '17'"""
     # Try patterns like "Aug 17", "17", "Aug 17 - 18"
     patterns = [
-        (r'(\w{3})\s+(\d{1,2})', '%b %d'),  # Aug 17
-        (r'(\d{1,2})', '%d'),  # 17
+        (MONTH_DAY_RE, '%b %d'),  # Aug 17
+        (DAY_RE, '%d'),  # 17
     ]
     
     for pattern, fmt in patterns:
-        match = re.search(pattern, text)
+        match = pattern.search(text)
         if match:
             try:
                 if fmt == '%b %d':
@@ -33,13 +55,9 @@ def parse_date_from_text(text: str, month: int, year: int) -> Optional[datetime]
 
 def extract_month_year(text: str) -> Optional[Tuple[int, int]]:
     """Extract month and year from text like 'August - 2025'"""
-    patterns = [
-        (r'(\w+)\s*-\s*(\d{4})', '%B %Y'),  # August - 2025
-        (r'(\w+)\s+(\d{4})', '%B %Y'),  # August 2025
-    ]
-    
-    for pattern, fmt in patterns:
-        match = re.search(pattern, text)
+    # "August - 2025", then "August 2025"
+    for pattern in MONTH_YEAR_PATTERNS:
+        match = pattern.search(text)
         if match:
             try:
                 month_name, year_str = match.groups()
@@ -63,18 +81,17 @@ def determine_event_type(name: str) -> str:
         return 'ADD_DROP'
     elif any(word in name_lower for word in ['class', 'make-up', 'makeup']):
         return 'CLASS_MAKEUP'
-    elif any(word in name_lower for word in ['first day', 'last day', 'start', 'end', 'begin', 'commence']):
+    elif any(word in name_lower for word in ['first day', 'last day', 'start', 'end', 'begin', 'commence', 'teaching day']):
         return 'TERM_START_END'
     else:
         return 'OTHER'
 
-def extract_term_info(text: str) -> Dict:
+def extract_term_info(text: str, academic_year: int = ACADEMIC_YEAR) -> Dict:
     """Extract term information from text"""
     term_info = {}
     
     # Look for term patterns like "First Term: September 1 - December 12"
-    term_pattern = r'(First|Second|Third|Summer)\s+Term:\s*(\w+)\s+(\d{1,2})\s*-\s*(\w+)\s+(\d{1,2})'
-    match = re.search(term_pattern, text, re.IGNORECASE)
+    match = TERM_INFO_RE.search(text)
     if match:
         term_name = match.group(1)
         start_month = match.group(2)
@@ -84,8 +101,10 @@ def extract_term_info(text: str) -> Dict:
         
         # Parse dates
         try:
-            start_date = datetime.strptime(f"{start_month} {start_day} 2025", "%B %d %Y")
-            end_date = datetime.strptime(f"{end_month} {end_day} 2025", "%B %d %Y")
+            start_month = datetime.strptime(start_month, "%B").month
+            end_month = datetime.strptime(end_month, "%B").month
+            start_date = datetime(event_year(start_month, academic_year), start_month, start_day)
+            end_date = datetime(event_year(end_month, academic_year), end_month, end_day)
             term_info = {
                 'name': f"{term_name} Term",
                 'start_date': start_date.strftime("%Y-%m-%d"),
@@ -96,181 +115,234 @@ def extract_term_info(text: str) -> Dict:
     
     return term_info
 
-def extract_calendar_events(pdf_path: str) -> List[Dict]:
-    """Extract academic calendar events from PDF"""
-    events = []
-    full_text = ""
-    
-    with pdfplumber.open(pdf_path) as pdf:
+def iter_pages(pdf_path: str):
+    """
+    Open the PDF once and yield (page_num, text, tables) for each page.
+    Text and tables come from the same page object so its layout is analysed
+    once, and the page's cached layout objects are freed before the next page.
+    """
+    with open_pdf(pdf_path) as pdf:
         print(f"Processing {len(pdf.pages)} pages...")
         
-        # Extract all text
         for page_num, page in enumerate(pdf.pages, 1):
             text = page.extract_text()
-            if text:
-                full_text += text + "\n"
-        
-        print("\n=== Full Text (first 2000 chars) ===")
-        print(full_text[:2000])
-        print("\n" + "="*80 + "\n")
-        
-        # Extract term information
-        term_info = extract_term_info(full_text)
-        if term_info:
-            print(f"Found term: {term_info}")
-        
-        # Parse events from text
-        # Look for patterns like "* Aug 17 - 18: Y2-4 Ug Course Registration for T1 (Tentative)"
-        # Also handle "Aug 31 - Sep 12: Add/Drop for T1"
-        event_patterns = [
-            r'\*\s*(\w{3})\s+(\d{1,2})(?:\s*-\s*(\d{1,2}))?:\s*(.+?)(?=\n|\*|$)',
-            r'(\w{3})\s+(\d{1,2})(?:\s*-\s*(\w{3})\s+(\d{1,2}))?:\s*(.+?)(?=\n|$)',
-            r'(\w{3})\s+(\d{1,2})(?:\s*-\s*(\d{1,2}))?:\s*(.+?)(?=\n|$)',
-        ]
-        
-        # Track current context (month/year) as we parse
-        context_month = 8  # August 2025
-        context_year = 2025
+            tables = page.extract_tables()
+            page.close()
+            yield page_num, text, tables
+
+def extract_text_events(full_text: str, academic_year: int = ACADEMIC_YEAR, seen: Optional[set] = None) -> List[CalendarEvent]:
+    """
+    Extract events from calendar text (the whole document or a single page) in one
+    pass of EVENT_RE. Entries are de-duplicated on (start, end, name), including
+    against the keys already in seen, which is updated.
+    """
+    events = []
+    if seen is None:
+        seen = set()
+    
+    for match in EVENT_RE.finditer(full_text):
+        try:
+            start_month = MONTHS[match.group('month')[:3].lower()]
+            start_day = int(match.group('day'))
+            start_date = datetime(event_year(start_month, academic_year), start_month, start_day)
+            
+            if match.group('end_day'):
+                # "Aug 31 - Sep 12" names its end month; "Oct 1 - 8" ends in the start month
+                end_month = MONTHS[match.group('end_month')[:3].lower()] if match.group('end_month') else start_month
+                end_date = datetime(event_year(end_month, academic_year), end_month, int(match.group('end_day')))
+            else:
+                end_date = start_date
+            event_desc = match.group('desc').strip()
+            
+            key = (start_date, end_date, event_desc)
+            if key in seen:
+                continue
+            seen.add(key)
+            
+            event_type = determine_event_type(event_desc)
+            
+            # Determine term
+            term = "T1"
+            if "T2" in event_desc or "Term 2" in event_desc or "Second Term" in event_desc:
+                term = "T2"
+            elif "T3" in event_desc or "Term 3" in event_desc:
+                term = "T3"
+            elif "Summer" in event_desc or "SS" in event_desc:
+                term = "SUMMER"
+            elif "T1" in event_desc or "Term 1" in event_desc or "First Term" in event_desc:
+                term = "T1"
+            
+            # Fix specific event types
+            if "National Day" in event_desc or "Mid-Autumn" in event_desc:
+                event_type = "HOLIDAY"
+                term = "T1"
+            if "Chinese New Year" in event_desc or "Qingming" in event_desc or "Labor Day" in event_desc or "Dragon Boat" in event_desc:
+                event_type = "HOLIDAY"
+            if "Class Make-up" in event_desc:
+                event_type = "CLASS_MAKEUP"
+                term = "T1"  # Fix term
+            
+            event = CalendarEvent(
+                event_type=event_type,
+                term=term,
+                year=start_date.year,
+                start_date=start_date.strftime("%Y-%m-%d"),
+                end_date=end_date.strftime("%Y-%m-%d") if end_date != start_date else None,
+                name=event_desc,
+                description=None,
+            )
+            
+            events.append(event)
+            print(f"Extracted: {event.name} on {event.start_date}" + (f" to {event.end_date}" if event.end_date else ""))
+            
+        except Exception as e:
+            print(f"Error parsing event: {match.group(0)} - {e}")
+    
+    return events
+
+def month_row_monday(row, month: int, year: int) -> Optional[date]:
+    """
+    Monday of a month row's week. The row's first days may belong to the previous
+    month, so the week is anchored on its first cell holding a day 1-7 of month
+    that falls on that cell's weekday.
+    """
+    for col_idx in range(1, min(8, len(row))):
+        day_match = DAY_RE.search(str(row[col_idx] or ''))
+        if not day_match or int(day_match.group(1)) > 7:
+            continue
+        day = date(year, month, int(day_match.group(1)))
+        if day.weekday() == col_idx - 1:
+            return day - timedelta(days=col_idx - 1)
+    return None
+
+def grid_days(table):
+    """
+    Yield (date, cell text) for the day cells of a calendar grid table: a
+    'Month' header row, then one row per week with Mon-Sun in columns 1-7 and
+    "August - 2025" in column 0 of each month's first week. Cells whose day
+    number doesn't match their position (blank or spill-over cells) are skipped.
+    """
+    monday = None
+    for row in table[1:]:
+        if not row:
+            continue
         
-        # Parse events
-        for pattern in event_patterns:
-            matches = re.finditer(pattern, full_text, re.MULTILINE | re.IGNORECASE)
-            for match in matches:
-                try:
-                    # Handle different pattern formats
-                    if len(match.groups()) == 4 and match.group(3) and match.group(3)[0].isalpha():
-                        # Format: "Aug 31 - Sep 12: ..."
-                        start_month_name = match.group(1)
-                        start_day = int(match.group(2))
-                        end_month_name = match.group(3)
-                        end_day = int(match.group(4))
-                        event_desc = match.group(5).strip()
-                        
-                        start_month = datetime.strptime(start_month_name, "%b").month
-                        end_month = datetime.strptime(end_month_name, "%b").month
-                        
-                        # Determine year based on month
-                        start_year = 2025 if start_month >= 8 else 2026
-                        end_year = 2025 if end_month >= 8 else 2026
-                        
-                        start_date = datetime(start_year, start_month, start_day)
-                        end_date = datetime(end_year, end_month, end_day)
-                    else:
-                        # Format: "Aug 17 - 18: ..." or "Aug 17: ..."
-                        month_name = match.group(1)
-                        start_day = int(match.group(2))
-                        end_day = int(match.group(3)) if match.group(3) and match.group(3).isdigit() else None
-                        event_desc = match.group(4).strip()
-                        
-                        month_num = datetime.strptime(month_name, "%b").month
-                        
-                        # Determine year based on month (Aug-Dec 2025, Jan-Jul 2026)
-                        year = 2025 if month_num >= 8 else 2026
-                        
-                        start_date = datetime(year, month_num, start_day)
-                        
-                        if end_day:
-                            end_date = datetime(year, month_num, end_day)
-                        else:
-                            end_date = start_date
-                    
-                    event_type = determine_event_type(event_desc)
-                    
-                    # Determine term
-                    term = "T1"
-                    if "T2" in event_desc or "Term 2" in event_desc or "Second Term" in event_desc:
-                        term = "T2"
-                    elif "T3" in event_desc or "Term 3" in event_desc:
-                        term = "T3"
-                    elif "Summer" in event_desc or "SS" in event_desc:
-                        term = "SUMMER"
-                    elif "T1" in event_desc or "Term 1" in event_desc or "First Term" in event_desc:
-                        term = "T1"
-                    
-                    # Fix specific event types
-                    if "National Day" in event_desc or "Mid-Autumn" in event_desc:
-                        event_type = "HOLIDAY"
-                        term = "T1"
-                    if "Chinese New Year" in event_desc or "Qingming" in event_desc or "Labor Day" in event_desc:
-                        event_type = "HOLIDAY"
-                    if "Class Make-up" in event_desc:
-                        event_type = "CLASS_MAKEUP"
-                        term = "T1"  # Fix term
-                    
-                    event = {
-                        'event_type': event_type,
-                        'term': term,
-                        'year': start_date.year,
-                        'start_date': start_date.strftime("%Y-%m-%d"),
-                        'end_date': end_date.strftime("%Y-%m-%d") if end_date != start_date else None,
-                        'name': event_desc,
-                        'description': None,
-                    }
-                    
-                    events.append(event)
-                    print(f"Extracted: {event['name']} on {event['start_date']}" + (f" to {event['end_date']}" if event['end_date'] else ""))
-                    
-                except Exception as e:
-                    print(f"Error parsing event: {match.group(0)} - {e}")
+        month_year = extract_month_year(row[0]) if row[0] else None
+        if month_year:
+            monday = month_row_monday(row, *month_year)
+        elif monday is not None:
+            monday += timedelta(days=7)
+        if monday is None:
+            continue
         
-        # Also extract from tables
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                tables = page.extract_tables()
-                if tables:
-                    for table in tables:
-                        if not table or len(table) < 2:
-                            continue
-                        
-                        # Look for month header
-                        header = table[0] if table else []
-                        if 'Month' in str(header):
-                            # Process calendar grid
-                            for row_idx, row in enumerate(table[1:], 1):
-                                if not row:
-                                    continue
-                                
-                                # First cell might contain month name
-                                month_cell = row[0] if row[0] else None
-                                if month_cell and extract_month_year(month_cell):
-                                    current_month, current_year = extract_month_year(month_cell)
-                                
-                                # Process date cells (columns 1-7 for days of week)
-                                for col_idx in range(1, min(8, len(row))):
-                                    cell = row[col_idx]
-                                    if not cell:
-                                        continue
-                                    
-                                    # Check if cell has asterisk (indicates event)
-                                    if '*' in str(cell):
-                                        # Try to extract date
-                                        day_match = re.search(r'(\d{1,2})', str(cell))
-                                        if day_match and current_month:
-                                            day = int(day_match.group(1))
-                                            try:
-                                                date_obj = datetime(current_year, current_month, day)
-                                                # Look for corresponding event description in text
-                                                date_str = date_obj.strftime("%b %d")
-                                                # This is a simplified approach - in reality, we'd need
-                                                # to map the calendar grid to event descriptions
-                                            except:
-                                                pass
+        for col_idx in range(1, min(8, len(row))):
+            cell = str(row[col_idx] or '')
+            day_match = DAY_RE.search(cell)
+            day = monday + timedelta(days=col_idx - 1)
+            if day_match and int(day_match.group(1)) == day.day:
+                yield day, cell
+
+def extract_calendar(pdf_path: str, academic_year: int = ACADEMIC_YEAR) -> Tuple[List[CalendarEvent], List[Tuple[date, str]]]:
+    """Extract the calendar events and the grid's (date, cell text) day cells from the PDF"""
+    events = []
+    grid = []
+    text_parts = []
+    grid_tables = []
     
-    return events
+    # Single pass over the pages: keep the text and the (small) table cell data
+    for page_num, text, tables in iter_pages(pdf_path):
+        if text:
+            text_parts.append(text + "\n")
+        grid_tables.extend(table for table in tables if table and len(table) >= 2)
+    
+    full_text = "".join(text_parts)
+    
+    print("\n=== Full Text (first 2000 chars) ===")
+    print(full_text[:2000])
+    print("\n" + "="*80 + "\n")
+    
+    # Extract term information
+    term_info = extract_term_info(full_text, academic_year)
+    if term_info:
+        print(f"Found term: {term_info}")
+    
+    with profiler.stage('normalize'):
+        events.extend(extract_text_events(full_text, academic_year))
+    
+    # The month grid tables give one cell per day
+    for table in grid_tables:
+        header = table[0] if table else []
+        if 'Month' in str(header):
+            grid.extend(grid_days(table))
+    
+    return events, grid
 
-if __name__ == '__main__':
-    pdf_path = 'Annex 2 Calendar View of Academic Calendar 2025-26 (Tentative)-Revised to Website -Updated Version-FINAL-PDF_1.pdf'
+def extract_calendar_events(pdf_path: str, academic_year: int = ACADEMIC_YEAR) -> List[CalendarEvent]:
+    """Extract academic calendar events from PDF"""
+    return extract_calendar(pdf_path, academic_year)[0]
+
+def iter_page_events(pdf_path: str, academic_year: int = ACADEMIC_YEAR):
+    """Yield (page_num, events) as each page's text is parsed; an event repeated on a later page is dropped"""
+    seen = set()
+    for page_num, text, _ in iter_pages(pdf_path):
+        with profiler.stage('normalize', page_num):
+            events = extract_text_events(text + "\n", academic_year, seen) if text else []
+        yield page_num, events
+
+def write_ndjson(pdf_path: str, output_path: str, academic_year: int = ACADEMIC_YEAR) -> int:
+    """Stream events as NDJSON, one event per line, flushed after every page"""
+    written = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for _, events in iter_page_events(pdf_path, academic_year):
+            with profiler.stage('serialize'):
+                for event in events:
+                    f.write(json.dumps(event.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n")
+                    written += 1
+                f.flush()
+    return written
+
+def main(pdf_path: str = PDF_PATH, academic_year: int = ACADEMIC_YEAR, suffix: str = ''):
+    """Parse one academic year's calendar PDF; outputs are named academic_calendar_events{suffix}.json etc."""
+    events_path = f'academic_calendar_events{suffix}.json'
+    ndjson_path = f'academic_calendar_events{suffix}.ndjson'
+    teaching_path = f'teaching_calendar{suffix}.json'
+    
+    parser = argparse.ArgumentParser(
+        description=f'Extract academic calendar events from the {academic_year}-{(academic_year + 1) % 100:02d} calendar PDF.')
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                        help=f'json writes {events_path} at the end; ndjson streams {ndjson_path} page by page')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling(args)
     
-    print("Extracting calendar events from PDF...")
-    events = extract_calendar_events(pdf_path)
+    print(f"Extracting calendar events from {academic_year}-{academic_year + 1} PDF...")
+    
+    if args.format == 'ndjson':
+        written = write_ndjson(pdf_path, ndjson_path, academic_year)
+        print(f"\nExtracted {written} events")
+        print(f"\nEvents saved to {ndjson_path}")
+        return
+    
+    events, grid = extract_calendar(pdf_path, academic_year)
     
     print(f"\nExtracted {len(events)} events")
     
     # Save to JSON for inspection
-    with open('academic_calendar_events.json', 'w', encoding='utf-8') as f:
-        json.dump(events, f, indent=2, ensure_ascii=False)
+    with profiler.stage('serialize'), open(events_path, 'w', encoding='utf-8') as f:
+        json.dump(events, f, indent=2, ensure_ascii=False, default=to_json)
+    
+    print(f"\nEvents saved to {events_path}")
     
-    print("\nEvents saved to academic_calendar_events.json")
+    if grid:
+        calendar = TeachingCalendar.build(grid, events)
+        with open(teaching_path, 'w', encoding='utf-8') as f:
+            json.dump(calendar.to_dict(), f, ensure_ascii=False)
+        print(f"Teaching calendar ({calendar.first_day} - {calendar.last_day}) saved to {teaching_path}")
+        for term, (first_day, last_day, teaching_days, weeks) in calendar.summary().items():
+            print(f"  {term}: {first_day} - {last_day}, {teaching_days} teaching days in {weeks} weeks")
     print("\nSample events:")
     for event in events[:5]:
-        print(f"  - {event['name']} ({event['start_date']})")
+        print(f"  - {event.name} ({event.start_date})")
+
+if __name__ == '__main__':
+    main()
@@ -4,17 +4,91 @@ PDF Parser for Course Registration Data
 Extracts courses and instructors from the PDF file and creates a JSON file.
 """
 
+import argparse
 import json
-import re
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-try:
-    import pdfplumber
-except ImportError:
-    print("Error: pdfplumber is not installed.")
-    print("Please install it using: pip install pdfplumber")
-    sys.exit(1)
+from course_catalog import CourseCatalog
+from parse_grammar import (
+    COURSE_CODE_RE,
+    CREDITS_RE,
+    EMAIL_RE,
+    INSTRUCTOR_NAME_RE,
+    INSTRUCTOR_SPLIT_RE,
+    NUMBER_RE,
+    TABLE_COURSE_CODE_RE,
+    WHITESPACE_RE,
+)
+from parse_profile import add_profile_arguments, configure_profiling, profiler
+from pdf_cache import open_pdf, page_fingerprints
+from records import Course, Section, to_json
+from table_engine import extract_page_table, find_document_schema
+
+PDF_PATH = Path('Formal Course Registration Course Offering Information_AY2025-26 Term 1(Updated on August 15)[68] copy.pdf')
+
+# Incremental mode (--incremental): per-page results of the last run, and the row delta against it
+STATE_PATH = Path('course_data.state.json')
+DELTA_PATH = Path('course_data_delta.json')
+# Bump when extract_from_page's output changes, so stale page results are not reused
+STATE_VERSION = 3
+
+# Keywords that identify the offering table's header row
+COURSE_HEADER = ('course code', 'instructor')
+
+
+class CourseFilter:
+    """
+    --department / --course-prefix selection. matches() is the exact row test;
+    probe() is a conservative page test on the cheap stream text that only
+    rejects pages on which none of the wanted tokens appear.
+    """
+    
+    def __init__(self, departments=(), prefixes=()):
+        self.departments = {department.strip().upper() for department in departments}
+        self.prefixes = tuple(WHITESPACE_RE.sub('', prefix).upper() for prefix in prefixes)
+    
+    def __bool__(self):
+        return bool(self.departments or self.prefixes)
+    
+    def matches(self, course):
+        if self.departments and course.department.strip().upper() not in self.departments:
+            return False
+        if self.prefixes and not WHITESPACE_RE.sub('', course.course_code).upper().startswith(self.prefixes):
+            return False
+        return True
+    
+    def probe(self, text):
+        # Pages whose streams can't be read as text (custom font encodings) are never skipped
+        if not any(char.isalpha() for char in text):
+            return True
+        text = text.upper()
+        if self.departments and not any(department in text for department in self.departments):
+            return False
+        if self.prefixes and not any(prefix in text for prefix in self.prefixes):
+            return False
+        return True
+
+
+def parse_page_spec(spec):
+    """Parse a --pages value such as '1-3,7' into a sorted list of 1-based page numbers."""
+    pages = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        try:
+            first = int(first)
+            last = int(last) if last else first
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid page range: {part!r}")
+        if first < 1 or last < first:
+            raise argparse.ArgumentTypeError(f"invalid page range: {part!r}")
+        pages.update(range(first, last + 1))
+    return sorted(pages)
 
 
 def extract_course_data(text):
@@ -24,10 +98,6 @@ def extract_course_data(text):
     """
     courses = []
     
-    # Common patterns for course data
-    # Course code pattern (e.g., "CSCI 1001", "MATH 2003")
-    course_code_pattern = r'([A-Z]{2,6}\s+\d{4})'
-    
     # Try to find course entries
     lines = text.split('\n')
     
@@ -38,7 +108,7 @@ def extract_course_data(text):
             continue
         
         # Look for course code
-        course_code_match = re.search(course_code_pattern, line)
+        course_code_match = COURSE_CODE_RE.search(line)
         if course_code_match:
             # Save previous course if exists
             if current_course:
@@ -67,17 +137,17 @@ def extract_course_data(text):
             # Common patterns for instructor names
             if 'instructor' in line.lower() or 'prof' in line.lower() or 'dr.' in line.lower():
                 # Extract name
-                name_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)', line)
+                name_match = INSTRUCTOR_NAME_RE.search(line)
                 if name_match:
                     current_course['instructor_name'] = name_match.group(1)
             
             # Look for email
-            email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', line)
+            email_match = EMAIL_RE.search(line)
             if email_match:
                 current_course['instructor_email'] = email_match.group(1)
             
             # Look for credits
-            credits_match = re.search(r'(\d+)\s*(?:credit|unit)', line, re.IGNORECASE)
+            credits_match = CREDITS_RE.search(line)
             if credits_match:
                 current_course['credits'] = int(credits_match.group(1))
     
@@ -88,14 +158,16 @@ def extract_course_data(text):
     return courses
 
 
-def parse_pdf(pdf_path):
+def parse_pdf(pdf_path, pages=None):
     """Parse PDF and extract all text."""
     all_text = []
     
-    with pdfplumber.open(pdf_path) as pdf:
+    with open_pdf(pdf_path) as pdf:
         print(f"Processing {len(pdf.pages)} pages...")
         
         for page_num, page in enumerate(pdf.pages, 1):
+            if pages is not None and page_num not in pages:
+                continue
             print(f"Processing page {page_num}...")
             text = page.extract_text()
             if text:
@@ -113,212 +185,302 @@ def parse_pdf(pdf_path):
     return '\n\n'.join(all_text)
 
 
-def extract_from_tables(pdf_path):
-    """Extract data from PDF tables if they exist."""
+def find_course_schema(pdf):
+    """Column schema of the offering table, derived once per document (None if no header row is found)."""
+    return find_document_schema(pdf, COURSE_HEADER, key_keywords=('code',))
+
+
+def course_columns(schema):
+    """
+    Map the schema's header names to the indices of the columns the parser reads.
+    Section columns the PDF does not have (this term's has no section, schedule or
+    venue) map to None.
+    """
+    columns = dict.fromkeys(('department', 'code', 'title', 'units', 'instructor', 'section', 'capacity',
+                             'activities', 'reserved_quota', 'schedule', 'venue', 'language', 'target', 'remark'))
+    for i, header in enumerate(schema.names):
+        header_lower = header.lower()
+        if 'language' in header_lower:
+            # Checked first: 'Language of Instruction' is not the instructor column
+            columns['language'] = i
+        elif 'department' in header_lower:
+            columns['department'] = i
+        elif 'course code' in header_lower or 'code' in header_lower:
+            columns['code'] = i
+        elif 'course title' in header_lower or 'title' in header_lower:
+            columns['title'] = i
+        elif 'unit' in header_lower:
+            columns['units'] = i
+        elif 'instructor' in header_lower:
+            columns['instructor'] = i
+        elif 'section' in header_lower:
+            columns['section'] = i
+        elif 'reserved' in header_lower:
+            columns['reserved_quota'] = i
+        elif 'quota' in header_lower or 'capacity' in header_lower:
+            columns['capacity'] = i
+        elif 'activit' in header_lower:
+            columns['activities'] = i
+        elif 'schedule' in header_lower or 'time' in header_lower:
+            columns['schedule'] = i
+        elif 'venue' in header_lower or 'room' in header_lower or 'location' in header_lower:
+            columns['venue'] = i
+        elif 'target' in header_lower:
+            columns['target'] = i
+        elif 'remark' in header_lower:
+            columns['remark'] = i
+    return columns
+
+
+def cell_value(row, index, keep_lines=False):
+    """
+    Stripped cell text, or None for a missing column or empty cell. Line breaks are
+    joined with spaces unless keep_lines (for cells that list one entry per line).
+    """
+    if index is None or not row[index].strip():
+        return None
+    if keep_lines:
+        return '\n'.join(WHITESPACE_RE.sub(' ', line).strip() for line in row[index].strip().split('\n'))
+    return WHITESPACE_RE.sub(' ', row[index]).strip()
+
+
+def cell_number(row, index):
+    value = cell_value(row, index)
+    match = NUMBER_RE.search(value) if value else None
+    return int(match.group(1)) if match else None
+
+
+def extract_from_page(page, schema, course_filter=None):
+    """
+    Extract course rows and instructors from the offering table on a single page,
+    cut into cells by the table engine using the document's column schema.
+    Rows rejected by course_filter are dropped before their instructors are recorded.
+    """
     courses = []
     instructors_map = {}  # Map instructor names to their data
     
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, 1):
-            tables = page.extract_tables()
+    rows = extract_page_table(page, schema, COURSE_HEADER)
+    columns = course_columns(schema)
+    dept_idx = columns['department']
+    code_idx = columns['code']
+    title_idx = columns['title']
+    units_idx = columns['units']
+    instructor_idx = columns['instructor']
+    
+    with profiler.stage('normalize', page.page_number):
+        for row in rows:
+            # Extract department
+            department = ''
+            if dept_idx is not None and row[dept_idx]:
+                department = row[dept_idx].strip()
+            
+            # Extract course code
+            course_code = ''
+            if code_idx is not None and row[code_idx]:
+                course_code = row[code_idx].strip()
+            
+            # Skip if no course code (notes, repeated headers)
+            if not course_code or not TABLE_COURSE_CODE_RE.match(course_code):
+                continue
+            
+            # Normalize course code (remove extra spaces)
+            course_code = WHITESPACE_RE.sub(' ', course_code)
+            
+            # Extract course title
+            course_name = ''
+            if title_idx is not None and row[title_idx]:
+                course_name = row[title_idx].strip().replace('\n', ' ')
+            
+            # Extract units/credits
+            credits = 3  # Default
+            if units_idx is not None and row[units_idx]:
+                credits_match = NUMBER_RE.search(row[units_idx])
+                if credits_match:
+                    credits = int(credits_match.group(1))
+            
+            # Extract instructor(s)
+            instructor_names = []
+            if instructor_idx is not None and row[instructor_idx]:
+                # Split by semicolon or newline
+                instructor_names = [name.strip() for name in INSTRUCTOR_SPLIT_RE.split(row[instructor_idx]) if name.strip()]
+            
+            # Every row is a section of its course; the catalog merges rows sharing a code
+            section = Section(
+                cell_value(row, columns['section']),
+                instructor_names,
+                capacity=cell_number(row, columns['capacity']),
+                activity_count=cell_number(row, columns['activities']),
+                reserved_quota=cell_value(row, columns['reserved_quota'], keep_lines=True),
+                schedule=cell_value(row, columns['schedule']),
+                venue=cell_value(row, columns['venue']),
+                language=cell_value(row, columns['language']),
+                target_students=cell_value(row, columns['target']),
+                remark=cell_value(row, columns['remark']),
+            )
+            
+            # Create course entry (interns the department and instructor names)
+            course = Course(course_code, course_name, department, instructor_names, credits, 'FALL', 2025,
+                            [section])
+            
+            if course_filter and not course_filter.matches(course):
+                continue
+            
+            courses.append(course)
             
-            for table in tables:
-                if not table or len(table) < 2:
-                    continue
-                
-                # Find header row (usually row 1, but row 0 might be notes)
-                header_row_idx = None
-                for i, row in enumerate(table[:3]):  # Check first 3 rows
-                    if row and len(row) > 5:
-                        row_str = ' '.join([str(cell) if cell else '' for cell in row]).lower()
-                        if 'course code' in row_str and 'instructor' in row_str:
-                            header_row_idx = i
-                            break
-                
-                if header_row_idx is None:
-                    # Try to identify by column content
-                    for i, row in enumerate(table[:3]):
-                        if row and len(row) >= 5:
-                            # Check if this looks like a header row
-                            if any('department' in str(cell).lower() if cell else '' for cell in row):
-                                header_row_idx = i
-                                break
-                
-                if header_row_idx is None:
-                    continue
-                
-                # Get headers
-                headers = [str(cell).strip() if cell else '' for cell in table[header_row_idx]]
-                
-                # Map column indices
-                dept_idx = None
-                code_idx = None
-                title_idx = None
-                units_idx = None
-                instructor_idx = None
-                
-                for i, header in enumerate(headers):
-                    header_lower = header.lower()
-                    if 'department' in header_lower:
-                        dept_idx = i
-                    elif 'course code' in header_lower or 'code' in header_lower:
-                        code_idx = i
-                    elif 'course title' in header_lower or 'title' in header_lower:
-                        title_idx = i
-                    elif 'unit' in header_lower:
-                        units_idx = i
-                    elif 'instructor' in header_lower:
-                        instructor_idx = i
-                
-                # Process data rows (start after header)
-                for row_idx in range(header_row_idx + 1, len(table)):
-                    row = table[row_idx]
-                    if not row or len(row) < 3:
-                        continue
-                    
-                    # Extract department
-                    department = ''
-                    if dept_idx is not None and dept_idx < len(row) and row[dept_idx]:
-                        department = str(row[dept_idx]).strip()
-                    
-                    # Extract course code
-                    course_code = ''
-                    if code_idx is not None and code_idx < len(row) and row[code_idx]:
-                        course_code = str(row[code_idx]).strip()
-                    
-                    # Skip if no course code
-                    if not course_code or not re.match(r'^[A-Z]{2,6}\s*\d{4}', course_code):
-                        continue
-                    
-                    # Normalize course code (remove extra spaces)
-                    course_code = re.sub(r'\s+', ' ', course_code)
-                    
-                    # Extract course title
-                    course_name = ''
-                    if title_idx is not None and title_idx < len(row) and row[title_idx]:
-                        course_name = str(row[title_idx]).strip().replace('\n', ' ')
-                    
-                    # Extract units/credits
-                    credits = 3  # Default
-                    if units_idx is not None and units_idx < len(row) and row[units_idx]:
-                        units_str = str(row[units_idx]).strip()
-                        credits_match = re.search(r'(\d+)', units_str)
-                        if credits_match:
-                            credits = int(credits_match.group(1))
-                    
-                    # Extract instructor(s)
-                    instructor_names = []
-                    if instructor_idx is not None and instructor_idx < len(row) and row[instructor_idx]:
-                        instructor_str = str(row[instructor_idx]).strip()
-                        # Split by semicolon or newline
-                        instructor_names = [name.strip() for name in re.split(r'[;\n]', instructor_str) if name.strip()]
-                    
-                    # Create course entry
-                    course = {
-                        'course_code': course_code,
-                        'course_name': course_name,
-                        'department': department,
-                        'instructor_names': instructor_names,  # List of instructor names
-                        'credits': credits,
-                        'semester': 'FALL',
-                        'year': 2025,
+            # Track instructors
+            for instructor_name in course.instructor_names:
+                if instructor_name and instructor_name not in instructors_map:
+                    instructors_map[instructor_name] = {
+                        'name': instructor_name,
+                        'email': '',  # Will need to be filled
+                        'department': course.department,
                     }
-                    
-                    courses.append(course)
-                    
-                    # Track instructors
-                    for instructor_name in instructor_names:
-                        if instructor_name and instructor_name not in instructors_map:
-                            instructors_map[instructor_name] = {
-                                'name': instructor_name,
-                                'email': '',  # Will need to be filled
-                                'department': department,
-                            }
     
     return courses, instructors_map
 
 
-def main():
-    pdf_path = Path('Formal Course Registration Course Offering Information_AY2025-26 Term 1(Updated on August 15)[68] copy.pdf')
+def extract_page_range(pdf_path, page_indices, schema, course_filter=None):
+    """Extract (courses, instructors_map) for the given page indices, opening the PDF independently."""
+    results = []
     
-    if not pdf_path.exists():
-        print(f"Error: PDF file not found: {pdf_path}")
-        sys.exit(1)
+    with open_pdf(pdf_path) as pdf:
+        for index in page_indices:
+            results.append(extract_from_page(pdf.pages[index], schema, course_filter))
     
-    print(f"Parsing PDF: {pdf_path}")
+    return results
+
+
+def select_pages(pdf, pages=None, course_filter=None):
+    """
+    Return the 0-based indices of the pages worth extracting: those in pages (1-based,
+    None for all) whose stream text passes course_filter's probe.
+    """
+    selected = []
+    for index, page in enumerate(pdf.pages):
+        if pages is not None and index + 1 not in pages:
+            continue
+        if course_filter and not course_filter.probe(page.extract_stream_text()):
+            print(f"Skipping page {index + 1}: no matching department or course prefix")
+            continue
+        selected.append(index)
+    return selected
+
+
+def split_page_range(page_count, chunk_count):
+    """Split range(page_count) into at most chunk_count contiguous (start, stop) chunks."""
+    chunk_count = max(1, min(chunk_count, page_count))
+    chunk_size, remainder = divmod(page_count, chunk_count)
     
-    # Try extracting from tables first (more structured)
-    print("\nAttempting to extract data from tables...")
-    courses, instructors_map = extract_from_tables(pdf_path)
+    chunks = []
+    start = 0
+    for i in range(chunk_count):
+        stop = start + chunk_size + (1 if i < remainder else 0)
+        chunks.append((start, stop))
+        start = stop
     
-    # If no courses found from tables, try text extraction
-    if not courses:
-        print("\nNo table data found. Attempting text extraction...")
-        text = parse_pdf(pdf_path)
-        courses = extract_course_data(text)
-        instructors_map = {}
+    return chunks
+
+
+def iter_page_results(pdf_path, workers=1, pages=None, course_filter=None):
+    """
+    Yield (courses, instructors_map) for each selected page (see select_pages), in page
+    order, as pages are parsed. With workers > 1 the pages are split across a process pool.
+    Nothing is yielded if the document has no offering table header.
+    """
+    if workers > 1:
+        with open_pdf(pdf_path) as pdf:
+            schema = find_course_schema(pdf)
+            if schema is None:
+                return
+            selected = select_pages(pdf, pages, course_filter)
         
-        # Build instructors map from courses
-        for course in courses:
-            if course['instructor_name']:
-                if course['instructor_name'] not in instructors_map:
-                    instructors_map[course['instructor_name']] = {
-                        'name': course['instructor_name'],
-                        'email': course['instructor_email'],
-                        'department': course['department'],
-                    }
+        # Several chunks per worker so one slow page range doesn't hold up the pool
+        chunks = split_page_range(len(selected), workers * 4)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_results = executor.map(
+                extract_page_range,
+                [str(pdf_path)] * len(chunks),
+                [selected[start:stop] for start, stop in chunks],
+                [schema] * len(chunks),
+                [course_filter] * len(chunks),
+            )
+            for chunk in chunk_results:
+                yield from chunk
+    else:
+        with open_pdf(pdf_path) as pdf:
+            schema = find_course_schema(pdf)
+            if schema is None:
+                return
+            for index in select_pages(pdf, pages, course_filter):
+                yield extract_from_page(pdf.pages[index], schema, course_filter)
+
+
+def extract_from_tables(pdf_path, workers=1, pages=None, course_filter=None):
+    """
+    Extract data from PDF tables if they exist.
+    Per-page results are merged in page order, so the output does not depend on workers.
+    """
+    return merge_page_results(iter_page_results(pdf_path, workers, pages, course_filter))
+
+
+def merge_page_results(page_results):
+    """Merge per-page (courses, instructors_map) results; the first page naming an instructor wins."""
+    courses = []
+    instructors_map = {}
+    for page_courses, page_instructors in page_results:
+        courses.extend(page_courses)
+        for instructor_name, instructor in page_instructors.items():
+            if instructor_name not in instructors_map:
+                instructors_map[instructor_name] = instructor
     
-    # Remove duplicates based on course_code
-    seen_codes = set()
-    unique_courses = []
-    for course in courses:
-        if course['course_code'] not in seen_codes:
-            seen_codes.add(course['course_code'])
-            unique_courses.append(course)
+    return courses, instructors_map
+
+
+def extract_from_text(pdf_path, pages=None, course_filter=None):
+    """Fallback when the PDF has no usable tables: parse the plain text instead."""
+    text = parse_pdf(pdf_path, pages)
+    courses = []
+    instructors_map = {}
     
-    courses = unique_courses
+    for data in extract_course_data(text):
+        instructor_names = [data['instructor_name']] if data['instructor_name'] else []
+        course = Course(data['course_code'], data['course_name'], data['department'], instructor_names,
+                        data['credits'], data['semester'], data['year'], [Section(None, instructor_names)])
+        if course_filter and not course_filter.matches(course):
+            continue
+        courses.append(course)
+        
+        # Build instructors map from courses
+        if data['instructor_name'] and data['instructor_name'] not in instructors_map:
+            instructors_map[data['instructor_name']] = {
+                'name': data['instructor_name'],
+                'email': data['instructor_email'],
+                'department': data['department'],
+            }
     
-    print(f"\nExtracted {len(courses)} unique courses")
-    print(f"Extracted {len(instructors_map)} unique instructors")
+    return courses, instructors_map
+
+
+def build_output(courses, instructors_map):
+    """
+    Merge course rows into a CourseCatalog (rows sharing a course_code become sections
+    of one course) and build the course_data.json structure. 'courses' keeps the flat
+    one-row-per-instructor shape; 'catalog' holds the courses with their sections and
+    the code and department indexes. Returns (catalog, output).
+    """
+    with profiler.stage('dedupe'):
+        catalog = CourseCatalog(courses)
     
-    # Convert courses to have single instructor (first one) for backward compatibility
-    # But also keep the full list
-    courses_with_instructors = []
-    for course in courses:
-        # Create one entry per instructor if multiple instructors
-        if course.get('instructor_names'):
-            for instructor_name in course['instructor_names']:
-                course_entry = {
-                    'course_code': course['course_code'],
-                    'course_name': course['course_name'],
-                    'department': course['department'],
-                    'instructor_name': instructor_name,
-                    'instructor_email': '',
-                    'credits': course['credits'],
-                    'semester': course['semester'],
-                    'year': course['year'],
-                }
-                courses_with_instructors.append(course_entry)
-        else:
-            # No instructor listed
-            course_entry = {
-                'course_code': course['course_code'],
-                'course_name': course['course_name'],
-                'department': course['department'],
-                'instructor_name': '',
-                'instructor_email': '',
-                'credits': course['credits'],
-                'semester': course['semester'],
-                'year': course['year'],
-            }
-            courses_with_instructors.append(course_entry)
+    # One entry per course and instructor, for loaders that read the flat rows
+    courses_with_instructors = catalog.offerings()
     
-    # Create output structure
     output = {
         'courses': courses_with_instructors,
         'instructors': list(instructors_map.values()),
+        'catalog': catalog,
         'metadata': {
-            'total_courses': len(courses),
+            'total_courses': len(catalog),
+            'total_sections': catalog.section_count(),
             'total_course_instructor_pairs': len(courses_with_instructors),
             'total_instructors': len(instructors_map),
             'semester': 'FALL',
@@ -326,15 +488,286 @@ def main():
         }
     }
     
-    # Save to JSON
-    output_path = Path('course_data.json')
+    return catalog, output
+
+
+def write_output(output, output_path):
+    with profiler.stage('serialize'), open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False, default=to_json)
+
+
+def load_state(state_path=STATE_PATH):
+    """Return the previous incremental run's state, or None if missing or from another STATE_VERSION."""
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if state.get('version') != STATE_VERSION:
+        return None
+    return state
+
+
+def extract_incremental(pdf_path, previous_pages):
+    """
+    Extract per-page results, reusing the previous run's result for every page whose
+    fingerprint is unchanged. Pages are matched by fingerprint rather than position,
+    so inserted or reordered pages do not force their neighbours to be re-parsed.
+    Returns (pages, reparsed) where reparsed lists the page numbers that were extracted.
+    """
+    previous_by_fingerprint = {page['fingerprint']: page for page in previous_pages}
+    fingerprints = page_fingerprints(pdf_path)
+    
+    pages = []
+    reparsed = []
+    schema = None
+    with open_pdf(pdf_path) as pdf:
+        for page_num, (page, fingerprint) in enumerate(zip(pdf.pages, fingerprints), 1):
+            previous = previous_by_fingerprint.get(fingerprint)
+            if previous is not None:
+                page_courses = [Course.from_dict(course) for course in previous['courses']]
+                page_instructors = previous['instructors']
+            else:
+                print(f"Page {page_num} changed, re-extracting...")
+                # The schema is only needed (and only derived) once some page has changed
+                if schema is None:
+                    schema = find_course_schema(pdf)
+                if schema is not None:
+                    page_courses, page_instructors = extract_from_page(page, schema)
+                else:
+                    page_courses, page_instructors = [], {}
+                reparsed.append(page_num)
+            pages.append({
+                'page': page_num,
+                'fingerprint': fingerprint,
+                'courses': page_courses,
+                'instructors': page_instructors,
+            })
+    
+    return pages, reparsed
+
+
+def row_key(row):
+    """Identity of a course-instructor row across runs."""
+    return (row['course_code'], row['instructor_name'])
+
+
+def diff_rows(previous_rows, current_rows):
+    """Return (added, removed, modified) course-instructor rows between two runs."""
+    previous_by_key = {row_key(row): row for row in previous_rows}
+    current_by_key = {row_key(row): row for row in current_rows}
+    
+    added = [row for key, row in current_by_key.items() if key not in previous_by_key]
+    removed = [row for key, row in previous_by_key.items() if key not in current_by_key]
+    modified = [
+        {'before': previous_by_key[key], 'after': row}
+        for key, row in current_by_key.items()
+        if key in previous_by_key and previous_by_key[key] != row
+    ]
+    return added, removed, modified
+
+
+def write_state(state, state_path):
+    """Write the incremental state to a temp file beside state_path, then rename it over state_path."""
+    state_path = Path(state_path)
+    tmp_path = state_path.with_name(f".{state_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, separators=(',', ':'), default=to_json)
+        os.replace(tmp_path, state_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def run_incremental(pdf_path, output_path, state_path=STATE_PATH, delta_path=DELTA_PATH, writer=write_output):
+    """
+    Re-extract only the pages that changed since the last incremental run, write the
+    full course_data.json as usual, plus a delta of added, removed and modified
+    course-instructor rows for loaders that apply changes instead of reloading.
+    writer(data, path) writes the output and the delta (ingest passes its atomic
+    writer). The state is written last, so a run that fails part-way is redone
+    from the previous state. Returns the CourseCatalog.
+    """
+    state = load_state(state_path)
+    if state is None:
+        print(f"No usable state in {state_path}; extracting every page")
+        previous_pages, previous_rows = [], []
+    else:
+        previous_pages, previous_rows = state['pages'], state['rows']
+    
+    pages, reparsed = extract_incremental(pdf_path, previous_pages)
+    print(f"Re-extracted {len(reparsed)} of {len(pages)} pages")
+    
+    courses, instructors_map = merge_page_results((page['courses'], page['instructors']) for page in pages)
+    if not courses:
+        print("\nNo table data found. Attempting text extraction...")
+        courses, instructors_map = extract_from_text(pdf_path)
+    
+    catalog, output = build_output(courses, instructors_map)
+    writer(output, output_path)
+    
+    current_rows = [offering.to_dict() for offering in output['courses']]
+    added, removed, modified = diff_rows(previous_rows, current_rows)
+    delta = {
+        'added': added,
+        'removed': removed,
+        'modified': modified,
+        'metadata': {
+            'pdf': str(pdf_path),
+            'previous_pdf': state['pdf'] if state else None,
+            'pages': len(pages),
+            'pages_reparsed': reparsed,
+            'total_course_instructor_pairs': len(output['courses']),
+        }
+    }
+    writer(delta, delta_path)
+    
+    write_state({
+        'version': STATE_VERSION,
+        'pdf': str(pdf_path),
+        'pages': pages,
+        'rows': current_rows,
+    }, state_path)
+    
+    print(f"\nExtracted {len(catalog)} unique courses in {catalog.section_count()} sections")
+    print(f"Delta: {len(added)} added, {len(removed)} removed, {len(modified)} modified rows")
+    print(f"\nData saved to: {output_path}")
+    print(f"Delta saved to: {delta_path}")
+    return catalog
+
+
+def write_ndjson_record(f, record_type, record):
+    f.write(json.dumps({'record_type': record_type, **record}, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def write_ndjson(pdf_path, output_path, workers=1, pages=None, course_filter=None):
+    """
+    Stream course data as NDJSON, flushing after every page so consumers can start early.
+    Lines are 'instructor', 'course' and 'section' records (each instructor before the
+    first course that references it), followed by a single 'metadata' record. A course
+    row whose code was already written adds a 'section' record and 'course' records for
+    its new instructors only, matching the merged catalog of the JSON output.
+    """
+    seen_pairs = set()
+    seen_codes = set()
+    seen_instructors = set()
+    total_sections = 0
+    
+    def write_page(f, page_courses, page_instructors):
+        nonlocal total_sections
+        for instructor_name, instructor in page_instructors.items():
+            if instructor_name not in seen_instructors:
+                seen_instructors.add(instructor_name)
+                write_ndjson_record(f, 'instructor', instructor)
+        
+        for course in page_courses:
+            seen_codes.add(course.course_code)
+            for offering in course.offerings():
+                pair = (offering.course_code, offering.instructor_name)
+                if pair not in seen_pairs:
+                    seen_pairs.add(pair)
+                    write_ndjson_record(f, 'course', offering.to_dict())
+            for section in course.sections:
+                write_ndjson_record(f, 'section', {'course_code': course.course_code, **section.to_dict()})
+                total_sections += 1
+        f.flush()
+    
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+        for page_courses, page_instructors in iter_page_results(pdf_path, workers, pages, course_filter):
+            with profiler.stage('serialize'):
+                write_page(f, page_courses, page_instructors)
+        
+        if not seen_codes:
+            print("\nNo table data found. Attempting text extraction...")
+            write_page(f, *extract_from_text(pdf_path, pages, course_filter))
+        
+        metadata = {
+            'total_courses': len(seen_codes),
+            'total_sections': total_sections,
+            'total_course_instructor_pairs': len(seen_pairs),
+            'total_instructors': len(seen_instructors),
+            'semester': 'FALL',
+            'year': 2025,
+        }
+        write_ndjson_record(f, 'metadata', metadata)
+    
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract courses and instructors from the course offering PDF.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker processes for table extraction (default: 1)')
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                        help='json writes course_data.json at the end; ndjson streams course_data.ndjson page by page')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f're-extract only pages changed since the last incremental run and write the row delta to {DELTA_PATH}')
+    parser.add_argument('--pages', type=parse_page_spec,
+                        help="only parse these pages, e.g. '1-3,7'")
+    parser.add_argument('--department', action='append', default=[],
+                        help='only keep courses of this department, e.g. SSE (repeatable)')
+    parser.add_argument('--course-prefix', action='append', default=[],
+                        help='only keep courses whose code starts with this prefix, e.g. CSC (repeatable)')
+    parser.add_argument('-o', '--output', type=Path,
+                        help='output file (default: course_data.json or course_data.ndjson)')
+    parser.add_argument('pdf_path', nargs='?', type=Path, default=PDF_PATH,
+                        help='course offering PDF (default: the checked-in Term 1 PDF)')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling(args)
+    
+    course_filter = CourseFilter(args.department, args.course_prefix)
+    if args.incremental and (course_filter or args.pages):
+        parser.error('--incremental always covers the whole PDF; it cannot be combined with --pages, --department or --course-prefix')
+    
+    pdf_path = args.pdf_path
+    
+    if not pdf_path.exists():
+        print(f"Error: PDF file not found: {pdf_path}")
+        sys.exit(1)
+    
+    print(f"Parsing PDF: {pdf_path}")
+    
+    if args.incremental:
+        run_incremental(pdf_path, args.output or Path('course_data.json'))
+        return
+    
+    if args.format == 'ndjson':
+        output_path = args.output or Path('course_data.ndjson')
+        print(f"\nStreaming NDJSON to: {output_path}")
+        metadata = write_ndjson(pdf_path, output_path, workers=args.workers,
+                                pages=args.pages, course_filter=course_filter)
+        print(f"\nExtracted {metadata['total_courses']} unique courses in {metadata['total_sections']} sections")
+        print(f"Extracted {metadata['total_instructors']} unique instructors")
+        print(f"\nData saved to: {output_path}")
+        return
+    
+    # Try extracting from tables first (more structured)
+    print("\nAttempting to extract data from tables...")
+    if args.workers > 1:
+        print(f"Using {args.workers} worker processes")
+    courses, instructors_map = extract_from_tables(pdf_path, workers=args.workers,
+                                                   pages=args.pages, course_filter=course_filter)
+    
+    # If no courses found from tables, try text extraction
+    if not courses:
+        print("\nNo table data found. Attempting text extraction...")
+        courses, instructors_map = extract_from_text(pdf_path, args.pages, course_filter)
+    
+    catalog, output = build_output(courses, instructors_map)
+    
+    print(f"\nExtracted {len(catalog)} unique courses in {catalog.section_count()} sections")
+    print(f"Extracted {len(instructors_map)} unique instructors")
+    
+    # Save to JSON
+    output_path = args.output or Path('course_data.json')
+    write_output(output, output_path)
     
     print(f"\nData saved to: {output_path}")
     print(f"\nSample course:")
-    if courses:
-        print(json.dumps(courses[0], indent=2))
+    if catalog.courses:
+        print(json.dumps(catalog.courses[0].to_dict(), indent=2))
     
     print(f"\nSample instructor:")
     if instructors_map:
@@ -4,38 +4,38 @@ PDF Parser for Exam Schedules
 Extracts exam information from the PDF file and creates a JSON file for database import.
 """
 
+import argparse
 import json
-import re
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional
 
-try:
-    import pdfplumber
-except ImportError:
-    print("Error: pdfplumber is not installed.")
-    print("Please install it using: pip install pdfplumber")
-    sys.exit(1)
+from parse_grammar import (
+    CLOCK_TIME_RE,
+    DATE_PATTERNS,
+    EXAM_COURSE_CODE_RE,
+    EXAM_DATE_RE,
+    FULL_DATE_RE,
+    LOCATION_PATTERNS,
+    MONTHS,
+    TIME_RANGE_AMPM_RE,
+    TIME_RANGE_RE,
+    WHITESPACE_RE,
+)
+from parse_profile import add_profile_arguments, configure_profiling, profiler
+from pdf_cache import open_pdf
+from records import Exam, to_json
+from table_engine import extract_page_table, find_document_schema
 
 
 def parse_date(date_str: str, year: int = 2025) -> Optional[datetime]:
     """Parse date string like 'Dec 15' or '15 Dec' to datetime"""
-    months = {
-        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-        'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-    }
-    
     date_str = date_str.strip().lower()
     
     # Try patterns like "Dec 15", "15 Dec", "December 15"
-    patterns = [
-        r'(\w{3,9})\s+(\d{1,2})',  # "Dec 15" or "December 15"
-        r'(\d{1,2})\s+(\w{3,9})',  # "15 Dec"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, date_str)
+    for pattern in DATE_PATTERNS:
+        match = pattern.search(date_str)
         if match:
             if match.group(1).isdigit():
                 day = int(match.group(1))
@@ -44,9 +44,9 @@ def parse_date(date_str: str, year: int = 2025) -> Optional[datetime]:
                 month_str = match.group(1)[:3]
                 day = int(match.group(2))
             
-            if month_str in months:
+            if month_str in MONTHS:
                 try:
-                    return datetime(year, months[month_str], day)
+                    return datetime(year, MONTHS[month_str], day)
                 except ValueError:
                     pass
     
@@ -61,8 +61,7 @@ def parse_time(time_str: str) -> tuple[Optional[str], Optional[str]]:
     time_str = time_str.strip()
     
     # Pattern for "09:00-11:00" or "9:00-11:00"
-    pattern1 = r'(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})'
-    match = re.search(pattern1, time_str)
+    match = TIME_RANGE_RE.search(time_str)
     if match:
         start_hour = int(match.group(1))
         start_min = match.group(2)
@@ -71,8 +70,7 @@ def parse_time(time_str: str) -> tuple[Optional[str], Optional[str]]:
         return f"{start_hour:02d}:{start_min}", f"{end_hour:02d}:{end_min}"
     
     # Pattern for "9:00 AM - 11:00 AM"
-    pattern2 = r'(\d{1,2}):(\d{2})\s*(AM|PM)\s*-\s*(\d{1,2}):(\d{2})\s*(AM|PM)'
-    match = re.search(pattern2, time_str, re.IGNORECASE)
+    match = TIME_RANGE_AMPM_RE.search(time_str)
     if match:
         start_hour = int(match.group(1))
         start_ampm = match.group(3).upper()
@@ -94,14 +92,11 @@ def parse_time(time_str: str) -> tuple[Optional[str], Optional[str]]:
     return None, None
 
 
-def extract_exam_data(text: str, term: str = "Term 1", year: int = 2025) -> List[Dict]:
+def extract_exam_data(text: str, term: str = "Term 1", year: int = 2025) -> List[Exam]:
     """Extract exam information from text"""
     exams = []
     lines = text.split('\n')
     
-    # Course code pattern (e.g., "CSCI 1001", "MATH 2003")
-    course_code_pattern = r'([A-Z]{2,6}\s*\d{4}[A-Z]?)'
-    
     current_exam = None
     
     for i, line in enumerate(lines):
@@ -110,178 +105,315 @@ def extract_exam_data(text: str, term: str = "Term 1", year: int = 2025) -> List
             continue
         
         # Look for course code
-        course_match = re.search(course_code_pattern, line)
+        course_match = EXAM_COURSE_CODE_RE.search(line)
         if course_match:
             # Save previous exam if exists
-            if current_exam and current_exam.get('courseCode'):
+            if current_exam and current_exam.course_code:
                 exams.append(current_exam)
             
             # Start new exam
             course_code = course_match.group(1).replace(' ', '')
-            current_exam = {
-                'courseCode': course_code,
-                'courseName': '',
-                'examDate': None,
-                'startTime': None,
-                'endTime': None,
-                'location': None,
-                'term': term,
-                'year': year
-            }
+            current_exam = Exam(course_code, '', None, None, None, None, term, year)
             
             # Try to extract course name (usually after course code)
             name_part = line[course_match.end():].strip()
             if name_part and len(name_part) > 3:
-                current_exam['courseName'] = name_part[:200]  # Limit length
+                current_exam.course_name = name_part[:200]  # Limit length
         
         # Look for date patterns
-        if current_exam and not current_exam.get('examDate'):
-            date_match = re.search(r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}', line, re.IGNORECASE)
+        if current_exam and not current_exam.exam_date:
+            date_match = EXAM_DATE_RE.search(line)
             if date_match:
                 parsed_date = parse_date(date_match.group(0), year)
                 if parsed_date:
-                    current_exam['examDate'] = parsed_date.isoformat()
+                    current_exam.exam_date = parsed_date.isoformat()
         
         # Look for time patterns
-        if current_exam and not current_exam.get('startTime'):
+        if current_exam and not current_exam.start_time:
             start_time, end_time = parse_time(line)
             if start_time and end_time:
-                current_exam['startTime'] = start_time
-                current_exam['endTime'] = end_time
+                current_exam.start_time = start_time
+                current_exam.end_time = end_time
         
         # Look for location (usually contains room numbers or building names)
-        if current_exam and not current_exam.get('location'):
-            location_patterns = [
-                r'([A-Z]+\s*\d+[A-Z]?)',  # "LT1", "ERB 101"
-                r'(Room\s+\d+)',  # "Room 101"
-                r'(Lecture\s+Theatre\s+\d+)',  # "Lecture Theatre 1"
-            ]
-            for pattern in location_patterns:
-                loc_match = re.search(pattern, line, re.IGNORECASE)
+        if current_exam and not current_exam.location:
+            for pattern in LOCATION_PATTERNS:
+                loc_match = pattern.search(line)
                 if loc_match:
-                    current_exam['location'] = loc_match.group(1)
+                    current_exam.location = loc_match.group(1)
                     break
     
     # Add last exam
-    if current_exam and current_exam.get('courseCode'):
+    if current_exam and current_exam.course_code:
         exams.append(current_exam)
     
     return exams
 
 
-def extract_from_tables(pdf_path: str, term: str = "Term 1", year: int = 2025) -> List[Dict]:
-    """Extract exam data from PDF tables"""
-    exams = []
+MERGE_POLICIES = ('first', 'prefer_table', 'most_complete')
+
+# Fields counted when comparing how complete two records for the same exam are
+COMPLETENESS_FIELDS = ('course_name', 'exam_date', 'start_time', 'end_time', 'location')
+
+# Keywords that identify the timetable's header row
+EXAM_HEADER = ('course code', 'exam date')
+
+
+class ExamIndex:
+    """
+    Keyed index used to merge exams found in tables and in the text fallback.
+    Records are keyed on (courseCode, examDate), optionally extended with
+    startTime and/or location, so duplicate checks are constant time.
+    A record without an examDate or startTime (typically a text-fallback line
+    the date/time patterns missed) is matched on courseCode alone, so it merges
+    with the dated record for the same course instead of sitting beside it; the
+    dated record is kept under every policy, whichever of the two came first.
+    
+    Merge policies for a record whose key is already present:
+      first          keep the record seen first
+      prefer_table   a table row replaces a text-fallback record, otherwise keep the first
+      most_complete  keep whichever record has more of COMPLETENESS_FIELDS filled in
+    """
+    
+    def __init__(self, policy: str = 'first', match_time: bool = False, match_location: bool = False):
+        if policy not in MERGE_POLICIES:
+            raise ValueError(f"Unknown merge policy: {policy} (expected one of {', '.join(MERGE_POLICIES)})")
+        
+        self.policy = policy
+        self.key_fields = ('course_code', 'exam_date')
+        if match_time:
+            self.key_fields += ('start_time',)
+        if match_location:
+            self.key_fields += ('location',)
+        
+        self.exams: List[Exam] = []
+        self._sources: List[str] = []
+        self._positions: Dict[tuple, int] = {}
+        # Position of the first record, and of the first undated record, per course code
+        self._by_code: Dict[str, int] = {}
+        self._undated_by_code: Dict[str, int] = {}
+    
+    def key(self, exam: Exam) -> tuple:
+        return tuple(getattr(exam, field) for field in self.key_fields)
+    
+    def __contains__(self, exam: Exam) -> bool:
+        return self.key(exam) in self._positions
+    
+    def __len__(self) -> int:
+        return len(self.exams)
+    
+    def add(self, exam: Exam, source: str = 'table') -> bool:
+        """Add or merge an exam record. Returns True if the record is now in the index."""
+        key = self.key(exam)
+        position = self._positions.get(key)
+        if position is None:
+            if is_undated(exam):
+                position = self._by_code.get(exam.course_code)
+            else:
+                position = self._undated_by_code.get(exam.course_code)
+        if position is None:
+            self.exams.append(exam)
+            self._sources.append(source)
+            self._register(len(self.exams) - 1)
+            return True
+        
+        if self._should_replace(self.exams[position], self._sources[position], exam, source):
+            existing = self.exams[position]
+            if self._positions.get(self.key(existing)) == position:
+                del self._positions[self.key(existing)]
+            if self._undated_by_code.get(existing.course_code) == position:
+                del self._undated_by_code[existing.course_code]
+            self.exams[position] = exam
+            self._sources[position] = source
+            self._register(position)
+            return True
+        return False
+    
+    def _register(self, position: int):
+        exam = self.exams[position]
+        self._positions.setdefault(self.key(exam), position)
+        self._by_code.setdefault(exam.course_code, position)
+        if is_undated(exam):
+            self._undated_by_code.setdefault(exam.course_code, position)
+    
+    def _should_replace(self, existing: Exam, existing_source: str, new: Exam, new_source: str) -> bool:
+        # A dated record always wins over an undated one matched on course code alone
+        if is_undated(existing) != is_undated(new):
+            return is_undated(existing)
+        if self.policy == 'prefer_table':
+            return existing_source != 'table' and new_source == 'table'
+        if self.policy == 'most_complete':
+            return completeness(new) > completeness(existing)
+        return False
+
+
+def is_undated(exam: Exam) -> bool:
+    return not exam.exam_date or not exam.start_time
+
+
+def undated_duplicates(exams: List[Exam]) -> List[str]:
+    """Course codes that have both a dated and an undated record (none, once merged through an ExamIndex)."""
+    dated = {exam.course_code for exam in exams if not is_undated(exam)}
+    return sorted({exam.course_code for exam in exams if is_undated(exam) and exam.course_code in dated})
+
+
+def completeness(exam: Exam) -> int:
+    """Number of COMPLETENESS_FIELDS that have a value."""
+    return sum(1 for field in COMPLETENESS_FIELDS if getattr(exam, field))
+
+
+def exam_columns(schema) -> Dict[str, Optional[int]]:
+    """Map the schema's header names to the indices of the columns the parser reads."""
+    return {
+        'code': schema.index('course code', 'code'),
+        'title': schema.index('course title', 'title'),
+        'date': schema.index('exam date', 'date'),
+        'start': schema.index('start time', 'start'),
+        'end': schema.index('end time', 'end'),
+        'location': schema.index('venue', 'location', 'room'),
+    }
+
+
+def cell(row: List[str], index: Optional[int]) -> str:
+    return row[index].strip() if index is not None and row[index] else ''
+
+
+def clock_time(time_str: str) -> Optional[str]:
+    """'08:30:00' -> '08:30'"""
+    time_match = CLOCK_TIME_RE.search(time_str)
+    if time_match:
+        return f"{int(time_match.group(1)):02d}:{time_match.group(2)}"
+    return None
+
+
+def exam_from_row(row: List[str], columns: Dict[str, Optional[int]],
+                  term: str = "Term 1", year: int = 2025) -> Optional[Exam]:
+    """Build an exam record from one table row, or None if the row has no course code."""
+    # Clean up course code
+    course_code = WHITESPACE_RE.sub('', cell(row, columns['code']))
+    if not EXAM_COURSE_CODE_RE.match(course_code):
+        return None
+    
+    # Parse date like "December 14 2025 (Sunday)"
+    exam_date = None
+    date_match = FULL_DATE_RE.search(cell(row, columns['date']))
+    if date_match:
+        month_str = date_match.group(1)
+        day = int(date_match.group(2))
+        date_year = int(date_match.group(3))
+        parsed_date = parse_date(f"{month_str} {day}", date_year)
+        if parsed_date:
+            exam_date = parsed_date.isoformat()
     
-    with pdfplumber.open(pdf_path) as pdf:
+    return Exam(
+        course_code=course_code,
+        course_name=cell(row, columns['title']),
+        exam_date=exam_date,
+        start_time=clock_time(cell(row, columns['start'])),
+        end_time=clock_time(cell(row, columns['end'])),
+        location=cell(row, columns['location']) or None,
+        term=term,
+        year=year,
+    )
+
+
+def iter_page_exams(pdf_path: str, index: ExamIndex, term: str = "Term 1", year: int = 2025):
+    """
+    Parse the PDF page by page, merging every exam into index. After each page,
+    yield (page_num, records) where records are the exams the index stored on that
+    page, either as new keys or as replacements under the merge policy.
+    """
+    with open_pdf(pdf_path) as pdf:
         print(f"Processing {len(pdf.pages)} pages...")
+        schema = find_document_schema(pdf, EXAM_HEADER, key_keywords=('course code', 'code'))
+        columns = exam_columns(schema) if schema is not None else {}
         
         for page_num, page in enumerate(pdf.pages, 1):
             print(f"Processing page {page_num}...")
+            stored = []
             
-            # Extract tables
-            tables = page.extract_tables()
-            if tables:
-                print(f"  Found {len(tables)} table(s) on page {page_num}")
+            # Extract table rows, cut into cells by the document's column schema
+            rows = extract_page_table(page, schema, EXAM_HEADER) if schema is not None else []
+            table_exams = []
+            if rows:
+                print(f"  Found {len(rows)} table row(s) on page {page_num}")
                 
-                for table in tables:
-                    if not table or len(table) < 2:
-                        continue
-                    
-                    # Assume first row is header, skip it
-                    for row in table[1:]:
-                        if not row or len(row) < 16:
-                            continue
-                        
-                        # Based on the table structure:
-                        # Index 3: Course Code
-                        # Index 6: Course Title
-                        # Index 9: Exam Date
-                        # Index 12: Start Time
-                        # Index 15: End Time
-                        
-                        course_code = None
-                        course_name = None
-                        exam_date = None
-                        start_time = None
-                        end_time = None
-                        location = None
-                        
-                        # Extract course code (index 3)
-                        if len(row) > 3 and row[3]:
-                            course_code = str(row[3]).strip()
-                            # Clean up course code
-                            course_code = re.sub(r'\s+', '', course_code)
-                        
-                        # Extract course name (index 6)
-                        if len(row) > 6 and row[6]:
-                            course_name = str(row[6]).strip()
-                        
-                        # Extract exam date (index 9)
-                        if len(row) > 9 and row[9]:
-                            date_str = str(row[9]).strip()
-                            # Parse date like "December 14 2025 (Sunday)"
-                            date_match = re.search(r'(\w+)\s+(\d{1,2})\s+(\d{4})', date_str)
-                            if date_match:
-                                month_str = date_match.group(1)
-                                day = int(date_match.group(2))
-                                date_year = int(date_match.group(3))
-                                parsed_date = parse_date(f"{month_str} {day}", date_year)
-                                if parsed_date:
-                                    exam_date = parsed_date.isoformat()
-                        
-                        # Extract start time (index 12)
-                        if len(row) > 12 and row[12]:
-                            time_str = str(row[12]).strip()
-                            # Format: "08:30:00" -> "08:30"
-                            time_match = re.search(r'(\d{1,2}):(\d{2})', time_str)
-                            if time_match:
-                                start_time = f"{int(time_match.group(1)):02d}:{time_match.group(2)}"
-                        
-                        # Extract end time (index 15)
-                        if len(row) > 15 and row[15]:
-                            time_str = str(row[15]).strip()
-                            # Format: "10:00:00" -> "10:00"
-                            time_match = re.search(r'(\d{1,2}):(\d{2})', time_str)
-                            if time_match:
-                                end_time = f"{int(time_match.group(1)):02d}:{time_match.group(2)}"
-                        
-                        if course_code:
-                            exam = {
-                                'courseCode': course_code,
-                                'courseName': course_name or '',
-                                'examDate': exam_date,
-                                'startTime': start_time,
-                                'endTime': end_time,
-                                'location': location,
-                                'term': term,
-                                'year': year
-                            }
-                            exams.append(exam)
+                with profiler.stage('normalize', page_num):
+                    for row in rows:
+                        exam = exam_from_row(row, columns, term, year)
+                        if exam is not None:
+                            table_exams.append(exam)
+            
+            with profiler.stage('dedupe', page_num):
+                for exam in table_exams:
+                    if index.add(exam, source='table'):
+                        stored.append(exam)
             
             # Also extract text for fallback
             text = page.extract_text()
             if text:
-                text_exams = extract_exam_data(text, term, year)
+                with profiler.stage('text_fallback', page_num):
+                    text_exams = extract_exam_data(text, term, year)
                 # Merge with table exams, avoiding duplicates
-                for text_exam in text_exams:
-                    if not any(e.get('courseCode') == text_exam.get('courseCode') and 
-                              e.get('examDate') == text_exam.get('examDate') 
-                              for e in exams):
-                        exams.append(text_exam)
-    
-    return exams
+                with profiler.stage('dedupe', page_num):
+                    for text_exam in text_exams:
+                        if index.add(text_exam, source='text'):
+                            stored.append(text_exam)
+            
+            yield page_num, stored
+
+
+def extract_from_tables(pdf_path: str, term: str = "Term 1", year: int = 2025,
+                        merge_policy: str = 'first', match_time: bool = False,
+                        match_location: bool = False) -> List[Exam]:
+    """Extract exam data from PDF tables, merging in text-fallback exams through an ExamIndex"""
+    index = ExamIndex(merge_policy, match_time=match_time, match_location=match_location)
+    for _ in iter_page_exams(pdf_path, index, term, year):
+        pass
+    return index.exams
+
+
+def write_ndjson(pdf_path: str, output_path: str, index: ExamIndex,
+                 term: str = "Term 1", year: int = 2025) -> int:
+    """
+    Stream exams as NDJSON, one record per line, flushed after every page.
+    Under the prefer_table/most_complete policies a record may be written again
+    when it replaces an earlier one; consumers should upsert by key, last line wins.
+    """
+    written = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for _, records in iter_page_exams(pdf_path, index, term, year):
+            with profiler.stage('serialize'):
+                for exam in records:
+                    f.write(json.dumps(exam.to_dict(), ensure_ascii=False, separators=(',', ':')) + '\n')
+                    written += 1
+                f.flush()
+    return written
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python parse_exam_schedules.py <pdf_path> [term] [year]")
-        print("Example: python parse_exam_schedules.py 'exam_schedule.pdf' 'Term 1' 2025")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Extract exam schedules from a PDF into JSON for database import.',
+        epilog="Example: python parse_exam_schedules.py 'exam_schedule.pdf' 'Term 1' 2025",
+    )
+    parser.add_argument('pdf_path', help='exam timetable PDF')
+    parser.add_argument('term', nargs='?', default='Term 1', help='term label (default: Term 1)')
+    parser.add_argument('year', nargs='?', type=int, default=2025, help='year (default: 2025)')
+    parser.add_argument('--merge-policy', choices=MERGE_POLICIES, default='first',
+                        help='how to resolve the same exam found more than once (default: first)')
+    parser.add_argument('--match-time', action='store_true',
+                        help='treat exams with different start times as different exams')
+    parser.add_argument('--match-location', action='store_true',
+                        help='treat exams in different locations as different exams')
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                        help='json writes <pdf>_exams.json at the end; ndjson streams <pdf>_exams.ndjson page by page')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling(args)
     
-    pdf_path = sys.argv[1]
-    term = sys.argv[2] if len(sys.argv) > 2 else "Term 1"
-    year = int(sys.argv[3]) if len(sys.argv) > 3 else 2025
+    pdf_path = args.pdf_path
+    term = args.term
+    year = args.year
     
     if not Path(pdf_path).exists():
         print(f"Error: PDF file not found: {pdf_path}")
@@ -290,14 +422,26 @@ def main():
     print(f"Parsing exam schedule PDF: {pdf_path}")
     print(f"Term: {term}, Year: {year}\n")
     
-    exams = extract_from_tables(pdf_path, term, year)
+    if args.format == 'ndjson':
+        output_path = Path(pdf_path).stem + '_exams.ndjson'
+        index = ExamIndex(args.merge_policy, match_time=args.match_time, match_location=args.match_location)
+        written = write_ndjson(pdf_path, output_path, index, term, year)
+        print(f"\nExtracted {len(index)} exam entries ({written} lines written)")
+        print(f"\nSaved to: {output_path}")
+        return
+    
+    exams = extract_from_tables(pdf_path, term, year, merge_policy=args.merge_policy,
+                                match_time=args.match_time, match_location=args.match_location)
     
     print(f"\nExtracted {len(exams)} exam entries")
+    duplicates = undated_duplicates(exams)
+    if duplicates:
+        print(f"Warning: {len(duplicates)} course(s) have both a dated and an undated exam record: {', '.join(duplicates[:10])}")
     
     # Save to JSON
     output_path = Path(pdf_path).stem + '_exams.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(exams, f, indent=2, ensure_ascii=False)
+    with profiler.stage('serialize'), open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(exams, f, indent=2, ensure_ascii=False, default=to_json)
     
     print(f"\nSaved to: {output_path}")
     
@@ -305,9 +449,9 @@ def main():
     if exams:
         print("\nSample entries (first 5):")
         for exam in exams[:5]:
-            print(f"  {exam.get('courseCode')}: {exam.get('courseName')[:50]}...")
-            print(f"    Date: {exam.get('examDate')}, Time: {exam.get('startTime')}-{exam.get('endTime')}")
-            print(f"    Location: {exam.get('location') or 'N/A'}")
+            print(f"  {exam.course_code}: {exam.course_name[:50]}...")
+            print(f"    Date: {exam.exam_date}, Time: {exam.start_time}-{exam.end_time}")
+            print(f"    Location: {exam.location or 'N/A'}")
 
 
 if __name__ == '__main__':
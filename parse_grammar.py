@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Shared grammar for the PDF parsers.
+Precompiled regular expressions and lookup tables used in the parsers' per-line
+loops, so nothing is recompiled or rebuilt per call. See bench_grammar.py for
+the per-line cost before and after.
+"""
+
+import re
+
+# --- Course offering (parse_course_pdf) ---
+
+# Course code in free text, e.g. "CSCI 1001", "MATH 2003"
+COURSE_CODE_RE = re.compile(r'([A-Z]{2,6}\s+\d{4})')
+# Course code cell in the offering tables, e.g. "CSC3100" or "CSC 3100"
+TABLE_COURSE_CODE_RE = re.compile(r'^[A-Z]{2,6}\s*\d{4}')
+INSTRUCTOR_NAME_RE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)')
+EMAIL_RE = re.compile(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})')
+CREDITS_RE = re.compile(r'(\d+)\s*(?:credit|unit)', re.IGNORECASE)
+# Instructor cells list several names separated by semicolons or newlines
+INSTRUCTOR_SPLIT_RE = re.compile(r'[;\n]')
+NUMBER_RE = re.compile(r'(\d+)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# --- Exam timetable (parse_exam_schedules) ---
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+EXAM_COURSE_CODE_RE = re.compile(r'([A-Z]{2,6}\s*\d{4}[A-Z]?)')
+# "Dec 15" / "December 15" and "15 Dec", tried in this order by parse_date
+DATE_PATTERNS = (
+    re.compile(r'(\w{3,9})\s+(\d{1,2})'),
+    re.compile(r'(\d{1,2})\s+(\w{3,9})'),
+)
+EXAM_DATE_RE = re.compile(r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}', re.IGNORECASE)
+# "December 14 2025 (Sunday)" in the timetable's date column
+FULL_DATE_RE = re.compile(r'(\w+)\s+(\d{1,2})\s+(\d{4})')
+TIME_RANGE_RE = re.compile(r'(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})')
+TIME_RANGE_AMPM_RE = re.compile(r'(\d{1,2}):(\d{2})\s*(AM|PM)\s*-\s*(\d{1,2}):(\d{2})\s*(AM|PM)', re.IGNORECASE)
+CLOCK_TIME_RE = re.compile(r'(\d{1,2}):(\d{2})')
+LOCATION_PATTERNS = (
+    re.compile(r'([A-Z]+\s*\d+[A-Z]?)', re.IGNORECASE),  # "LT1", "ERB 101"
+    re.compile(r'(Room\s+\d+)', re.IGNORECASE),  # "Room 101"
+    re.compile(r'(Lecture\s+Theatre\s+\d+)', re.IGNORECASE),  # "Lecture Theatre 1"
+)
+
+# --- Transcripts (parse_transcript_improved) ---
+
+# Term headers such as "2022-23Term1", "2022-23Term2", "2022-23SummerSession"
+TERM_HEADER_RE = re.compile(r'(\d{4})-(\d{2})(Term1|Term2|SummerSession)')
+TERM_SEMESTERS = {
+    'Term1': 'FALL',
+    'Term2': 'SPRING',
+    'SummerSession': 'SUMMER',
+}
+# "CLC1201 Basic Chinese 3.0 B+ 37.1" / "DDA2001 Introduction to Data Science 3.0 PA N/A"
+GRADE_LINE_RE = re.compile(r'^([A-Z]{2,6}\d{4}[A-Z]?)\s+(.+?)\s+(\d+\.?\d*)\s+(PA|NP|IP|[A-Z][+-]?|W|I|S|U)\s*')
+TRAILING_UNITS_RE = re.compile(r'\s+\d+\.?\d*\s*$')
+STUDENT_ID_RE = re.compile(r'Student ID No\.:\s*(\d+)')
+STUDENT_NAME_RE = re.compile(r'^Name:\s*(.+?)\s*$', re.MULTILINE)
+
+GRADE_POINTS = {
+    'A+': 4.0, 'A': 4.0, 'A-': 3.7,
+    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+    'D+': 1.3, 'D': 1.0, 'D-': 0.7,
+    'F': 0.0
+}
+# Pass grades count toward credits but carry no grade points
+PASS_GRADES = frozenset({'PA', 'P'})
+# Lines that end a course block
+SUMMARY_MARKERS = ('Units Passed', 'Cumulative', 'Term GPA')
+FOOTER_MARKERS = ('Unofficial Copy', 'Invalid unless', 'ThemaximumGPA', 'Summary', 'Remarks', 'End of Transcript', 'Director')
+
+# --- Minor programmes (parse_minor_programmes) ---
+
+# "I. School of Management and Economics", "IV. School of Science and Engineering"
+SCHOOL_HEADER_RE = re.compile(r'^([IVXL]+)\.\s+(.+?)\s*$')
+# " Minor Programme in Economics" (the bullet glyph is dropped)
+MINOR_PROGRAMME_RE = re.compile(r'Minor Programme in\s+(.+?)\s*$')
+# Course codes in a study scheme, e.g. "CSC3100", "CSC 3100", "MAT2040A"
+REQUIREMENT_CODE_RE = re.compile(r'\b([A-Z]{2,6})\s*(\d{4}[A-Z]?)\b')
+# "Elective courses (at least 9 units)"
+REQUIREMENT_UNITS_RE = re.compile(r'(\d+)\s*units?', re.IGNORECASE)
+# Lines that open a study scheme's required or elective course list
+REQUIRED_MARKERS = ('required', 'compulsory', 'core')
+ELECTIVE_MARKERS = ('elective',)
+
+# --- Academic calendars (parse_academic_calendar, parse_academic_calendar_2024) ---
+
+# One calendar entry: "* Aug 17 - 18: Y2-4 Ug Course Registration for T1 (Tentative)",
+# "Aug 31 - Sep 12: Add/Drop for T1", "May 31-June 2 : Dragon Boat Festival", "Apr 25/26: ..."
+# The optional parts are greedy, so at any position the longest form wins (cross-month
+# range, then same-month range, then single day); a match consumes its text, so the
+# tail of a range ("Sep 12: Add/Drop for T1") is never matched as an entry of its own.
+EVENT_MONTH = r'\b(?:' + '|'.join(MONTHS) + r')[a-z]*'
+EVENT_RE = re.compile(
+    r'(?P<month>' + EVENT_MONTH + r')\s+(?P<day>\d{1,2})'
+    r'(?:\s*[-/]\s*(?:(?P<end_month>' + EVENT_MONTH + r')\s+)?(?P<end_day>\d{1,2}))?'
+    r'\s*:\s*(?P<desc>[^\n*]+)',
+    re.IGNORECASE,
+)
+# Calendar cell day ("Aug 17" or "17") and month headers ("August - 2025" or "August 2025")
+MONTH_DAY_RE = re.compile(r'(\w{3})\s+(\d{1,2})')
+DAY_RE = re.compile(r'(\d{1,2})')
+MONTH_YEAR_PATTERNS = (
+    re.compile(r'(\w+)\s*-\s*(\d{4})'),
+    re.compile(r'(\w+)\s+(\d{4})'),
+)
+TERM_INFO_RE = re.compile(r'(First|Second|Third|Summer)\s+Term:\s*(\w+)\s+(\d{1,2})\s*-\s*(\w+)\s+(\d{1,2})', re.IGNORECASE)
+# Calendar grid cell marks: "17*" event day, "28班" make-up working day, "1国庆节" public holiday
+GRID_EVENT_MARKER = '*'
+GRID_MAKEUP_MARKER = '班'
+GRID_HOLIDAY_RE = re.compile(r'[\u4e00-\u9fff]+')
+# "First Teaching Day of T1", "Last Teaching Day of Summer Session"
+TEACHING_DAY_RE = re.compile(r'\b(First|Last)\s+Teaching\s+Day\b', re.IGNORECASE)
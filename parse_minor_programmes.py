@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Minor Programmes Parser
+Extracts the minor programmes from the minor programmes PDF: each programme's
+name and school, plus its required and elective course codes wherever the
+document lists them. The programmes are written together with an inverted index
+from course code to programmes. "Which minors does this course count toward" is
+then one dictionary lookup on the saved file. "How far is this transcript from
+each minor" takes one lookup per passed course; neither rescans the programmes.
+
+The 2025-07-30 list only names the programmes. Their study schemes are in the
+Undergraduate Student Handbook. Put them in minor_requirements.json beside the
+PDF, or pass them with --requirements (see load_requirements), to fill in the
+course lists.
+
+Usage:
+    python parse_minor_programmes.py [pdf] [--requirements study_schemes.json]
+    python parse_minor_programmes.py --course CSC3100 --course MAT2040     # needs the study schemes
+    python parse_minor_programmes.py --transcript FilbertHamijoyo_CUSZ_TSCRPT.pdf
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from parse_grammar import (
+    ELECTIVE_MARKERS,
+    MINOR_PROGRAMME_RE,
+    PASS_GRADES,
+    REQUIRED_MARKERS,
+    REQUIREMENT_CODE_RE,
+    REQUIREMENT_UNITS_RE,
+    SCHOOL_HEADER_RE,
+    WHITESPACE_RE,
+)
+from pdf_cache import open_pdf
+from records import GradeRecord, MinorProgramme, to_json
+
+PDF_PATH = Path('List of Minor Programmes_20250730_2.pdf')
+OUTPUT_PATH = Path('minor_programmes.json')
+# Study schemes, used when present beside the PDF
+REQUIREMENTS_PATH = Path('minor_requirements.json')
+
+
+def normalize_code(course_code):
+    """"CSC 3100" and "csc3100" both become "CSC3100"."""
+    return WHITESPACE_RE.sub('', course_code).upper()
+
+
+def parse_programme_lines(lines):
+    """
+    Walk the document's lines. School headers set the school of the programmes that
+    follow. Under a programme, a line naming required or elective courses starts that
+    list, and the course codes on it and on later lines are added to the list.
+    """
+    programmes = []
+    school = ''
+    current = None
+    section = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        school_match = SCHOOL_HEADER_RE.match(line)
+        if school_match:
+            school = school_match.group(2)
+            current = None
+            continue
+
+        programme_match = MINOR_PROGRAMME_RE.search(line)
+        if programme_match:
+            current = {'name': programme_match.group(1), 'school': school,
+                       'required': [], 'elective': [], 'elective_units': 0}
+            programmes.append(current)
+            section = None
+            continue
+
+        if current is None:
+            continue
+        lowered = line.lower()
+        if any(marker in lowered for marker in ELECTIVE_MARKERS):
+            section = 'elective'
+            units_match = REQUIREMENT_UNITS_RE.search(line)
+            if units_match:
+                current['elective_units'] = int(units_match.group(1))
+        elif any(marker in lowered for marker in REQUIRED_MARKERS):
+            section = 'required'
+        if section is not None:
+            current[section].extend(prefix + number for prefix, number in REQUIREMENT_CODE_RE.findall(line))
+
+    return [
+        MinorProgramme(programme['name'], programme['school'], dict.fromkeys(programme['required']),
+                       dict.fromkeys(programme['elective']), programme['elective_units'])
+        for programme in programmes
+    ]
+
+
+def extract_programmes(pdf_path):
+    """Extract the MinorProgrammes from every page's text, in document order."""
+    lines = []
+    with open_pdf(pdf_path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+            if text:
+                lines.extend(text.split('\n'))
+            page.close()
+
+    return parse_programme_lines(lines)
+
+
+def load_requirements(path):
+    """
+    Read study schemes from JSON:
+        {"Computer Science and Engineering": {"required": ["CSC1001", ...],
+                                              "electives": ["CSC3170", ...],
+                                              "elective_units": 9}, ...}
+    Programme names may also be given in full ("Minor Programme in ...").
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    requirements = {}
+    for name, scheme in data.items():
+        name_match = MINOR_PROGRAMME_RE.search(name)
+        requirements[name_match.group(1) if name_match else name.strip()] = scheme
+    return requirements
+
+
+def apply_requirements(programmes, requirements):
+    """Return the programmes with the course lists of those that have a study scheme replaced."""
+    names = {programme.name for programme in programmes}
+    for name in requirements:
+        if name not in names:
+            print(f"Warning: study scheme for unknown programme '{name}' ignored")
+
+    updated = []
+    for programme in programmes:
+        scheme = requirements.get(programme.name)
+        if scheme is not None:
+            programme = MinorProgramme(
+                programme.name, programme.school,
+                dict.fromkeys(map(normalize_code, scheme.get('required', ()))),
+                dict.fromkeys(map(normalize_code, scheme.get('electives', ()))),
+                scheme.get('elective_units', 0),
+            )
+        updated.append(programme)
+    return updated
+
+
+def default_requirements(pdf_path):
+    """The study schemes file beside the PDF, or None if there is none."""
+    requirements_path = Path(pdf_path).with_name(REQUIREMENTS_PATH.name)
+    return requirements_path if requirements_path.exists() else None
+
+
+def passed_course(course):
+    """A GradeRecord counts toward a minor once passed: positive grade points or a pass grade."""
+    if course.grade_points is not None:
+        return course.grade_points > 0
+    return (course.letter_grade or '').upper() in PASS_GRADES
+
+
+class MinorIndex:
+    """
+    Minor programmes plus an inverted index from course code to [(programme name, role)],
+    where role is 'required' or 'elective'. The index is saved and loaded with the
+    programmes (to_dict/from_dict), so it is built once per parse, not per query.
+    """
+
+    def __init__(self, programmes, by_course=None):
+        self.programmes = {programme.name: programme for programme in programmes}
+        if by_course is None:
+            by_course = {}
+            for programme in programmes:
+                for course_code in programme.required_courses:
+                    by_course.setdefault(course_code, []).append((programme.name, 'required'))
+                for course_code in programme.elective_courses:
+                    by_course.setdefault(course_code, []).append((programme.name, 'elective'))
+        self.by_course = by_course
+
+    def __len__(self):
+        return len(self.programmes)
+
+    def lookup(self, course_code):
+        """[(programme name, role)] for every minor the course counts toward."""
+        return self.by_course.get(normalize_code(course_code), [])
+
+    def distance(self, courses):
+        """
+        How far a transcript is from each minor. courses are GradeRecords as returned by
+        parse_transcript_improved.extract_course_grades, and a course counts once passed
+        (retakes count once). Every passed course is looked up in the index once. Returns
+        one dict per programme, closest first; minors without known requirements come last.
+        """
+        passed = {}
+        for course in courses:
+            if passed_course(course):
+                course_code = normalize_code(course.course_code)
+                passed[course_code] = max(passed.get(course_code, 0), course.credits)
+
+        required_done = {}
+        electives_done = {}
+        for course_code, credits in passed.items():
+            for name, role in self.by_course.get(course_code, ()):
+                if role == 'required':
+                    required_done.setdefault(name, set()).add(course_code)
+                else:
+                    electives_done.setdefault(name, {})[course_code] = credits
+
+        results = []
+        for name, programme in self.programmes.items():
+            done = required_done.get(name, set())
+            electives = electives_done.get(name, {})
+            elective_units = sum(electives.values())
+            known = bool(programme.required_courses or programme.elective_courses)
+            missing = [course_code for course_code in programme.required_courses if course_code not in done]
+            remaining = max(programme.elective_units - elective_units, 0)
+            results.append({
+                'programme': name,
+                'school': programme.school,
+                'requirements_known': known,
+                'required_done': [course_code for course_code in programme.required_courses if course_code in done],
+                'required_missing': missing,
+                'electives_done': list(electives),
+                'elective_units_done': elective_units,
+                'elective_units_remaining': remaining,
+                'complete': known and not missing and not remaining,
+            })
+        results.sort(key=lambda result: (not result['requirements_known'], len(result['required_missing']),
+                                         result['elective_units_remaining']))
+        return results
+
+    @classmethod
+    def from_dict(cls, data):
+        programmes = [MinorProgramme.from_dict(programme) for programme in data['programmes']]
+        by_course = {
+            course_code: [(entry['programme'], entry['role']) for entry in entries]
+            for course_code, entries in data['course_index'].items()
+        }
+        return cls(programmes, by_course)
+
+    def to_dict(self):
+        return {
+            'programmes': list(self.programmes.values()),
+            'course_index': {
+                course_code: [{'programme': name, 'role': role} for name, role in entries]
+                for course_code, entries in self.by_course.items()
+            },
+        }
+
+
+def build_index(pdf_path, requirements_path=None):
+    """Extract the programmes, apply the study schemes if given, and index them."""
+    programmes = extract_programmes(pdf_path)
+    if requirements_path:
+        programmes = apply_requirements(programmes, load_requirements(requirements_path))
+    return MinorIndex(programmes)
+
+
+def build_output(index, pdf_path, requirements_path=None):
+    output = index.to_dict()
+    output['metadata'] = {
+        'pdf': str(pdf_path),
+        'requirements': str(requirements_path) if requirements_path else None,
+        'total_programmes': len(index),
+        'schools': len({programme.school for programme in index.programmes.values()}),
+        'indexed_courses': len(index.by_course),
+    }
+    return output
+
+
+def load_index(index_path):
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return MinorIndex.from_dict(json.load(f))
+
+
+def load_transcript_courses(path):
+    """GradeRecords from a transcript PDF, or from a transcript JSON written by the transcript parser."""
+    path = Path(path)
+    if path.suffix.lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            return [GradeRecord.from_dict(course) for course in json.load(f)['courses']]
+
+    from parse_transcript_improved import TranscriptStream
+    return list(TranscriptStream(path))
+
+
+def print_lookups(index, course_codes):
+    for course_code in course_codes:
+        entries = index.lookup(course_code)
+        if entries:
+            counts = '; '.join(f"{role} for {name}" for name, role in entries)
+            print(f"{normalize_code(course_code)}: {counts}")
+        else:
+            print(f"{normalize_code(course_code)}: counts toward no minor programme")
+
+
+def print_distances(results):
+    for result in results:
+        if not result['requirements_known']:
+            status = 'requirements unknown'
+        elif result['complete']:
+            status = 'complete'
+        else:
+            status = (f"{len(result['required_missing'])} required course(s) missing, "
+                      f"{result['elective_units_remaining']} elective unit(s) to go")
+        print(f"  {result['programme']:<50} {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract the minor programmes and index their course requirements.')
+    parser.add_argument('pdf', nargs='?', type=Path, default=PDF_PATH, help=f'minor programmes PDF (default: {PDF_PATH})')
+    parser.add_argument('--requirements', type=Path,
+                        help=f"JSON study schemes with each programme's required and elective courses"
+                             f" (default: {REQUIREMENTS_PATH} beside the PDF, if present)")
+    parser.add_argument('-o', '--output', type=Path, default=OUTPUT_PATH,
+                        help=f'programmes and course index file, written or queried (default: {OUTPUT_PATH})')
+    parser.add_argument('--course', action='append', default=[],
+                        help='look up which minors a course counts toward in the saved index (repeatable)')
+    parser.add_argument('--transcript', type=Path,
+                        help='transcript PDF or JSON: show how far it is from each minor, using the saved index')
+    args = parser.parse_args()
+
+    if args.course or args.transcript:
+        if not args.output.exists():
+            print(f"Error: index not found: {args.output} (run without --course/--transcript first)")
+            sys.exit(1)
+        index = load_index(args.output)
+        if not index.by_course:
+            print(f"Warning: {args.output} lists no courses for any minor (it was built without study schemes), "
+                  f"so every lookup comes back empty. Rebuild it with --requirements or {REQUIREMENTS_PATH.name} "
+                  "beside the PDF.\n")
+        print_lookups(index, args.course)
+        if args.transcript:
+            courses = load_transcript_courses(args.transcript)
+            print(f"\nDistance of {args.transcript} ({len(courses)} courses) from each minor:")
+            print_distances(index.distance(courses))
+        return
+
+    if not args.pdf.exists():
+        print(f"Error: PDF file not found: {args.pdf}")
+        sys.exit(1)
+
+    requirements_path = args.requirements or default_requirements(args.pdf)
+    if requirements_path and not requirements_path.exists():
+        print(f"Error: requirements file not found: {requirements_path}")
+        sys.exit(1)
+
+    print(f"Parsing minor programmes PDF: {args.pdf}")
+    if requirements_path:
+        print(f"Applying study schemes from: {requirements_path}")
+    else:
+        print(f"Warning: no study schemes loaded (no --requirements, no {REQUIREMENTS_PATH.name} beside the PDF). "
+              "The PDF only names the programmes, so they get no course lists and --course/--transcript "
+              "lookups will find nothing.")
+    index = build_index(args.pdf, requirements_path)
+    output = build_output(index, args.pdf, requirements_path)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False, default=to_json)
+
+    print(f"\nExtracted {len(index)} minor programmes in {output['metadata']['schools']} schools")
+    print(f"Indexed {len(index.by_course)} course codes")
+    if requirements_path and not index.by_course:
+        print(f"Warning: {requirements_path} matched no programme in the PDF; no courses were indexed")
+    print(f"\nData saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-stage timing for the PDF parsers.
+
+Enable with PARSER_PROFILE=1 or a parser's --profile flag. Stages are timed
+separately (pdf_open, extract_text, extract_tables, extract_words, extract_rules
+and probe are recorded by pdf_cache; normalize, text_fallback, dedupe and
+serialize by the parsers) in total and per page. A summary is printed to stderr
+when the process exits.
+
+Environment variables (or the matching --profile-* flags):
+    PARSER_PROFILE=1                enable stage timing
+    PARSER_PROFILE_OUTPUT=PATH      write stage totals and per-page counters as JSON
+    PARSER_PROFILE_DUMP=PATH        also run cProfile and dump pstats to PATH
+"""
+
+import atexit
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'page', 'start')
+
+    def __init__(self, profiler, name, page):
+        self.profiler = profiler
+        self.name = name
+        self.page = page
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, time.perf_counter() - self.start, self.page)
+
+
+_DISABLED_STAGE = contextlib.nullcontext()
+
+
+class Profiler:
+    """Accumulates stage timings and counters, globally and per page."""
+
+    def __init__(self):
+        self.enabled = False
+        self.output_path = None
+        self.dump_path = None
+        self.stages = {}  # stage -> [seconds, calls]
+        self.pages = {}  # page number -> {stage or counter: value}
+        self.counters = {}
+        self._started = None
+        self._cprofile = None
+        self._registered = False
+
+    def enable(self, output_path=None, dump_path=None):
+        self.enabled = True
+        self.output_path = output_path or self.output_path
+        self.dump_path = dump_path or self.dump_path
+        if self._started is None:
+            self._started = time.perf_counter()
+        if self.dump_path and self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        if not self._registered:
+            atexit.register(self.finish)
+            self._registered = True
+
+    def stage(self, name, page=None):
+        """Context manager timing one stage; a shared no-op when profiling is off."""
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return _Stage(self, name, page)
+
+    def record(self, name, seconds, page=None):
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+        if page is not None:
+            page_stats = self.pages.setdefault(page, {})
+            page_stats[f"{name}_s"] = page_stats.get(f"{name}_s", 0.0) + seconds
+
+    def count(self, name, value=1, page=None):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+        if page is not None:
+            page_stats = self.pages.setdefault(page, {})
+            page_stats[name] = page_stats.get(name, 0) + value
+
+    def summary(self):
+        return {
+            'wall_s': time.perf_counter() - self._started if self._started is not None else None,
+            'stages': {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in self.stages.items()},
+            'counters': self.counters,
+            'pages': [{'page': page, **stats} for page, stats in sorted(self.pages.items())],
+        }
+
+    def finish(self):
+        """Print the summary and write the optional JSON output and pstats dump."""
+        if not self.enabled:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+        summary = self.summary()
+        staged_total = sum(seconds for seconds, _ in self.stages.values()) or 1.0
+
+        out = sys.stderr
+        print(f"\n=== Profile (wall {summary['wall_s']:.3f}s) ===", file=out)
+        print(f"{'stage':<18}{'calls':>7}{'total s':>10}{'share':>8}", file=out)
+        for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0]):
+            print(f"{name:<18}{calls:>7}{seconds:>10.3f}{seconds / staged_total:>8.1%}", file=out)
+        for name, value in sorted(self.counters.items()):
+            print(f"  {name}: {value}", file=out)
+
+        if self.output_path:
+            with open(self.output_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            print(f"Profile written to: {self.output_path}", file=out)
+
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(self.dump_path)
+            print(f"cProfile stats written to: {self.dump_path}", file=out)
+            pstats.Stats(self.dump_path, stream=out).sort_stats('cumulative').print_stats(15)
+
+
+profiler = Profiler()
+
+if os.environ.get('PARSER_PROFILE', '0') != '0':
+    profiler.enable(os.environ.get('PARSER_PROFILE_OUTPUT'), os.environ.get('PARSER_PROFILE_DUMP'))
+
+
+def add_profile_arguments(parser):
+    """Add --profile, --profile-output and --profile-dump to an argparse parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='time each parsing stage and print a summary to stderr (same as PARSER_PROFILE=1)')
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help='write stage totals and per-page counters as JSON (implies --profile)')
+    parser.add_argument('--profile-dump', metavar='PATH',
+                        help='also run cProfile and dump pstats to PATH (implies --profile)')
+
+
+def configure_profiling(args):
+    """Enable the profiler from parsed --profile* arguments."""
+    if args.profile or args.profile_output or args.profile_dump:
+        profiler.enable(args.profile_output, args.profile_dump)
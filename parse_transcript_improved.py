@@ -4,412 +4,210 @@ Improved PDF Parser for Academic Transcript
 Extracts course grades and academic records from the transcript PDF.
 """
 
+import argparse
 import json
-import re
 import sys
 from pathlib import Path
 
-try:
-    import pdfplumber
-except ImportError:
-    print("Error: pdfplumber is not installed.")
-    print("Please install it using: pip install pdfplumber")
-    sys.exit(1)
+from grade_aggregation import student_summary
+from parse_grammar import (
+    FOOTER_MARKERS,
+    GRADE_LINE_RE,
+    GRADE_POINTS,
+    STUDENT_ID_RE,
+    STUDENT_NAME_RE,
+    SUMMARY_MARKERS,
+    TERM_HEADER_RE,
+    TERM_SEMESTERS,
+    TRAILING_UNITS_RE,
+)
+from parse_profile import add_profile_arguments, configure_profiling, profiler
+from pdf_cache import open_pdf
+from records import GradeRecord, to_json
 
 
-def parse_transcript(pdf_path):
-    """Parse transcript PDF and extract academic records."""
-    all_text = []
-    
-    with pdfplumber.open(pdf_path) as pdf:
+def iter_page_text(pdf_path):
+    """Yield each page's text in order, releasing the page's layout objects once it is read."""
+    with open_pdf(pdf_path) as pdf:
         print(f"Processing {len(pdf.pages)} pages...")
         
-        for page_num, page in enumerate(pdf.pages, 1):
+        for page in pdf.pages:
             text = page.extract_text()
+            page.close()
             if text:
-                all_text.append(text)
-    
-    full_text = '\n\n'.join(all_text)
-    return full_text
+                yield text
 
 
-def extract_course_grades(text):
-    """Extract course grades from transcript text."""
-    courses = []
-    lines = text.split('\n')
-    
-    current_term = None
-    current_year = None
-    in_course_section = False
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Detect term/year headers (e.g., "2022-23Term1", "2022-23Term2", "2022-23SummerSession")
-        # Also handle "2025-26Term1" format
-        # Term1 = Fall, Term2 = Spring, SummerSession = Summer
-        term_match = re.search(r'(\d{4})-(\d{2})(Term1|Term2|SummerSession)', line)
-        if term_match:
-            start_year = int(term_match.group(1))
-            term_type = term_match.group(3)
-            
-            if term_type == 'Term1':
-                current_term = 'FALL'
-                current_year = start_year
-            elif term_type == 'Term2':
-                current_term = 'SPRING'
-                current_year = start_year
-            elif term_type == 'SummerSession':
-                current_term = 'SUMMER'
-                current_year = start_year
-            
-            in_course_section = False
-            continue
-        
-        # Also check for term headers that might appear without the full academic year format
-        # This handles cases where the term continues on a new page
-        if re.match(r'^\d{4}-\d{2}(Term1|Term2|SummerSession)', line):
-            term_match = re.search(r'(\d{4})-(\d{2})(Term1|Term2|SummerSession)', line)
-            if term_match:
-                start_year = int(term_match.group(1))
-                term_type = term_match.group(3)
-                
-                if term_type == 'Term1':
-                    current_term = 'FALL'
-                    current_year = start_year
-                elif term_type == 'Term2':
-                    current_term = 'SPRING'
-                    current_year = start_year
-                elif term_type == 'SummerSession':
-                    current_term = 'SUMMER'
-                    current_year = start_year
-                
-                in_course_section = False
-                continue
-        
-        # Detect course section header
-        if 'Course Code' in line and 'Course Title' in line:
-            in_course_section = True
-            continue
-        
-        # If we see a term header, we should be ready to parse courses
-        # But don't set in_course_section yet - wait for the header
-        # However, if we already have a term set and see a course code, parse it
-        
-        # Skip summary lines
-        if 'Units Passed' in line or 'Cumulative' in line or 'Term GPA' in line:
-            in_course_section = False
-            continue
-        
-        # Skip other headers and footers
-        if any(x in line for x in ['Unofficial Copy', 'Invalid unless', 'ThemaximumGPA', 'Summary', 'Remarks', 'End of Transcript', 'Director']):
-            in_course_section = False
-            continue
-        
-        # Parse course lines
-        # Format: Course Code, Course Title, Units, Grade, % of A- and above
-        # Example: "CLC1201 Basic Chinese 3.0 B+ 37.1"
-        # Also handle: "DDA2001 Introduction to Data Science 3.0 PA N/A"
-        # Allow parsing if we have a term set (courses might continue from previous page)
-        # But only parse if line starts with a course code pattern
-        if current_term and current_year:
-            # Match course code (2-6 letters followed by 4 digits, optionally followed by letters)
-            # Updated regex to handle "PA" and "IP" correctly - match longer patterns first
-            # Must start with course code pattern to avoid false matches
-            course_code_match = re.match(r'^([A-Z]{2,6}\d{4}[A-Z]?)\s+(.+?)\s+(\d+\.?\d*)\s+(PA|NP|IP|[A-Z][+-]?|W|I|S|U)\s*', line)
-            
-            if course_code_match:
-                course_code = course_code_match.group(1)
-                course_name = course_code_match.group(2).strip()
-                units = float(course_code_match.group(3))
-                letter_grade = course_code_match.group(4)
-                
-                # Clean up course name (remove trailing numbers/units if accidentally included)
-                course_name = re.sub(r'\s+\d+\.?\d*\s*$', '', course_name)
-                
-                # Calculate grade points
-                grade_points_map = {
-                    'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-                    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-                    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-                    'D+': 1.3, 'D': 1.0, 'D-': 0.7,
-                    'F': 0.0
-                }
-                
-                grade_points = None
-                if letter_grade.upper() in grade_points_map:
-                    grade_points = grade_points_map[letter_grade.upper()]
-                elif letter_grade.upper() in ['PA', 'P']:
-                    # Pass/Pass with credit - no grade points but counts toward credits
-                    grade_points = None
-                elif letter_grade.upper() in ['NP', 'W', 'I', 'IP', 'S', 'U']:
-                    # No pass, Withdraw, Incomplete, In Progress, Satisfactory, Unsatisfactory
-                    grade_points = None
-                
-                course = {
-                    'course_code': course_code,
-                    'course_name': course_name,
-                    'credits': int(units),
-                    'letter_grade': letter_grade,
-                    'numeric_grade': None,  # Not provided in transcript
-                    'semester': current_term,
-                    'year': current_year,
-                    'grade_points': grade_points
-                }
-                
-                courses.append(course)
-    
-    return courses
+def parse_transcript(pdf_path):
+    """Parse transcript PDF and return the text of all pages."""
+    return '\n\n'.join(iter_page_text(pdf_path))
 
 
-def main():
-    pdf_path = Path('FilbertHamijoyo_CUSZ_TSCRPT.pdf')
-    
-    if not pdf_path.exists():
-        print(f"Error: PDF file not found: {pdf_path}")
-        sys.exit(1)
-    
-    print(f"Parsing transcript PDF: {pdf_path}")
+def extract_student_info(text):
+    """Extract the student id and name from the transcript header."""
+    student_id = None
+    student_name = None
     
-    # Parse PDF
-    text = parse_transcript(pdf_path)
+    id_match = STUDENT_ID_RE.search(text)
+    if id_match:
+        student_id = id_match.group(1)
     
-    # Extract course grades
-    print("\nExtracting course grades...")
-    courses = extract_course_grades(text)
+    name_match = STUDENT_NAME_RE.search(text)
+    if name_match:
+        student_name = name_match.group(1)
     
-    # Remove duplicates (in case same course appears on multiple pages)
+    return student_id, student_name
+
+
+# Streaming pipeline: page text -> lines -> classified lines -> term blocks -> unique GradeRecords.
+# Each stage is a generator, so a transcript is held one page of text and one term block at a time.
+
+# Line kinds yielded by classify_lines
+TERM_LINE = 'term'
+COURSE_HEADER_LINE = 'course_header'
+BLOCK_END_LINE = 'block_end'
+GRADE_LINE = 'grade'
+OTHER_LINE = 'other'
+
+
+def iter_lines(pages):
+    """Split page texts into stripped, non-empty lines."""
+    for text in pages:
+        for line in text.split('\n'):
+            line = line.strip()
+            if line:
+                yield line
+
+
+def classify_lines(lines):
+    """
+    Yield (kind, line, match) for each line. match is the TERM_HEADER_RE match of a term
+    header (e.g. "2022-23Term1", also repeated when a term continues on a new page) or the
+    GRADE_LINE_RE match of a course line (e.g. "CLC1201 Basic Chinese 3.0 B+ 37.1"), else None.
+    """
+    for line in lines:
+        term_match = TERM_HEADER_RE.search(line)
+        if term_match:
+            yield TERM_LINE, line, term_match
+        elif 'Course Code' in line and 'Course Title' in line:
+            yield COURSE_HEADER_LINE, line, None
+        elif any(x in line for x in SUMMARY_MARKERS) or any(x in line for x in FOOTER_MARKERS):
+            # Summary lines, headers and footers
+            yield BLOCK_END_LINE, line, None
+        else:
+            grade_match = GRADE_LINE_RE.match(line)
+            if grade_match:
+                yield GRADE_LINE, line, grade_match
+            else:
+                yield OTHER_LINE, line, None
+
+
+def grade_record(grade_match, semester, year):
+    """Build the GradeRecord of a GRADE_LINE_RE match (Course Code, Course Title, Units, Grade)."""
+    letter_grade = grade_match.group(4)
+    return GradeRecord(
+        course_code=grade_match.group(1),
+        # Clean up course name (remove trailing numbers/units if accidentally included)
+        course_name=TRAILING_UNITS_RE.sub('', grade_match.group(2).strip()),
+        credits=int(float(grade_match.group(3))),
+        letter_grade=letter_grade,
+        numeric_grade=None,  # Not provided in transcript
+        semester=semester,
+        year=year,
+        # Pass and non-GPA grades have no grade points
+        grade_points=GRADE_POINTS.get(letter_grade.upper()),
+    )
+
+
+def iter_term_blocks(classified):
+    """
+    Yield (year, semester, [GradeRecord]) for each term block as soon as it closes: at a
+    summary or footer line, the next term header, or the end of the document. Term1 = Fall,
+    Term2 = Spring, SummerSession = Summer. Course lines before the first term header are
+    ignored; course lines after a block has closed (a term continuing on a new page)
+    open another block of the same term.
+    """
+    year = None
+    semester = None
+    block = []
+    
+    for kind, line, match in classified:
+        if kind == GRADE_LINE:
+            if semester and year:
+                block.append(grade_record(match, semester, year))
+        elif kind == TERM_LINE or kind == BLOCK_END_LINE:
+            if block:
+                yield year, semester, block
+                block = []
+            if kind == TERM_LINE:
+                semester = TERM_SEMESTERS[match.group(3)]
+                year = int(match.group(1))
+    
+    if block:
+        yield year, semester, block
+
+
+def unique_courses(courses):
+    """Drop repeats of a (course code, semester, year) as they stream past; the first is kept."""
     seen = set()
-    unique_courses = []
     for course in courses:
-        key = (course['course_code'], course['semester'], course['year'])
+        key = (course.course_code, course.semester, course.year)
         if key not in seen:
             seen.add(key)
-            unique_courses.append(course)
-    
-    courses = unique_courses
-    
-    # Group by term for display
-    terms = {}
-    for course in courses:
-        key = f"{course['year']}-{course['semester']}"
-        if key not in terms:
-            terms[key] = []
-        terms[key].append(course)
-    
-    # Calculate GPA per term
-    print("\nTerm Summary:")
-    for term_key in sorted(terms.keys()):
-        term_courses = terms[term_key]
-        total_points = 0
-        total_credits = 0
-        for course in term_courses:
-            if course.get('grade_points') is not None:
-                total_points += course['grade_points'] * course['credits']
-                total_credits += course['credits']
-            elif course['letter_grade'] and course['letter_grade'].upper() in ['PA', 'P']:
-                # Pass courses count toward credits but not GPA
-                total_credits += course['credits']
-        
-        term_gpa = total_points / total_credits if total_credits > 0 else 0
-        print(f"  {term_key}: {len(term_courses)} courses, Term GPA: {term_gpa:.3f}")
-    
-    # Create output structure
-    output = {
-        'student_id': '122040012',
-        'student_name': 'Filbert Cahyadi Hamijoyo',
-        'courses': courses,
-        'metadata': {
-            'total_courses': len(courses),
-            'total_terms': len(terms),
-        }
-    }
-    
-    # Save to JSON
-    output_path = Path('filbert_transcript_real.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
-    
-    print(f"\nData saved to: {output_path}")
-    print(f"\nTotal courses extracted: {len(courses)}")
-    
-    if courses:
-        print("\nSample courses:")
-        for course in courses[:10]:
-            print(f"  {course['course_code']}: {course['course_name']} - {course['letter_grade']} ({course['semester']} {course['year']})")
-
+            yield course
 
-if __name__ == '__main__':
-    main()
 
+def iter_course_grades(lines):
+    """De-duplicated GradeRecords from transcript lines, released a term block at a time."""
+    blocks = iter_term_blocks(classify_lines(lines))
+    return unique_courses(course for _, _, block in blocks for course in block)
 
-Improved PDF Parser for Academic Transcript
-Extracts course grades and academic records from the transcript PDF.
-"""
 
-import json
-import re
-import sys
-from pathlib import Path
+class TranscriptStream:
+    """
+    One transcript PDF as a stream. Iterating yields its de-duplicated GradeRecords one
+    term block at a time while the PDF is read a page at a time. student_id and
+    student_name are picked up as the header lines stream past, so they are set by the
+    time the first record arrives (and stay None if the header has none).
+    """
+    
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self.student_id = None
+        self.student_name = None
+    
+    def _read_header(self, lines):
+        for line in lines:
+            if self.student_id is None:
+                id_match = STUDENT_ID_RE.search(line)
+                if id_match:
+                    self.student_id = id_match.group(1)
+            if self.student_name is None:
+                name_match = STUDENT_NAME_RE.search(line)
+                if name_match:
+                    self.student_name = name_match.group(1)
+            yield line
+    
+    def __iter__(self):
+        return iter_course_grades(self._read_header(iter_lines(iter_page_text(self.pdf_path))))
 
-try:
-    import pdfplumber
-except ImportError:
-    print("Error: pdfplumber is not installed.")
-    print("Please install it using: pip install pdfplumber")
-    sys.exit(1)
 
-
-def parse_transcript(pdf_path):
-    """Parse transcript PDF and extract academic records."""
-    all_text = []
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"Processing {len(pdf.pages)} pages...")
-        
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text()
-            if text:
-                all_text.append(text)
-    
-    full_text = '\n\n'.join(all_text)
-    return full_text
+def dedupe_courses(courses):
+    """Remove duplicates (in case same course appears on multiple pages)."""
+    return list(unique_courses(courses))
 
 
 def extract_course_grades(text):
-    """Extract course grades from transcript text."""
-    courses = []
-    lines = text.split('\n')
-    
-    current_term = None
-    current_year = None
-    in_course_section = False
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Detect term/year headers (e.g., "2022-23Term1", "2022-23Term2", "2022-23SummerSession")
-        # Also handle "2025-26Term1" format
-        # Term1 = Fall, Term2 = Spring, SummerSession = Summer
-        term_match = re.search(r'(\d{4})-(\d{2})(Term1|Term2|SummerSession)', line)
-        if term_match:
-            start_year = int(term_match.group(1))
-            term_type = term_match.group(3)
-            
-            if term_type == 'Term1':
-                current_term = 'FALL'
-                current_year = start_year
-            elif term_type == 'Term2':
-                current_term = 'SPRING'
-                current_year = start_year
-            elif term_type == 'SummerSession':
-                current_term = 'SUMMER'
-                current_year = start_year
-            
-            in_course_section = False
-            continue
-        
-        # Also check for term headers that might appear without the full academic year format
-        # This handles cases where the term continues on a new page
-        if re.match(r'^\d{4}-\d{2}(Term1|Term2|SummerSession)', line):
-            term_match = re.search(r'(\d{4})-(\d{2})(Term1|Term2|SummerSession)', line)
-            if term_match:
-                start_year = int(term_match.group(1))
-                term_type = term_match.group(3)
-                
-                if term_type == 'Term1':
-                    current_term = 'FALL'
-                    current_year = start_year
-                elif term_type == 'Term2':
-                    current_term = 'SPRING'
-                    current_year = start_year
-                elif term_type == 'SummerSession':
-                    current_term = 'SUMMER'
-                    current_year = start_year
-                
-                in_course_section = False
-                continue
-        
-        # Detect course section header
-        if 'Course Code' in line and 'Course Title' in line:
-            in_course_section = True
-            continue
-        
-        # If we see a term header, we should be ready to parse courses
-        # But don't set in_course_section yet - wait for the header
-        # However, if we already have a term set and see a course code, parse it
-        
-        # Skip summary lines
-        if 'Units Passed' in line or 'Cumulative' in line or 'Term GPA' in line:
-            in_course_section = False
-            continue
-        
-        # Skip other headers and footers
-        if any(x in line for x in ['Unofficial Copy', 'Invalid unless', 'ThemaximumGPA', 'Summary', 'Remarks', 'End of Transcript', 'Director']):
-            in_course_section = False
-            continue
-        
-        # Parse course lines
-        # Format: Course Code, Course Title, Units, Grade, % of A- and above
-        # Example: "CLC1201 Basic Chinese 3.0 B+ 37.1"
-        # Also handle: "DDA2001 Introduction to Data Science 3.0 PA N/A"
-        # Allow parsing if we have a term set (courses might continue from previous page)
-        # But only parse if line starts with a course code pattern
-        if current_term and current_year:
-            # Match course code (2-6 letters followed by 4 digits, optionally followed by letters)
-            # Updated regex to handle "PA" and "IP" correctly - match longer patterns first
-            # Must start with course code pattern to avoid false matches
-            course_code_match = re.match(r'^([A-Z]{2,6}\d{4}[A-Z]?)\s+(.+?)\s+(\d+\.?\d*)\s+(PA|NP|IP|[A-Z][+-]?|W|I|S|U)\s*', line)
-            
-            if course_code_match:
-                course_code = course_code_match.group(1)
-                course_name = course_code_match.group(2).strip()
-                units = float(course_code_match.group(3))
-                letter_grade = course_code_match.group(4)
-                
-                # Clean up course name (remove trailing numbers/units if accidentally included)
-                course_name = re.sub(r'\s+\d+\.?\d*\s*$', '', course_name)
-                
-                # Calculate grade points
-                grade_points_map = {
-                    'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-                    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-                    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-                    'D+': 1.3, 'D': 1.0, 'D-': 0.7,
-                    'F': 0.0
-                }
-                
-                grade_points = None
-                if letter_grade.upper() in grade_points_map:
-                    grade_points = grade_points_map[letter_grade.upper()]
-                elif letter_grade.upper() in ['PA', 'P']:
-                    # Pass/Pass with credit - no grade points but counts toward credits
-                    grade_points = None
-                elif letter_grade.upper() in ['NP', 'W', 'I', 'IP', 'S', 'U']:
-                    # No pass, Withdraw, Incomplete, In Progress, Satisfactory, Unsatisfactory
-                    grade_points = None
-                
-                course = {
-                    'course_code': course_code,
-                    'course_name': course_name,
-                    'credits': int(units),
-                    'letter_grade': letter_grade,
-                    'numeric_grade': None,  # Not provided in transcript
-                    'semester': current_term,
-                    'year': current_year,
-                    'grade_points': grade_points
-                }
-                
-                courses.append(course)
-    
-    return courses
+    """Extract course grades from transcript text (duplicates are kept, see dedupe_courses)."""
+    blocks = iter_term_blocks(classify_lines(iter_lines([text])))
+    return [course for _, _, block in blocks for course in block]
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Extract course grades from the transcript PDF.')
+    add_profile_arguments(parser)
+    configure_profiling(parser.parse_args())
+    
     pdf_path = Path('FilbertHamijoyo_CUSZ_TSCRPT.pdf')
     
     if not pdf_path.exists():
@@ -418,48 +216,16 @@ def main():
     
     print(f"Parsing transcript PDF: {pdf_path}")
     
-    # Parse PDF
-    text = parse_transcript(pdf_path)
-    
-    # Extract course grades
+    # Stream course grades out of the PDF, duplicates dropped as they pass
     print("\nExtracting course grades...")
-    courses = extract_course_grades(text)
-    
-    # Remove duplicates (in case same course appears on multiple pages)
-    seen = set()
-    unique_courses = []
-    for course in courses:
-        key = (course['course_code'], course['semester'], course['year'])
-        if key not in seen:
-            seen.add(key)
-            unique_courses.append(course)
-    
-    courses = unique_courses
-    
-    # Group by term for display
-    terms = {}
-    for course in courses:
-        key = f"{course['year']}-{course['semester']}"
-        if key not in terms:
-            terms[key] = []
-        terms[key].append(course)
+    courses = list(TranscriptStream(pdf_path))
     
     # Calculate GPA per term
+    terms = student_summary('122040012', courses)['terms']
+    
     print("\nTerm Summary:")
-    for term_key in sorted(terms.keys()):
-        term_courses = terms[term_key]
-        total_points = 0
-        total_credits = 0
-        for course in term_courses:
-            if course.get('grade_points') is not None:
-                total_points += course['grade_points'] * course['credits']
-                total_credits += course['credits']
-            elif course['letter_grade'] and course['letter_grade'].upper() in ['PA', 'P']:
-                # Pass courses count toward credits but not GPA
-                total_credits += course['credits']
-        
-        term_gpa = total_points / total_credits if total_credits > 0 else 0
-        print(f"  {term_key}: {len(term_courses)} courses, Term GPA: {term_gpa:.3f}")
+    for term in terms:
+        print(f"  {term['term']}: {term['courses']} courses, Term GPA: {term['term_gpa'] or 0:.3f}")
     
     # Create output structure
     output = {
@@ -474,8 +240,8 @@ def main():
     
     # Save to JSON
     output_path = Path('filbert_transcript_real.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    with profiler.stage('serialize'), open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False, default=to_json)
     
     print(f"\nData saved to: {output_path}")
     print(f"\nTotal courses extracted: {len(courses)}")
@@ -483,11 +249,8 @@ def main():
     if courses:
         print("\nSample courses:")
         for course in courses[:10]:
-            print(f"  {course['course_code']}: {course['course_name']} - {course['letter_grade']} ({course['semester']} {course['year']})")
+            print(f"  {course.course_code}: {course.course_name} - {course.letter_grade} ({course.semester} {course.year})")
 
 
 if __name__ == '__main__':
     main()
-
-
-
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+On-disk extraction cache shared by the pdfplumber-based parsers.
+
+Extraction results are keyed by the PDF's content hash, the page number and the
+extraction kind (text, tables, words, rules, stream_text), so re-running a parser on an unchanged
+PDF never runs pdfplumber's layout analysis. The cache directory is capped in
+size and the least recently used entries are evicted first.
+
+Environment variables:
+    PDF_CACHE=0             disable the cache (always run pdfplumber)
+    PDF_CACHE_DIR           cache directory (default: .pdf_cache)
+    PDF_CACHE_MAX_BYTES     size cap in bytes (default: 256 MB)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from parse_profile import profiler
+
+CACHE_ENABLED = os.environ.get('PDF_CACHE', '1') != '0'
+CACHE_DIR = Path(os.environ.get('PDF_CACHE_DIR', '.pdf_cache'))
+MAX_CACHE_BYTES = int(os.environ.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Bump when the format of cached values changes
+CACHE_VERSION = 1
+
+# Text-showing operators in a raw content stream: "[(Co)-14.6 (u)(rse)] TJ" and "(Course) Tj"
+SHOW_TEXT_RE = re.compile(rb'\[((?:[^\]\\]|\\.)*)\]\s*TJ|\(((?:[^)\\]|\\.)*)\)\s*Tj')
+STRING_RE = re.compile(rb'\(((?:[^)\\]|\\.)*)\)')
+
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extraction_kind(name, settings=None):
+    """Build a cache kind such as 'tables' or 'tables-1a2b3c4d' for non-default settings."""
+    if not settings:
+        return name
+    settings_json = json.dumps(settings, sort_keys=True, default=str)
+    return f"{name}-{hashlib.sha1(settings_json.encode('utf-8')).hexdigest()[:8]}"
+
+
+class ExtractionCache:
+    """Directory of JSON entries, one per (file hash, page number, kind)."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, digest, page_number, kind):
+        return self.cache_dir / digest[:2] / f"{digest}-v{CACHE_VERSION}-p{page_number}-{kind}.json"
+
+    def get(self, digest, page_number, kind):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        path = self.entry_path(digest, page_number, kind)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return False, None
+
+        # Touch the entry so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return True, value
+
+    def put(self, digest, page_number, kind, value):
+        path = self.entry_path(digest, page_number, kind)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and rename so concurrent readers never see partial entries
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        """Return [(mtime, size, path)] for every cache entry."""
+        result = []
+        if not self.cache_dir.exists():
+            return result
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            result.append((stat.st_mtime, stat.st_size, path))
+        return result
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits under max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        removed = 0
+        for _, _, path in self.entries():
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            removed += 1
+        return removed
+
+
+def open_pdfplumber(pdf_path):
+    try:
+        import pdfplumber
+    except ImportError:
+        print("Error: pdfplumber is not installed.")
+        print("Please install it using: pip install pdfplumber")
+        sys.exit(1)
+    return pdfplumber.open(pdf_path)
+
+
+def page_content(page):
+    """Concatenated, decoded content streams of a pdfplumber page."""
+    # pdfminer ships with pdfplumber, which is already imported if we have a page
+    from pdfminer.pdftypes import resolve1
+
+    return b''.join(resolve1(stream).get_data() for stream in page.page_obj.contents)
+
+
+def stream_text(page):
+    """
+    Approximate page text read straight from the content stream, one run per
+    text-showing operator, without pdfplumber's character and layout analysis.
+    It is only good for probing whether a token occurs on a page: strings in
+    fonts with custom encodings come out as bytes, and run order is stream order.
+    """
+    runs = []
+    for match in SHOW_TEXT_RE.finditer(page_content(page)):
+        if match.group(1) is not None:
+            runs.append(b''.join(STRING_RE.findall(match.group(1))))
+        else:
+            runs.append(match.group(2))
+    return b' '.join(runs).decode('latin-1')
+
+
+def page_rules(page):
+    """
+    Ruling lines of a pdfplumber page (line objects and rectangle borders), as
+    {'horizontal': [[x0, x1, y], ...], 'vertical': [[x, top, bottom], ...]}.
+    """
+    return {
+        'horizontal': [[round(edge['x0'], 1), round(edge['x1'], 1), round(edge['top'], 1)]
+                       for edge in page.horizontal_edges],
+        'vertical': [[round(edge['x0'], 1), round(edge['top'], 1), round(edge['bottom'], 1)]
+                     for edge in page.vertical_edges],
+    }
+
+
+def page_fingerprints(pdf_path):
+    """
+    Return one SHA-256 hex digest per page over the page's content streams and
+    geometry. Unlike file_hash, a page keeps its fingerprint when other pages of
+    the document change, so a reposted PDF can be compared page by page. Only
+    the raw streams are read; no layout analysis runs.
+    """
+    fingerprints = []
+    with open_pdfplumber(pdf_path) as pdf:
+        for page in pdf.pages:
+            digest = hashlib.sha256()
+            digest.update(repr((page.page_obj.mediabox, page.rotation)).encode('utf-8'))
+            digest.update(page_content(page))
+            fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+class CachedPage:
+    """Stand-in for a pdfplumber page whose extraction results come from the cache."""
+
+    def __init__(self, pdf, index):
+        self.pdf = pdf
+        self.index = index
+        self.page_number = index + 1
+
+    def _extract(self, stage, kind, extract):
+        with profiler.stage(stage, self.page_number):
+            cache = self.pdf.cache
+            if cache is None:
+                return extract(self.pdf.pdfplumber_page(self.index))
+
+            hit, value = cache.get(self.pdf.digest, self.page_number, kind)
+            if hit:
+                profiler.count('cache_hits', page=self.page_number)
+                return value
+            profiler.count('cache_misses', page=self.page_number)
+            value = extract(self.pdf.pdfplumber_page(self.index))
+            cache.put(self.pdf.digest, self.page_number, kind, value)
+            return value
+
+    def extract_text(self, **kwargs):
+        return self._extract('extract_text', extraction_kind('text', kwargs),
+                             lambda page: page.extract_text(**kwargs))
+
+    def extract_tables(self, table_settings=None):
+        return self._extract('extract_tables', extraction_kind('tables', table_settings),
+                             lambda page: page.extract_tables(table_settings))
+
+    def extract_words(self, **kwargs):
+        return self._extract('extract_words', extraction_kind('words', kwargs),
+                             lambda page: page.extract_words(**kwargs))
+
+    def extract_rules(self):
+        return self._extract('extract_rules', 'rules', page_rules)
+
+    def extract_stream_text(self):
+        """Cheap text probe, see stream_text()."""
+        return self._extract('probe', 'stream_text', stream_text)
+
+    def close(self):
+        """Release the underlying pdfplumber page's cached layout objects."""
+        self.pdf.release_page(self.index)
+
+
+class CachedPDF:
+    """
+    Drop-in replacement for pdfplumber.open() that serves page extraction from
+    the cache. pdfplumber is only opened when an entry is missing.
+    """
+
+    def __init__(self, pdf_path, cache=None):
+        self.path = Path(pdf_path)
+        self.cache = cache
+        self._pdf = None
+        self._open_pages = {}
+
+        # Hashing and the page count lookup; when the page count is cached, pdfplumber
+        # is opened lazily and that open is timed inside the first extraction stage
+        with profiler.stage('pdf_open'):
+            self.digest = file_hash(self.path) if cache is not None else None
+
+            page_count = None
+            if cache is not None:
+                hit, meta = cache.get(self.digest, 0, 'meta')
+                if hit:
+                    page_count = meta['page_count']
+            if page_count is None:
+                page_count = len(self._pdfplumber().pages)
+                if cache is not None:
+                    cache.put(self.digest, 0, 'meta', {'page_count': page_count})
+
+        self.pages = [CachedPage(self, i) for i in range(page_count)]
+
+    def _pdfplumber(self):
+        if self._pdf is None:
+            self._pdf = open_pdfplumber(self.path)
+        return self._pdf
+
+    def pdfplumber_page(self, index):
+        if index not in self._open_pages:
+            self._open_pages[index] = self._pdfplumber().pages[index]
+        return self._open_pages[index]
+
+    def release_page(self, index):
+        page = self._open_pages.pop(index, None)
+        if page is not None:
+            page.close()
+
+    def close(self):
+        for index in list(self._open_pages):
+            self.release_page(index)
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self.cache is not None:
+            self.cache.evict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_pdf(pdf_path, cache_dir=None):
+    """Open a PDF through the extraction cache (or straight through when PDF_CACHE=0)."""
+    cache = None
+    if CACHE_ENABLED:
+        cache = ExtractionCache(cache_dir if cache_dir is not None else CACHE_DIR)
+    return CachedPDF(pdf_path, cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or clear the PDF extraction cache.')
+    parser.add_argument('--clear', action='store_true', help='delete every cache entry')
+    parser.add_argument('--cache-dir', default=str(CACHE_DIR), help=f'cache directory (default: {CACHE_DIR})')
+    args = parser.parse_args()
+
+    cache = ExtractionCache(args.cache_dir)
+    if args.clear:
+        print(f"Removed {cache.clear()} cache entries from {cache.cache_dir}")
+        return
+
+    entries = cache.entries()
+    total = sum(size for _, size, _ in entries)
+    print(f"Cache directory: {cache.cache_dir}")
+    print(f"Entries: {len(entries)}")
+    print(f"Size: {total / 1024:.1f} KB of {cache.max_bytes / (1024 * 1024):.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Record types shared by the PDF parsers.
+Slotted dataclasses instead of per-row dicts: no per-instance __dict__, and the
+strings that repeat across hundreds of rows (instructor names, departments,
+terms) are interned so every row shares one copy. Each record has a to_dict()
+that produces exactly the JSON the parsers have always written, and a to_row()
+tuple in field order for CSV/SQL loaders. See bench_records.py for the memory
+and serialization cost against plain dicts.
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+intern = sys.intern
+
+
+def intern_optional(value):
+    return intern(value) if value else value
+
+
+@dataclass(slots=True)
+class CourseOffering:
+    """One course-instructor pair, a row of course_data.json's 'courses'."""
+    course_code: str
+    course_name: str
+    department: str
+    instructor_name: str
+    instructor_email: str
+    credits: int
+    semester: str
+    year: int
+
+    def to_dict(self):
+        return {
+            'course_code': self.course_code,
+            'course_name': self.course_name,
+            'department': self.department,
+            'instructor_name': self.instructor_name,
+            'instructor_email': self.instructor_email,
+            'credits': self.credits,
+            'semester': self.semester,
+            'year': self.year,
+        }
+
+    def to_row(self):
+        return (self.course_code, self.course_name, self.department, self.instructor_name,
+                self.instructor_email, self.credits, self.semester, self.year)
+
+
+@dataclass(slots=True)
+class Section:
+    """
+    One offering-table row of a course: its instructors and whatever section details
+    the PDF has columns for (None where it has none, e.g. no section number or venue).
+    """
+    section: Optional[str]
+    instructor_names: Tuple[str, ...]
+    capacity: Optional[int] = None
+    activity_count: Optional[int] = None
+    reserved_quota: Optional[str] = None
+    schedule: Optional[str] = None
+    venue: Optional[str] = None
+    language: Optional[str] = None
+    target_students: Optional[str] = None
+    remark: Optional[str] = None
+
+    def __post_init__(self):
+        self.instructor_names = tuple(intern(name) for name in self.instructor_names)
+        self.language = intern_optional(self.language)
+        self.target_students = intern_optional(self.target_students)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['section'], data['instructor_names'], data['capacity'], data['activity_count'],
+                   data['reserved_quota'], data['schedule'], data['venue'], data['language'],
+                   data['target_students'], data['remark'])
+
+    def to_dict(self):
+        return {
+            'section': self.section,
+            'instructor_names': list(self.instructor_names),
+            'capacity': self.capacity,
+            'activity_count': self.activity_count,
+            'reserved_quota': self.reserved_quota,
+            'schedule': self.schedule,
+            'venue': self.venue,
+            'language': self.language,
+            'target_students': self.target_students,
+            'remark': self.remark,
+        }
+
+    def to_row(self):
+        return (self.section, '; '.join(self.instructor_names), self.capacity, self.activity_count,
+                self.reserved_quota, self.schedule, self.venue, self.language, self.target_students,
+                self.remark)
+
+
+@dataclass(slots=True)
+class Course:
+    """
+    A course from the offering PDF. instructor_names is every instructor across its
+    sections, in order of first appearance; sections keeps each table row.
+    """
+    course_code: str
+    course_name: str
+    department: str
+    instructor_names: Tuple[str, ...]
+    credits: int = 3
+    semester: str = 'FALL'
+    year: int = 2025
+    sections: Tuple[Section, ...] = ()
+
+    def __post_init__(self):
+        self.department = intern(self.department)
+        self.instructor_names = tuple(intern(name) for name in self.instructor_names)
+        self.semester = intern(self.semester)
+        self.sections = tuple(self.sections)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['course_code'], data['course_name'], data['department'],
+                   data['instructor_names'], data['credits'], data['semester'], data['year'],
+                   [Section.from_dict(section) for section in data.get('sections', ())])
+
+    def merge(self, other):
+        """Return a new Course with other's sections and new instructors appended to this one's."""
+        instructor_names = self.instructor_names + tuple(
+            name for name in dict.fromkeys(other.instructor_names) if name not in self.instructor_names)
+        return Course(self.course_code, self.course_name, self.department, instructor_names,
+                      self.credits, self.semester, self.year, self.sections + other.sections)
+
+    def offerings(self):
+        """Fan out into one CourseOffering per instructor (or a single one with no instructor)."""
+        return [
+            CourseOffering(self.course_code, self.course_name, self.department, instructor_name,
+                           '', self.credits, self.semester, self.year)
+            for instructor_name in self.instructor_names or ('',)
+        ]
+
+    def to_dict(self):
+        return {
+            'course_code': self.course_code,
+            'course_name': self.course_name,
+            'department': self.department,
+            'instructor_names': list(self.instructor_names),
+            'credits': self.credits,
+            'semester': self.semester,
+            'year': self.year,
+            'sections': [section.to_dict() for section in self.sections],
+        }
+
+    def to_row(self):
+        return (self.course_code, self.course_name, self.department, '; '.join(self.instructor_names),
+                self.credits, self.semester, self.year)
+
+
+@dataclass(slots=True)
+class Exam:
+    """An exam sitting from the timetable PDF. to_dict() uses the camelCase keys the loaders expect."""
+    course_code: str
+    course_name: str
+    exam_date: Optional[str]
+    start_time: Optional[str]
+    end_time: Optional[str]
+    location: Optional[str]
+    term: str
+    year: int
+
+    def __post_init__(self):
+        self.exam_date = intern_optional(self.exam_date)
+        self.start_time = intern_optional(self.start_time)
+        self.end_time = intern_optional(self.end_time)
+        self.location = intern_optional(self.location)
+        self.term = intern(self.term)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Read back a record of the parser's camelCase JSON."""
+        return cls(data['courseCode'], data['courseName'], data['examDate'], data['startTime'],
+                   data['endTime'], data['location'], data['term'], data['year'])
+
+    def to_dict(self):
+        return {
+            'courseCode': self.course_code,
+            'courseName': self.course_name,
+            'examDate': self.exam_date,
+            'startTime': self.start_time,
+            'endTime': self.end_time,
+            'location': self.location,
+            'term': self.term,
+            'year': self.year,
+        }
+
+    def to_row(self):
+        return (self.course_code, self.course_name, self.exam_date, self.start_time,
+                self.end_time, self.location, self.term, self.year)
+
+
+@dataclass(slots=True)
+class CalendarEvent:
+    """An academic calendar event; end_date is None for single-day events."""
+    event_type: str
+    term: str
+    year: int
+    start_date: str
+    end_date: Optional[str]
+    name: str
+    description: Optional[str] = None
+
+    def __post_init__(self):
+        self.event_type = intern(self.event_type)
+        self.term = intern(self.term)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['event_type'], data['term'], data['year'], data['start_date'], data['end_date'],
+                   data['name'], data['description'])
+
+    def to_dict(self):
+        return {
+            'event_type': self.event_type,
+            'term': self.term,
+            'year': self.year,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'name': self.name,
+            'description': self.description,
+        }
+
+    def to_row(self):
+        return (self.event_type, self.term, self.year, self.start_date, self.end_date,
+                self.name, self.description)
+
+
+@dataclass(slots=True)
+class GradeRecord:
+    """A course grade from a transcript. grade_points is None for pass and non-GPA grades."""
+    course_code: str
+    course_name: str
+    credits: int
+    letter_grade: str
+    numeric_grade: Optional[float]
+    semester: str
+    year: int
+    grade_points: Optional[float]
+
+    def __post_init__(self):
+        self.letter_grade = intern(self.letter_grade)
+        self.semester = intern(self.semester)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['course_code'], data['course_name'], data['credits'], data['letter_grade'],
+                   data['numeric_grade'], data['semester'], data['year'], data['grade_points'])
+
+    def to_dict(self):
+        return {
+            'course_code': self.course_code,
+            'course_name': self.course_name,
+            'credits': self.credits,
+            'letter_grade': self.letter_grade,
+            'numeric_grade': self.numeric_grade,
+            'semester': self.semester,
+            'year': self.year,
+            'grade_points': self.grade_points,
+        }
+
+    def to_row(self):
+        return (self.course_code, self.course_name, self.credits, self.letter_grade,
+                self.numeric_grade, self.semester, self.year, self.grade_points)
+
+
+@dataclass(slots=True)
+class MinorProgramme:
+    """
+    A minor programme. Course codes are normalized ("CSC3100"); both lists are empty
+    when the source only names the programme.
+    """
+    name: str
+    school: str
+    required_courses: Tuple[str, ...] = ()
+    elective_courses: Tuple[str, ...] = ()
+    elective_units: int = 0
+
+    def __post_init__(self):
+        self.school = intern(self.school)
+        self.required_courses = tuple(self.required_courses)
+        self.elective_courses = tuple(self.elective_courses)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['school'], data['required_courses'], data['elective_courses'],
+                   data['elective_units'])
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'school': self.school,
+            'required_courses': list(self.required_courses),
+            'elective_courses': list(self.elective_courses),
+            'elective_units': self.elective_units,
+        }
+
+    def to_row(self):
+        return (self.name, self.school, '; '.join(self.required_courses), '; '.join(self.elective_courses),
+                self.elective_units)
+
+
+def to_json(value):
+    """json.dump(..., default=to_json) hook: serialize records through their to_dict()."""
+    try:
+        return value.to_dict()
+    except AttributeError:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable") from None
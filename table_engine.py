@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Column-position table engine for the ruled tables in the course offering and
+exam timetable PDFs.
+
+The column schema (header names and their x ranges) is derived once per
+document from the header row's words and the vertical rules around them.
+Every page is then cut into cells straight from its words and ruling lines,
+without pdfplumber's generic edge/intersection table finder:
+
+- columns are re-aligned to each page's own vertical rules by the centre of
+  the schema column, so rules that drift between pages or reposts are followed;
+- rows are the bands between horizontal rules crossing the key column;
+- a cell merged over several rows (no rule crossing it) is repeated in each row.
+
+Pages without rules fall back to the header's x positions for columns and to
+lines with text in the key column for row starts.
+"""
+
+from bisect import bisect_right
+
+# Rules closer than this are one rule (rectangle borders come in pairs)
+RULE_TOLERANCE = 2.0
+# Words whose tops differ by less than this are on the same text line
+LINE_TOLERANCE = 3.0
+
+
+class TableSchema:
+    """Column names and x ranges of a table, taken from its header row."""
+
+    def __init__(self, names, bounds, key):
+        self.names = names  # header text per column, lines joined by '\n'
+        self.bounds = bounds  # (x0, x1) per column on the header page
+        self.key = key  # index of the column whose rules define the rows
+
+    def index(self, *keywords):
+        """
+        Index of the first column whose lowercased name contains a keyword, trying
+        the keywords in order (most specific first), or None.
+        """
+        names = [name.lower() for name in self.names]
+        for keyword in keywords:
+            for i, name in enumerate(names):
+                if keyword in name:
+                    return i
+        return None
+
+
+def merge_positions(positions, tolerance=RULE_TOLERANCE):
+    """Sort positions and drop any within tolerance of the previous kept one."""
+    merged = []
+    for position in sorted(positions):
+        if not merged or position - merged[-1] > tolerance:
+            merged.append(position)
+    return merged
+
+
+def vertical_rules_at(rules, y):
+    """x positions of the vertical rules crossing height y."""
+    return merge_positions(x for x, top, bottom in rules['vertical']
+                           if top - RULE_TOLERANCE <= y <= bottom + RULE_TOLERANCE)
+
+
+def horizontal_rules_at(rules, x, below=None):
+    """y positions of the horizontal rules crossing x, optionally only those below a height."""
+    return merge_positions(y for x0, x1, y in rules['horizontal']
+                           if x0 - RULE_TOLERANCE <= x <= x1 + RULE_TOLERANCE
+                           and (below is None or y >= below - RULE_TOLERANCE))
+
+
+def group_lines(words):
+    """Group words into text lines by their top, each line sorted left to right."""
+    lines = []
+    for word in sorted(words, key=lambda word: (word['top'], word['x0'])):
+        if lines and word['top'] - lines[-1][0]['top'] <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda word: word['x0']) for line in lines]
+
+
+def cell_text(words):
+    return '\n'.join(' '.join(word['text'] for word in line) for line in group_lines(words))
+
+
+def centre_x(word):
+    return (word['x0'] + word['x1']) / 2
+
+
+def centre_y(word):
+    return (word['top'] + word['bottom']) / 2
+
+
+def find_header(words, required):
+    """Return the words of the first text line containing every required keyword, or None."""
+    for line in group_lines(words):
+        text = ' '.join(word['text'] for word in line).lower()
+        if all(keyword in text for keyword in required):
+            return line
+    return None
+
+
+def header_band(header_line, rules):
+    """(top, bottom) of the header row: the rules around its first line, or the line itself."""
+    top = min(word['top'] for word in header_line)
+    bottom = max(word['bottom'] for word in header_line)
+    ys = horizontal_rules_at(rules, centre_x(header_line[0]))
+    above = [y for y in ys if y <= top + RULE_TOLERANCE]
+    below = [y for y in ys if y >= bottom - RULE_TOLERANCE]
+    if above and below:
+        return above[-1], below[0]
+    return top - LINE_TOLERANCE, bottom + LINE_TOLERANCE
+
+
+def detect_schema(words, rules, required, key_keywords):
+    """
+    Derive a TableSchema from the header row, the first line containing every
+    keyword in required. The key column is found with TableSchema.index(*key_keywords).
+    Returns None if the page has no such header.
+    """
+    header_line = find_header(words, required)
+    if header_line is None:
+        return None
+    top, bottom = header_band(header_line, rules)
+    header_words = [word for word in words if top <= centre_y(word) <= bottom]
+
+    boundaries = vertical_rules_at(rules, (top + bottom) / 2)
+    if len(boundaries) >= 2:
+        intervals = list(zip(boundaries, boundaries[1:]))
+    else:
+        # No rules: columns start at the left edge of each group of header words
+        starts = []
+        for word in sorted(header_words, key=lambda word: word['x0']):
+            if not starts or word['x0'] - starts[-1][1] > 3 * LINE_TOLERANCE:
+                starts.append([word['x0'], word['x1']])
+            else:
+                starts[-1][1] = max(starts[-1][1], word['x1'])
+        lefts = [x0 - 1 for x0, _ in starts]
+        intervals = list(zip(lefts, lefts[1:] + [float('inf')]))
+
+    names = []
+    bounds = []
+    for x0, x1 in intervals:
+        cell_words = [word for word in header_words if x0 <= centre_x(word) < x1]
+        # Intervals without header text are gaps between double rules, not columns
+        if cell_words:
+            names.append(cell_text(cell_words))
+            bounds.append((x0, x1))
+
+    schema = TableSchema(names, bounds, key=0)
+    key = schema.index(*key_keywords)
+    if key is None:
+        return None
+    schema.key = key
+    return schema
+
+
+def page_bounds(schema, rules, y):
+    """Column x ranges on this page: the page's rule interval around each schema column's centre."""
+    boundaries = vertical_rules_at(rules, y) if y is not None else []
+    if len(boundaries) < 2:
+        return list(schema.bounds)
+
+    bounds = []
+    for x0, x1 in schema.bounds:
+        centre = (x0 + x1) / 2
+        i = bisect_right(boundaries, centre)
+        if 0 < i < len(boundaries):
+            bounds.append((boundaries[i - 1], boundaries[i]))
+        else:
+            bounds.append((x0, x1))
+    return bounds
+
+
+def column_of(bounds, x):
+    for i, (x0, x1) in enumerate(bounds):
+        if x0 <= x < x1:
+            return i
+    return None
+
+
+def row_starts(words, bounds, key, top):
+    """Row boundaries for a page without horizontal rules: each line with text in the key column starts a row."""
+    lines = group_lines([word for word in words if centre_y(word) > top])
+    ys = [min(word['top'] for word in line) - 0.5
+          for line in lines if any(column_of(bounds, centre_x(word)) == key for word in line)]
+    if ys:
+        ys.append(max(word['bottom'] for line in lines for word in line) + 0.5)
+    return ys
+
+
+def extract_table(words, rules, schema, required):
+    """
+    Cut a page into rows of cell strings in schema column order. Only text below
+    the page's header row (when the page repeats it) is used. Rows that contain
+    no text at all are dropped.
+    """
+    header_line = find_header(words, required)
+    top = header_band(header_line, rules)[1] if header_line is not None else None
+
+    body = [word for word in words if top is None or centre_y(word) > top]
+    if not body:
+        return []
+    bounds = page_bounds(schema, rules, centre_y(body[len(body) // 2]))
+
+    key_x = sum(bounds[schema.key]) / 2
+    row_ys = horizontal_rules_at(rules, key_x, below=top)
+    if len(row_ys) >= 2:
+        column_ys = []
+        for x0, x1 in bounds:
+            ys = horizontal_rules_at(rules, (x0 + x1) / 2, below=top)
+            column_ys.append(ys if len(ys) >= 2 else row_ys)
+    else:
+        row_ys = row_starts(body, bounds, schema.key, top if top is not None else float('-inf'))
+        column_ys = [row_ys] * len(bounds)
+
+    # Bucket words by (column, band between that column's rules)
+    cells = {}
+    for word in body:
+        column = column_of(bounds, centre_x(word))
+        if column is None:
+            continue
+        ys = column_ys[column]
+        band = bisect_right(ys, centre_y(word))
+        if 0 < band < len(ys):
+            cells.setdefault((column, band), []).append(word)
+
+    rows = []
+    for row_top, row_bottom in zip(row_ys, row_ys[1:]):
+        middle = (row_top + row_bottom) / 2
+        row = []
+        for column, ys in enumerate(column_ys):
+            cell_words = cells.get((column, bisect_right(ys, middle)))
+            row.append(cell_text(cell_words) if cell_words else '')
+        if any(row):
+            rows.append(row)
+    return rows
+
+
+def find_document_schema(pdf, required, key_keywords):
+    """Derive the schema from the first page of a pdf_cache document that has the header row."""
+    for page in pdf.pages:
+        schema = detect_schema(page.extract_words(), page.extract_rules(), required, key_keywords)
+        if schema is not None:
+            return schema
+    return None
+
+
+def extract_page_table(page, schema, required):
+    """extract_table for a pdf_cache page."""
+    return extract_table(page.extract_words(), page.extract_rules(), schema, required)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Materialized per-day teaching calendar.
+
+The calendar PDF's month grid (see parse_academic_calendar.grid_days) gives
+one cell per day of the academic year. Each cell is combined with the text
+events into compact per-day arrays, indexed by the day's offset from the
+first grid day:
+    flags   bitmask of TEACHING, HOLIDAY, MAKEUP, EXAM, ADD_DROP and MARKED
+            (an asterisked grid cell)
+    term    0 outside the teaching terms, else the term's TERM_CODES code
+    week    teaching week within the term, counted from the week of its first
+            teaching day (0 outside the terms)
+A running count of teaching days is kept as well. Questions such as "is this a
+teaching day", "week number for this date" or "teaching days left before
+add/drop closes" then take one or two array lookups.
+
+A term runs from its "First Teaching Day" event to its "Last Teaching Day"
+event. If a calendar lists no first teaching day for a term, the first Monday
+of the term's add/drop period is used. Teaching days are the term's weekdays
+that are not holidays, plus its make-up days.
+
+Usage:
+    python teaching_calendar.py 2025-10-15
+    python teaching_calendar.py 2025-09-01 --until 2025-09-12     # teaching days in a range
+"""
+
+import argparse
+import json
+import sys
+from array import array
+from datetime import date, timedelta
+from pathlib import Path
+
+from parse_grammar import GRID_EVENT_MARKER, GRID_HOLIDAY_RE, GRID_MAKEUP_MARKER, TEACHING_DAY_RE
+
+OUTPUT_PATH = Path('teaching_calendar.json')
+
+TEACHING = 1
+HOLIDAY = 2
+MAKEUP = 4
+EXAM = 8
+ADD_DROP = 16
+MARKED = 32
+FLAG_NAMES = {TEACHING: 'teaching', HOLIDAY: 'holiday', MAKEUP: 'make-up', EXAM: 'exam',
+              ADD_DROP: 'add/drop', MARKED: 'marked'}
+
+# Event types that mark every day of the event
+EVENT_FLAGS = {'HOLIDAY': HOLIDAY, 'CLASS_MAKEUP': MAKEUP, 'EXAM': EXAM, 'ADD_DROP': ADD_DROP}
+# Per-day term codes; index 0 is "no term"
+TERMS = ('', 'T1', 'T2', 'T3', 'SUMMER')
+TERM_CODES = {term: code for code, term in enumerate(TERMS) if term}
+
+
+def to_date(day):
+    """A date from a date, datetime or ISO string ('2025-10-03' or '2025-10-03T00:00:00')."""
+    if isinstance(day, str):
+        return date.fromisoformat(day[:10])
+    if hasattr(day, 'date'):
+        return day.date()
+    return day
+
+
+def term_ranges(events):
+    """
+    {term: (first teaching day, last teaching day)} from the teaching-day events. A term
+    with a last but no first teaching day starts on the first Monday of its add/drop period.
+    """
+    first_days = {}
+    last_days = {}
+    add_drop_starts = {}
+    for event in events:
+        match = TEACHING_DAY_RE.search(event.name)
+        if match:
+            days = first_days if match.group(1).lower() == 'first' else last_days
+            days.setdefault(event.term, to_date(event.start_date))
+        elif event.event_type == 'ADD_DROP':
+            start = to_date(event.start_date)
+            add_drop_starts[event.term] = min(start, add_drop_starts.get(event.term, start))
+
+    ranges = {}
+    for term, last_day in last_days.items():
+        first_day = first_days.get(term)
+        if first_day is None and term in add_drop_starts:
+            start = add_drop_starts[term]
+            first_day = start + timedelta(days=-start.weekday() % 7)
+        if first_day is None or first_day > last_day:
+            print(f"Warning: no teaching period found for {term}")
+            continue
+        ranges[term] = (first_day, last_day)
+    return ranges
+
+
+class TeachingCalendar:
+    """Per-day flags, term and week arrays from first_day on, with a running count of teaching days."""
+
+    def __init__(self, first_day, flags, terms, weeks):
+        self.first_day = to_date(first_day)
+        self.first_ordinal = self.first_day.toordinal()
+        self.flags = array('B', flags)
+        self.terms = array('B', terms)
+        self.weeks = array('B', weeks)
+        # teaching_before[i] = teaching days among the first i days
+        self.teaching_before = array('H', [0])
+        count = 0
+        for day_flags in self.flags:
+            count += day_flags & TEACHING
+            self.teaching_before.append(count)
+
+    @classmethod
+    def build(cls, grid, events):
+        """
+        Materialize the calendar from grid [(date, cell text)] (parse_academic_calendar.grid_days)
+        and the CalendarEvents of the same academic year. Events outside the grid are clipped.
+        """
+        grid = list(grid)
+        if not grid:
+            raise ValueError('calendar grid has no day cells')
+        first_day = min(day for day, _ in grid)
+        size = (max(day for day, _ in grid) - first_day).days + 1
+        flags = array('B', bytes(size))
+        terms = array('B', bytes(size))
+        weeks = array('B', bytes(size))
+
+        def offsets(start, end):
+            return range(max((start - first_day).days, 0), min((end - first_day).days + 1, size))
+
+        for day, cell in grid:
+            i = (day - first_day).days
+            if GRID_EVENT_MARKER in cell:
+                flags[i] |= MARKED
+            if GRID_MAKEUP_MARKER in cell:
+                flags[i] |= MAKEUP
+            elif GRID_HOLIDAY_RE.search(cell):
+                flags[i] |= HOLIDAY
+
+        for event in events:
+            event_flag = EVENT_FLAGS.get(event.event_type)
+            if event_flag:
+                start = to_date(event.start_date)
+                end = to_date(event.end_date) if event.end_date else start
+                for i in offsets(start, end):
+                    flags[i] |= event_flag
+
+        for term, (term_start, term_end) in term_ranges(events).items():
+            code = TERM_CODES.get(term)
+            if code is None:
+                continue
+            week_start = (term_start - first_day).days - term_start.weekday()
+            for i in offsets(term_start, term_end):
+                terms[i] = code
+                weeks[i] = (i - week_start) // 7 + 1
+                day_flags = flags[i]
+                weekday = (first_day + timedelta(days=i)).weekday()
+                if day_flags & MAKEUP or (weekday < 5 and not day_flags & HOLIDAY):
+                    flags[i] = day_flags | TEACHING
+
+        return cls(first_day, flags, terms, weeks)
+
+    def __len__(self):
+        return len(self.flags)
+
+    @property
+    def last_day(self):
+        return self.first_day + timedelta(days=len(self) - 1)
+
+    def offset(self, day):
+        """Index of day in the arrays."""
+        i = to_date(day).toordinal() - self.first_ordinal
+        if not 0 <= i < len(self.flags):
+            raise ValueError(f"{to_date(day)} is outside the calendar ({self.first_day} - {self.last_day})")
+        return i
+
+    def day_flags(self, day):
+        return self.flags[self.offset(day)]
+
+    def is_teaching_day(self, day):
+        return bool(self.flags[self.offset(day)] & TEACHING)
+
+    def term(self, day):
+        """Term of a day ('T1', 'T2', ...), or None outside the teaching terms."""
+        return TERMS[self.terms[self.offset(day)]] or None
+
+    def week_number(self, day):
+        """Teaching week of a day within its term, or None outside the teaching terms."""
+        return self.weeks[self.offset(day)] or None
+
+    def teaching_days_between(self, first_day, last_day):
+        """Teaching days from first_day to last_day, both included."""
+        first, last = self.offset(first_day), self.offset(last_day)
+        if last < first:
+            return 0
+        return self.teaching_before[last + 1] - self.teaching_before[first]
+
+    def describe(self, day):
+        i = self.offset(day)
+        return {
+            'date': to_date(day).isoformat(),
+            'term': TERMS[self.terms[i]] or None,
+            'week': self.weeks[i] or None,
+            'flags': [name for flag, name in FLAG_NAMES.items() if self.flags[i] & flag],
+        }
+
+    def summary(self):
+        """{term: (first day, last day, teaching days, weeks)} over the terms present."""
+        spans = {}
+        for i, code in enumerate(self.terms):
+            if code:
+                spans.setdefault(code, [i, i])[1] = i
+        return {
+            TERMS[code]: (self.first_day + timedelta(days=first), self.first_day + timedelta(days=last),
+                          self.teaching_before[last + 1] - self.teaching_before[first], self.weeks[last])
+            for code, (first, last) in spans.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['first_day'], data['flags'], data['term'], data['week'])
+
+    def to_dict(self):
+        return {
+            'first_day': self.first_day.isoformat(),
+            'last_day': self.last_day.isoformat(),
+            'flag_bits': {name: flag for flag, name in FLAG_NAMES.items()},
+            'terms': list(TERMS),
+            'flags': self.flags.tolist(),
+            'term': self.terms.tolist(),
+            'week': self.weeks.tolist(),
+            'teaching_days_before': self.teaching_before.tolist(),
+        }
+
+
+def load_teaching_calendar(path=OUTPUT_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return TeachingCalendar.from_dict(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up days in the materialized teaching calendar.')
+    parser.add_argument('date', help='day to look up (YYYY-MM-DD)')
+    parser.add_argument('--until', help='also count the teaching days from date to this day (inclusive)')
+    parser.add_argument('--calendar', type=Path, default=OUTPUT_PATH,
+                        help=f'teaching calendar written by parse_academic_calendar.py (default: {OUTPUT_PATH})')
+    args = parser.parse_args()
+
+    if not args.calendar.exists():
+        print(f"Error: teaching calendar not found: {args.calendar} (run parse_academic_calendar.py first)")
+        sys.exit(1)
+    calendar = load_teaching_calendar(args.calendar)
+
+    try:
+        day = calendar.describe(args.date)
+        print(f"{day['date']}: {day['term'] or 'no term'}"
+              + (f", week {day['week']}" if day['week'] else '')
+              + (f" ({', '.join(day['flags'])})" if day['flags'] else ''))
+        if args.until:
+            print(f"Teaching days {args.date} - {args.until}: {calendar.teaching_days_between(args.date, args.until)}")
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Bulk SQL emitter for transcript grades.
+Parses one or more transcript PDFs with parse_transcript_improved and writes a
+psql load script that stages every grade with COPY and then upserts them into
+grades with a single set-based INSERT ... SELECT, instead of one statement per grade.
+
+Usage:
+    python transcript_sql.py FilbertHamijoyo_CUSZ_TSCRPT.pdf
+    python transcript_sql.py transcripts/*.pdf -o cohort_grades_load.sql
+    psql "$DATABASE_URL" -f transcript_grades_load.sql
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+from parse_transcript_improved import TranscriptStream
+
+STAGING_COLUMNS = (
+    'student_identifier',
+    'course_code',
+    'semester',
+    'year',
+    'letter_grade',
+    'numeric_grade',
+    'grade_points',
+)
+
+LOAD_PREAMBLE = '''BEGIN;
+
+CREATE TEMP TABLE staging_grades (
+    student_identifier TEXT NOT NULL,
+    course_code TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    letter_grade TEXT,
+    numeric_grade DOUBLE PRECISION,
+    grade_points DOUBLE PRECISION
+) ON COMMIT DROP;
+
+COPY staging_grades ({columns}) FROM STDIN WITH (FORMAT csv);
+'''
+
+# DISTINCT ON keeps one row per enrollment, so a student appearing in two PDFs
+# cannot make ON CONFLICT touch the same grade twice in one statement.
+LOAD_UPSERT = r'''\.
+
+INSERT INTO grades (enrollment_id, letter_grade, numeric_grade, grade_points, status, submitted_at, approved_at)
+SELECT DISTINCT ON (e.id)
+    e.id,
+    s.letter_grade,
+    s.numeric_grade,
+    s.grade_points,
+    'PUBLISHED',
+    CURRENT_TIMESTAMP,
+    CURRENT_TIMESTAMP
+FROM staging_grades s
+JOIN users u ON u.user_identifier = s.student_identifier
+JOIN courses c ON c.course_code = s.course_code
+    AND c.semester::text = s.semester
+    AND c.year = s.year
+JOIN enrollments e ON e.user_id = u.id AND e.course_id = c.id
+ORDER BY e.id
+ON CONFLICT (enrollment_id)
+DO UPDATE SET
+    letter_grade = EXCLUDED.letter_grade,
+    numeric_grade = EXCLUDED.numeric_grade,
+    grade_points = EXCLUDED.grade_points,
+    status = 'PUBLISHED',
+    approved_at = CURRENT_TIMESTAMP;
+
+-- Staged grades with no matching student/course/enrollment were not loaded
+SELECT s.student_identifier, s.course_code, s.semester, s.year
+FROM staging_grades s
+LEFT JOIN users u ON u.user_identifier = s.student_identifier
+LEFT JOIN courses c ON c.course_code = s.course_code
+    AND c.semester::text = s.semester
+    AND c.year = s.year
+LEFT JOIN enrollments e ON e.user_id = u.id AND e.course_id = c.id
+WHERE e.id IS NULL
+ORDER BY s.student_identifier, s.year, s.semester, s.course_code;
+
+COMMIT;
+'''
+
+
+def grade_rows(student_id, courses):
+    """Turn parsed GradeRecords into staging rows (in STAGING_COLUMNS order)."""
+    return [
+        (
+            student_id,
+            course.course_code,
+            course.semester,
+            course.year,
+            course.letter_grade,
+            course.numeric_grade,
+            course.grade_points,
+        )
+        for course in courses
+    ]
+
+
+def write_load_script(f, rows):
+    """Write a psql script that COPYs rows into a staging table and upserts grades from it."""
+    f.write(LOAD_PREAMBLE.format(columns=', '.join(STAGING_COLUMNS)))
+    # In COPY's CSV format an empty unquoted field is NULL, which is how csv writes None
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerows(rows)
+    f.write(LOAD_UPSERT)
+
+
+def transcript_rows(pdf_path, student_id=None):
+    """Parse one transcript PDF and return (student_id, rows)."""
+    stream = TranscriptStream(pdf_path)
+    courses = list(stream)
+    student_id = student_id or stream.student_id
+    if not student_id:
+        raise ValueError(f"no student id found in {pdf_path}; pass --student-id")
+
+    return student_id, grade_rows(student_id, courses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a COPY-based bulk grade load script from transcript PDFs.')
+    parser.add_argument('pdf_paths', nargs='+', help='transcript PDF(s)')
+    parser.add_argument('-o', '--output', default='transcript_grades_load.sql',
+                        help='output SQL file (default: transcript_grades_load.sql)')
+    parser.add_argument('--student-id',
+                        help='student id (users.user_identifier) to use instead of the PDF header; single PDF only')
+    args = parser.parse_args()
+
+    if args.student_id and len(args.pdf_paths) > 1:
+        parser.error('--student-id can only be used with a single PDF')
+
+    rows = []
+    failures = 0
+    for pdf_path in args.pdf_paths:
+        if not Path(pdf_path).exists():
+            print(f"Error: PDF file not found: {pdf_path}")
+            failures += 1
+            continue
+
+        print(f"Parsing transcript PDF: {pdf_path}")
+        try:
+            student_id, pdf_rows = transcript_rows(pdf_path, args.student_id)
+        except ValueError as e:
+            print(f"  Error: {e}")
+            failures += 1
+            continue
+
+        print(f"  Student {student_id}: {len(pdf_rows)} grades")
+        rows.extend(pdf_rows)
+
+    if not rows:
+        print("\nNo grades extracted, nothing written")
+        sys.exit(1)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        write_load_script(f, rows)
+
+    print(f"\nWrote {len(rows)} grades from {len(args.pdf_paths) - failures} transcript(s) to: {args.output}")
+    if failures:
+        print(f"Skipped {failures} file(s) with errors")
+
+
+if __name__ == '__main__':
+    main()